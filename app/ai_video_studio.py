@@ -8,6 +8,7 @@ import os
 import sys
 from typing import List, Dict, Any
 import json
+import time
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,13 +16,18 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.config import CONFIG
 from src.logging_utils import setup_logger
 from src.script_gen import generate_script
-from src.tts import synthesize_speech
-from src.visuals import generate_visuals
-from src.assembler import assemble_video
-from src.thumbnail import create_thumbnail
+from src.encoding import EncodingProfile
+from src.jobqueue import JobQueue, ensure_worker
+from src.workspace import new_run_id
 
 logger = setup_logger(__name__)
 
+
+@st.cache_resource
+def render_queue() -> JobQueue:
+    return JobQueue()
+
+
 st.set_page_config(
     page_title="AI Video Studio",
     page_icon="🎬",
@@ -74,6 +80,12 @@ with st.sidebar:
         ["720p HD", "1080p Full HD", "4K Ultra HD"],
         index=1
     )
+    render_tier = st.radio(
+        "Render speed",
+        ["Final (best quality)", "Draft (fast, lower quality)"],
+        index=0,
+        help="Speed/quality of the full render after the preview; Draft uses the fastest encoder settings.",
+    )
     
     # AI model selection
     st.subheader("🤖 AI Models")
@@ -91,6 +103,7 @@ with st.sidebar:
         fps = st.slider("FPS", 24, 60, 30)
         bitrate = st.selectbox("Bitrate", ["High", "Medium", "Low"], index=0)
         style = st.selectbox("Visual Style", ["Cinematic", "Modern", "Minimalist", "Dynamic"])
+        regenerate_script = st.checkbox("Force new script (ignore cache)", value=False)
 
 # Main content area
 col1, col2 = st.columns([2, 1])
@@ -146,7 +159,7 @@ with col2:
     # Recent videos
     st.subheader("📁 Recent Videos")
     if os.path.exists("outputs/final"):
-        recent_videos = [f for f in os.listdir("outputs/final") if f.endswith('.mp4')]
+        recent_videos = sorted(f for f in os.listdir("outputs/final") if f.endswith('.mp4'))
         if recent_videos:
             for video in recent_videos[-3:]:  # Show last 3
                 if st.button(f"📹 {video}", key=f"recent_{video}"):
@@ -180,7 +193,8 @@ if st.button("🎬 Generate Video", type="primary", use_container_width=True):
                         enhanced_prompt, 
                         tone=tone.lower(), 
                         target_duration_sec=duration, 
-                        language="hi" if language == "Hindi" else "en"
+                        language="hi" if language == "Hindi" else "en",
+                        use_cache=not regenerate_script,
                     )
                     
                     # Display generated script for review
@@ -193,37 +207,91 @@ if st.button("🎬 Generate Video", type="primary", use_container_width=True):
                     
                     status.update(label="✅ Professional script generated!", state="complete")
                 
-                # Step 2: Generate audio
-                with st.status("🎵 Creating voice-over...", expanded=True) as status:
-                    audio_files = synthesize_speech(storyboard.get("scenes", []), voice="", speed=1.0)
-                    status.update(label="✅ Audio generated!", state="complete")
-                
-                # Step 3: Generate visuals
-                with st.status("🎨 Creating visuals...", expanded=True) as status:
-                    video_files = generate_visuals(storyboard.get("scenes", []), style=video_style.lower())
-                    status.update(label="✅ Visuals created!", state="complete")
-                
-                # Step 4: Assemble final video
-                with st.status("🎬 Assembling final video...", expanded=True) as status:
-                    output_path = f"outputs/final/ai_studio_{len(os.listdir('outputs/final') if os.path.exists('outputs/final') else []) + 1}.mp4"
-                    subtitles = [s.get("on_screen_text") or s.get("script_text") or "" for s in storyboard.get("scenes", [])]
-                    final_video = assemble_video(video_files, audio_files, subtitles, output_path)
-                    
-                    # Create thumbnail
-                    thumbnail_path = output_path.replace('.mp4', '_thumb.jpg')
-                    create_thumbnail(storyboard.get("title", "AI Generated Video"), thumbnail_path)
-                    
-                    status.update(label="✅ Video ready!", state="complete")
-                
-                st.success("🎉 Your professional video is ready!")
-                st.session_state.generated_video = final_video
-                st.session_state.video_title = storyboard.get("title", "AI Generated Video")
-                st.session_state.video_duration = duration
+                # Steps 2-4: voice-over, visuals and assembly run on the render workers, starting
+                # with a quick low-resolution preview
+                st.session_state.preview_job = render_queue().submit(
+                    {
+                        "storyboard": storyboard,
+                        "voice": "",
+                        "speed": 1.0,
+                        "style": video_style.lower(),
+                        "draft": True,
+                    }
+                )
+                st.session_state.final_job = None
+                st.session_state.generated_video = None
                 
             except Exception as e:
                 st.error(f"❌ Error creating video: {str(e)}")
                 logger.error(f"Video generation failed: {e}")
 
+
+def show_job_progress(job) -> None:
+    """Report a queued or running job and poll again shortly; the render itself runs in a worker."""
+    if job.status == "queued":
+        # Without a `python -m src.jobqueue worker` running, render in this server process
+        ensure_worker(render_queue())
+        st.info("⏳ Waiting for a render worker...")
+    else:
+        st.info(f"🎬 Rendering on {job.worker} (attempt {job.attempts})...")
+    time.sleep(CONFIG.job_poll_seconds)
+    st.rerun()
+
+
+# Preview, then the full-quality render only once the user confirms
+preview_job = render_queue().get(st.session_state.preview_job) if st.session_state.get("preview_job") else None
+if preview_job is not None:
+    st.markdown("---")
+    st.header("👀 Preview")
+    if preview_job.status == "failed":
+        st.error(f"❌ Error creating preview: {preview_job.error}")
+    elif not preview_job.finished:
+        show_job_progress(preview_job)
+    else:
+        preview = preview_job.result
+        st.caption(
+            f"Low-resolution draft rendered in {preview['wall_seconds']:.1f}s: check pacing and text, "
+            "then render the full-quality video."
+        )
+        st.video(preview["video"])
+        
+        if not st.session_state.get("final_job") and st.button(
+            "✅ Render Full Quality", type="primary", use_container_width=True
+        ):
+            output_path = f"outputs/final/ai_studio_{new_run_id()}.mp4"
+            profile = EncodingProfile.from_settings(
+                video_quality, fps=fps, bitrate=bitrate, tier=render_tier.split(" ")[0]
+            )
+            st.session_state.final_job = render_queue().submit(
+                {
+                    "storyboard": preview["storyboard"],
+                    "voice": "",
+                    "speed": 1.0,
+                    "style": video_style.lower(),
+                    "profile": profile.to_dict(),
+                    "output": output_path,
+                    # The voice-over does not depend on the output format; keep the preview's
+                    "reuse_audio": preview["scene_audios"],
+                }
+            )
+            st.rerun()
+
+final_job = render_queue().get(st.session_state.final_job) if st.session_state.get("final_job") else None
+if final_job is not None:
+    if final_job.status == "failed":
+        st.error(f"❌ Error creating video: {final_job.error}")
+        logger.error(f"Video generation failed: {final_job.error}")
+        st.session_state.final_job = None
+    elif not final_job.finished:
+        show_job_progress(final_job)
+    else:
+        st.success("🎉 Your professional video is ready!")
+        st.session_state.generated_video = final_job.result["video"]
+        st.session_state.video_title = final_job.result["title"]
+        st.session_state.video_duration = round(final_job.result["duration"])
+        st.session_state.preview_job = None
+        st.session_state.final_job = None
+
 # Display generated video
 if hasattr(st.session_state, 'generated_video') and st.session_state.generated_video:
     st.markdown("---")
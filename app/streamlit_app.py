@@ -14,10 +14,12 @@ from src.config import CONFIG
 from src.logging_utils import setup_logger
 from src.transcribe import transcribe_audio
 from src.script_gen import generate_script
-from src.tts import synthesize_speech
+from src.tts import synthesize_speech_clips
 from src.visuals import generate_visuals
 from src.assembler import assemble_video
+from src.incremental import plan_rerender, rerender
 from src.thumbnail import create_thumbnail
+from src.workspace import RunWorkspace
 
 logger = setup_logger(__name__)
 
@@ -39,6 +41,13 @@ if "scene_videos" not in st.session_state:
     st.session_state.scene_videos = []
 if "final_video" not in st.session_state:
     st.session_state.final_video = None
+if "render_state" not in st.session_state:
+    st.session_state.render_state = None
+if "workspace" not in st.session_state:
+    # Every browser session renders into its own directory tree
+    st.session_state.workspace = RunWorkspace.create()
+if "preview" not in st.session_state:
+    st.session_state.preview = None  # (video path, render state) of the pending draft preview
 
 # --- Auto Mode ---
 with st.expander("🚀 Auto Mode - Professional Video Creator", expanded=True):
@@ -60,19 +69,43 @@ with st.expander("🚀 Auto Mode - Professional Video Creator", expanded=True):
                 # Use topic as input, request Hindi by passing language='hi'
                 sb = generate_script(topic.strip(), tone=auto_tone, target_duration_sec=auto_target, language="hi")
                 st.session_state.storyboard = sb
-            with st.spinner("Synthesizing Hindi voice-over..."):
-                audios = synthesize_speech(st.session_state.storyboard.get("scenes", []), voice=(CONFIG.openai_tts_voice or ""), speed=1.0)
-                st.session_state.scene_audios = audios
-            with st.spinner("Creating visuals..."):
-                vids = generate_visuals(st.session_state.storyboard.get("scenes", []), style="animated slides")
-                st.session_state.scene_videos = vids
-            with st.spinner("Assembling final video..."):
-                output_video_path = os.path.join("outputs", "final", "final_video.mp4")
-                subs = [s.get("on_screen_text") or s.get("script_text") or "" for s in st.session_state.storyboard.get("scenes", [])]
-                out = assemble_video(st.session_state.scene_videos, st.session_state.scene_audios, subs, output_video_path)
-                st.session_state.final_video = out
-                thumb_path = os.path.join("outputs", "final", "thumbnail.jpg")
-                create_thumbnail(st.session_state.storyboard.get("title", "Video"), thumb_path)
+            with st.spinner("Synthesizing Hindi voice-over and rendering a quick preview..."):
+                preview, preview_state = rerender(
+                    st.session_state.storyboard.get("scenes", []),
+                    st.session_state.workspace.preview.final_path("auto_preview.mp4"),
+                    None,
+                    voice=(CONFIG.openai_tts_voice or ""),
+                    speed=1.0,
+                    style="animated slides",
+                    draft=True,
+                    workspace=st.session_state.workspace,
+                )
+                st.session_state.preview = (preview.video_path, preview_state)
+            st.success(f"Preview ready in {preview.wall_seconds:.1f}s. Render full quality when it looks right.")
+
+    if st.session_state.preview is not None:
+        preview_path, preview_state = st.session_state.preview
+        if os.path.exists(preview_path):
+            st.video(preview_path)
+        if st.button("✅ Render full quality", use_container_width=True):
+            with st.spinner("Rendering the full-quality video..."):
+                # Reuses the preview's voice-overs; only the clips are rendered again
+                result, st.session_state.render_state = rerender(
+                    st.session_state.storyboard.get("scenes", []),
+                    st.session_state.workspace.final_path("final_video.mp4"),
+                    preview_state,
+                    voice=(CONFIG.openai_tts_voice or ""),
+                    speed=1.0,
+                    style="animated slides",
+                    workspace=st.session_state.workspace,
+                )
+                st.session_state.scene_audios = result.scene_audios
+                st.session_state.scene_videos = result.scene_videos
+                st.session_state.final_video = result.video_path
+                st.session_state.preview = None
+                create_thumbnail(
+                    st.session_state.storyboard.get("title", "Video"), workspace=st.session_state.workspace
+                )
             st.success("Auto Mode complete! Scroll down to preview/download.")
 
 col_left, col_right = st.columns([1, 1])
@@ -87,8 +120,7 @@ with col_left:
             if uploaded is None:
                 st.error("Please upload an audio file.")
             else:
-                os.makedirs(".tmp", exist_ok=True)
-                audio_path = os.path.join(".tmp", uploaded.name)
+                audio_path = st.session_state.workspace.scratch_path(os.path.basename(uploaded.name))
                 with open(audio_path, "wb") as f:
                     f.write(uploaded.read())
                 result = transcribe_audio(audio_path, None if lang == "auto" else lang)
@@ -102,9 +134,10 @@ with col_right:
     st.session_state.transcript = raw
     tone = st.selectbox("Tone", ["conversational", "friendly", "educational", "humorous", "serious"])
     target_sec = st.slider("Target duration (sec)", 30, 600, 90, 10)
+    regenerate = st.checkbox("Force regenerate (ignore cached storyboard)", value=False)
     if st.button("Generate storyboard"):
         with st.spinner("Generating storyboard via GPT or fallback..."):
-            sb = generate_script(st.session_state.transcript, tone=tone, target_duration_sec=target_sec)
+            sb = generate_script(st.session_state.transcript, tone=tone, target_duration_sec=target_sec, use_cache=not regenerate)
             st.session_state.storyboard = sb
             st.success("Storyboard generated.")
     if st.session_state.storyboard:
@@ -128,9 +161,15 @@ with col3:
             st.error("Generate a storyboard first.")
         else:
             with st.spinner("Synthesizing speech..."):
-                audios = synthesize_speech(st.session_state.storyboard.get("scenes", []), voice=voice, speed=speed)
-                st.session_state.scene_audios = audios
-                st.success(f"Generated {len(audios)} audio files.")
+                clips = synthesize_speech_clips(
+                    st.session_state.storyboard.get("scenes", []),
+                    voice=voice,
+                    speed=speed,
+                    workspace=st.session_state.workspace,
+                )
+                st.session_state.scene_audios = [path for path, _duration in clips]
+                total = sum(duration for _path, duration in clips)
+                st.success(f"Generated {len(clips)} audio files ({total:.1f}s of voice-over).")
 
 with col4:
     st.subheader("4) Visuals")
@@ -140,15 +179,17 @@ with col4:
             st.error("Generate a storyboard first.")
         else:
             with st.spinner("Creating visuals..."):
-                vids = generate_visuals(st.session_state.storyboard.get("scenes", []), style=style)
+                vids = generate_visuals(
+                    st.session_state.storyboard.get("scenes", []), style=style, workspace=st.session_state.workspace
+                )
                 st.session_state.scene_videos = vids
                 st.success(f"Generated {len(vids)} visual clips.")
 
 st.markdown("---")
 
 st.subheader("5) Assemble video")
-output_video_path = os.path.join("outputs", "final", "final_video.mp4")
-thumb_path = os.path.join("outputs", "final", "thumbnail.jpg")
+output_video_path = st.session_state.workspace.final_path("final_video.mp4")
+thumb_path = st.session_state.workspace.final_path("thumbnail.jpg")
 
 if st.button("Assemble"):
     if not st.session_state.scene_videos or not st.session_state.scene_audios:
@@ -156,11 +197,43 @@ if st.button("Assemble"):
     else:
         with st.spinner("Assembling final video..."):
             subs = [s.get("on_screen_text") or s.get("script_text") or "" for s in st.session_state.storyboard.get("scenes", [])]
-            out = assemble_video(st.session_state.scene_videos, st.session_state.scene_audios, subs, output_video_path)
+            out = assemble_video(
+                st.session_state.scene_videos,
+                st.session_state.scene_audios,
+                subs,
+                output_video_path,
+                workspace=st.session_state.workspace,
+            )
             st.session_state.final_video = out
             create_thumbnail(st.session_state.storyboard.get("title", "Video"), thumb_path)
             st.success("Assembly complete.")
 
+# After editing the storyboard JSON, rebuild only the scenes whose text, timing or voice changed
+if st.button("Update video (changed scenes only)"):
+    if not st.session_state.storyboard:
+        st.error("Generate a storyboard first.")
+    else:
+        scenes = st.session_state.storyboard.get("scenes", [])
+        plan = plan_rerender(scenes, st.session_state.render_state, voice, speed, style)
+        with st.spinner(
+            f"Re-rendering {len(plan.audio)} voice-overs and {len(plan.visuals)} clips "
+            f"({len(plan.unchanged)} of {len(scenes)} scenes unchanged)..."
+        ):
+            result, st.session_state.render_state = rerender(
+                scenes,
+                output_video_path,
+                st.session_state.render_state,
+                voice=voice,
+                speed=speed,
+                style=style,
+                workspace=st.session_state.workspace,
+            )
+            st.session_state.scene_audios = result.scene_audios
+            st.session_state.scene_videos = result.scene_videos
+            st.session_state.final_video = result.video_path
+            create_thumbnail(st.session_state.storyboard.get("title", "Video"), thumb_path)
+            st.success("Video updated.")
+
 if st.session_state.final_video and os.path.exists(st.session_state.final_video):
     st.video(st.session_state.final_video)
     with open(st.session_state.final_video, "rb") as f:
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import visuals  # noqa: E402
+from src.backgrounds import clear_cache, render_background  # noqa: E402
+from src.encoding import EncodingProfile  # noqa: E402
+
+
+def _legacy_slide_background(width: int, height: int) -> Image.Image:
+    # Pre-vectorization renderer: one draw.line call per row, every scene
+    bg = Image.new("RGB", (width, height), color=(0, 0, 0))
+    draw = ImageDraw.Draw(bg)
+    for y in range(height):
+        color_ratio = y / height
+        r = int(20 + (50 - 20) * color_ratio)
+        g = int(30 + (60 - 30) * color_ratio)
+        b = int(40 + (80 - 40) * color_ratio)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+    return bg
+
+
+def _per_scene_ms(fn, scenes: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(scenes):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / scenes
+
+
+def bench_slides(scenes: int, width: int, height: int) -> None:
+    text = "Benchmark scene with a reasonably long line of on screen text for wrapping"
+
+    clear_cache()
+    legacy_bg = _per_scene_ms(lambda: _legacy_slide_background(width, height), scenes)
+    cached_bg = _per_scene_ms(lambda: render_background(width, height), scenes)
+
+    visuals.render_background = lambda w, h, palette="default": _legacy_slide_background(w, h)
+    try:
+        legacy_slide = _per_scene_ms(lambda: visuals._text_to_slide(text, width, height), scenes)
+    finally:
+        visuals.render_background = render_background
+    cached_slide = _per_scene_ms(lambda: visuals._text_to_slide(text, width, height), scenes)
+
+    print(f"slides: {scenes} scenes at {width}x{height}")
+    print(f"  background  legacy {legacy_bg:8.2f} ms/scene  cached {cached_bg:8.2f} ms/scene  ({legacy_bg / max(cached_bg, 1e-9):.1f}x)")
+    print(f"  full slide  legacy {legacy_slide:8.2f} ms/scene  cached {cached_slide:8.2f} ms/scene  ({legacy_slide / max(cached_slide, 1e-9):.1f}x)")
+
+
+def bench_still_encode(duration: float, width: int, height: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        img_path = os.path.join(tmp, "slide.png")
+        visuals._text_to_slide("Still image encode benchmark", width, height).save(img_path)
+
+        t0 = time.perf_counter()
+        visuals._encode_still_moviepy(img_path, os.path.join(tmp, "moviepy.mp4"), duration, True, True)
+        legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        visuals._encode_still(img_path, os.path.join(tmp, "still.mp4"), duration, True, True)
+        current = time.perf_counter() - t0
+
+    print(f"still encode: {duration:.0f}s slide at {width}x{height}")
+    print(f"  moviepy frames {legacy:8.2f} s  ffmpeg still {current:8.2f} s  ({legacy / max(current, 1e-9):.1f}x)")
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def bench_profiles(duration: float) -> None:
+    print(f"profiles: {duration:.0f}s slide, ffmpeg CPU seconds")
+    with tempfile.TemporaryDirectory() as tmp:
+        for quality in ("720p", "1080p", "4k"):
+            row = []
+            for tier in ("draft", "final"):
+                profile = EncodingProfile.from_settings(quality, tier=tier)
+                img_path = os.path.join(tmp, f"{quality}.png")
+                visuals._text_to_slide("Encoding profile benchmark", profile.width, profile.height).save(img_path)
+                cpu0 = _children_cpu()
+                visuals._encode_still(
+                    img_path, os.path.join(tmp, f"{quality}_{tier}.mp4"), duration, True, True, profile=profile
+                )
+                row.append(f"{tier} {_children_cpu() - cpu0:6.2f} s")
+            print(f"  {quality:>5}  " + "  ".join(row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the visuals stage")
+    parser.add_argument("--scenes", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--encode-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    bench_slides(args.scenes, args.width, args.height)
+    bench_still_encode(args.encode_seconds, args.width, args.height)
+    bench_profiles(args.encode_seconds)
+
+
+if __name__ == "__main__":
+    main()
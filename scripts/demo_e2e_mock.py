@@ -4,9 +4,7 @@ import json
 import os
 
 from src.script_gen import generate_script
-from src.tts import synthesize_speech
-from src.visuals import generate_visuals
-from src.assembler import assemble_video
+from src.pipeline import run_pipeline
 
 
 def main() -> None:
@@ -18,11 +16,8 @@ def main() -> None:
     storyboard = generate_script(transcript, tone="friendly", target_duration_sec=30, language="hi")
     scenes = storyboard["scenes"]
 
-    audio_paths = synthesize_speech(scenes, voice="", speed=1.0)
-    scene_videos = generate_visuals(scenes, style="animated slides")
-
-    subtitles = [s.get("on_screen_text") or s.get("script_text") or "" for s in scenes]
-    out = assemble_video(scene_videos, audio_paths, subtitles, "outputs/final/demo_out.mp4")
+    result = run_pipeline(scenes, "outputs/final/demo_out.mp4", voice="", speed=1.0, style="animated slides")
+    out = result.video_path
 
     print("Storyboard:\n", json.dumps(storyboard, ensure_ascii=False, indent=2))
     print("Video:", out)
@@ -35,6 +35,10 @@ def main():
     except subprocess.CalledProcessError:
         print("⚠️  Warning: Some dependencies might be missing")
     
+    # The app queues renders; a worker process picks them up
+    print("🛠️  Starting render worker...")
+    worker = subprocess.Popen([venv_python, "-m", "src.jobqueue", "worker"])
+
     # Start the app
     print("🚀 Launching AI Video Studio...")
     print("📍 App will open at: http://localhost:8501")
@@ -53,6 +57,9 @@ def main():
         print("\n👋 AI Video Studio stopped. Thanks for using!")
     except Exception as e:
         print(f"❌ Error starting app: {e}")
+    finally:
+        worker.terminate()
+        worker.wait()
 
 if __name__ == "__main__":
     main()
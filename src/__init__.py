@@ -3,11 +3,26 @@
 __all__ = [
     "config",
     "logging_utils",
+    "metrics",
+    "cache",
+    "downloads",
+    "probe",
+    "audio_prep",
     "transcribe",
     "script_gen",
     "tts",
+    "workspace",
+    "encoding",
+    "backgrounds",
+    "ai_jobs",
     "visuals",
+    "segments",
+    "subtitles",
     "assembler",
+    "pipeline",
+    "incremental",
+    "batch",
+    "jobqueue",
     "thumbnail",
     "youtube_upload",
 ]
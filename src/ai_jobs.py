@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import CONFIG
+from .downloads import download_file, looks_like_mp4
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_DONE_STATES = {"succeeded", "success", "completed", "complete", "finished", "done"}
+_FAILED_STATES = {"failed", "failure", "error", "cancelled", "canceled"}
+_MAX_POLL_INTERVAL = 15.0
+
+
+@dataclass(frozen=True)
+class Provider:
+    name: str
+    api_key: str
+    submit_url: str
+    status_url: str  # formatted with {id}
+    max_concurrency: int
+    min_interval: float  # seconds between consecutive requests to this provider
+    build_payload: Callable[[str, int], Dict[str, Any]]
+
+
+def _runway_payload(text: str, duration: int) -> Dict[str, Any]:
+    return {
+        "text_prompt": f"Cinematic video: {text}. Professional quality, smooth motion.",
+        "duration": duration,
+        "resolution": "1280x720",
+    }
+
+
+def _pika_payload(text: str, duration: int) -> Dict[str, Any]:
+    return {
+        "prompt": f"Professional video scene: {text}. High quality, cinematic style.",
+        "duration": duration,
+        "aspect_ratio": "16:9",
+    }
+
+
+def configured_providers() -> List[Provider]:
+    """Providers with API keys set, in order of preference (RunwayML first, then Pika Labs)."""
+    providers: List[Provider] = []
+    if CONFIG.runway_api_key:
+        base = CONFIG.runway_api_base.rstrip("/")
+        providers.append(
+            Provider(
+                name="runway",
+                api_key=CONFIG.runway_api_key,
+                submit_url=f"{base}/v1/image_to_video",
+                status_url=f"{base}/v1/tasks/{{id}}",
+                max_concurrency=CONFIG.runway_max_concurrency,
+                min_interval=CONFIG.ai_min_request_interval_seconds,
+                build_payload=_runway_payload,
+            )
+        )
+    if CONFIG.pika_api_key:
+        base = CONFIG.pika_api_base.rstrip("/")
+        providers.append(
+            Provider(
+                name="pika",
+                api_key=CONFIG.pika_api_key,
+                submit_url=f"{base}/v1/generate",
+                status_url=f"{base}/v1/jobs/{{id}}",
+                max_concurrency=CONFIG.pika_max_concurrency,
+                min_interval=CONFIG.ai_min_request_interval_seconds,
+                build_payload=_pika_payload,
+            )
+        )
+    return providers
+
+
+class _RateLimiter:
+    """Spaces request starts at least min_interval seconds apart."""
+
+    def __init__(self, min_interval: float) -> None:
+        self.min_interval = min_interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(now, self._next) + self.min_interval
+
+
+def _video_url(data: Dict[str, Any]) -> Optional[str]:
+    url = data.get("video_url")
+    if url:
+        return url
+    output = data.get("output")
+    if isinstance(output, list) and output:
+        return output[0]
+    if isinstance(output, str):
+        return output
+    return None
+
+
+class _SceneClock:
+    """One scene's deadline, counted from its first submit; cancel stops its download thread."""
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        self.started: Optional[float] = None
+        self.cancel = threading.Event()
+
+    def start(self) -> None:
+        if self.started is None:
+            self.started = time.monotonic()
+
+    def remaining(self) -> float:
+        if self.started is None:
+            return self.deadline
+        return max(0.0, self.started + self.deadline - time.monotonic())
+
+
+class _Scheduler:
+    def __init__(self, providers: List[Provider], out_dir: str, n_scenes: int) -> None:
+        self.providers = providers
+        self.out_dir = out_dir
+        self.slots = {p.name: asyncio.Semaphore(max(1, p.max_concurrency)) for p in providers}
+        self.limiters = {p.name: _RateLimiter(p.min_interval) for p in providers}
+        # Blocking HTTP calls run here rather than on the loop's default executor, which
+        # asyncio.run would wait for: a scene past its deadline must not hold up the caller
+        self.executor = ThreadPoolExecutor(
+            max_workers=n_scenes + sum(max(1, p.max_concurrency) for p in providers),
+            thread_name_prefix="ai-jobs",
+        )
+
+    async def _in_thread(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def _request(self, provider: Provider, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        import requests  # type: ignore
+
+        await self.limiters[provider.name].wait()
+        headers = {"Authorization": f"Bearer {provider.api_key}", "Content-Type": "application/json"}
+        resp = await self._in_thread(
+            requests.request, method, url, headers=headers, timeout=CONFIG.http_timeout_seconds, **kwargs
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _generate(self, provider: Provider, text: str, duration: int) -> str:
+        """Submit one job and poll it until the provider reports the clip URL."""
+        data = await self._request(provider, "POST", provider.submit_url, json=provider.build_payload(text, duration))
+        url = _video_url(data)
+        job_id = data.get("id") or data.get("task_id") or data.get("job_id")
+        interval = CONFIG.ai_poll_interval_seconds
+        while not url:
+            if not job_id:
+                raise RuntimeError(f"{provider.name} returned neither a video URL nor a job id")
+            await asyncio.sleep(interval)
+            interval = min(_MAX_POLL_INTERVAL, interval * 1.5)
+            data = await self._request(provider, "GET", provider.status_url.format(id=job_id))
+            status = str(data.get("status", "")).lower()
+            if status in _FAILED_STATES:
+                raise RuntimeError(f"{provider.name} job {job_id} {status}: {data.get('error', '')}")
+            if status in _DONE_STATES or not status:
+                url = _video_url(data)
+        return url
+
+    async def _run_job(self, provider: Provider, idx: int, text: str, duration: int, clock: _SceneClock) -> str:
+        # The slot covers the provider's in-flight job only, and the scene's deadline starts once
+        # it is submitted, not while it waits for a slot
+        async with self.slots[provider.name]:
+            clock.start()
+            url = await asyncio.wait_for(self._generate(provider, text, duration), timeout=clock.remaining())
+        dest = os.path.join(self.out_dir, f"scene_{idx:02d}_{provider.name}.mp4")
+        return await asyncio.wait_for(
+            self._in_thread(download_file, url, dest, validate=looks_like_mp4, cancel=clock.cancel),
+            timeout=clock.remaining(),
+        )
+
+    async def _scene(self, idx: int, text: str, duration: int, deadline: float) -> Optional[str]:
+        clock = _SceneClock(deadline)
+        for provider in self.providers:
+            try:
+                return await self._run_job(provider, idx, text, duration, clock)
+            except asyncio.TimeoutError:
+                clock.cancel.set()
+                logger.warning("AI clip for scene %d missed its %.0fs deadline", idx, deadline)
+                return None
+            except Exception as e:
+                logger.warning("%s failed for scene %d: %s", provider.name, idx, e)
+        return None
+
+    async def run(
+        self,
+        scenes: List[Tuple[int, str, int]],
+        deadline: float,
+        on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+    ) -> Dict[int, str]:
+        async def report(idx: int, text: str, duration: int) -> Optional[str]:
+            path = await self._scene(idx, text, duration, deadline)
+            if on_result is not None:
+                on_result(idx, path)
+            return path
+
+        try:
+            results = await asyncio.gather(*(report(*scene) for scene in scenes))
+        finally:
+            # Requests still running past a deadline end on their own (HTTP timeouts, cancel flags)
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        return {idx: path for (idx, _text, _duration), path in zip(scenes, results) if path}
+
+
+def generate_ai_clips(
+    scenes: List[Tuple[int, str, int]],
+    out_dir: str,
+    providers: Optional[List[Provider]] = None,
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+) -> Dict[int, str]:
+    """
+    Generate AI clips for (scene index, text, duration) tuples and return {index: clip path}.
+
+    All scenes are queued up front; each provider's in-flight jobs and request rate are capped,
+    job status is polled with growing intervals, and providers are tried in order per scene.
+    Scenes that fail or miss the per-scene deadline (default CONFIG.ai_scene_deadline_seconds,
+    counted from the scene's submit and covering its download) are simply absent from the
+    result so the caller can render a slide for them; their downloads are cancelled and the
+    call returns without waiting for them.
+    on_result(index, path or None) is called as soon as each scene is settled, so callers can
+    move on with that scene while others are still generating.
+    """
+    providers = configured_providers() if providers is None else providers
+    if not providers or not scenes:
+        return {}
+    deadline = CONFIG.ai_scene_deadline_seconds if deadline is None else deadline
+
+    async def main() -> Dict[int, str]:
+        return await _Scheduler(providers, out_dir, len(scenes)).run(scenes, deadline, on_result)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(main())
+
+    # Called from inside a running loop (e.g. a notebook): run the scheduler on its own thread
+    result: Dict[int, str] = {}
+
+    def runner() -> None:
+        result.update(asyncio.run(main()))
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    return result
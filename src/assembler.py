@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-import datetime as dt
 import os
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
-import srt
 from moviepy.editor import AudioFileClip, VideoFileClip, concatenate_videoclips
 
+from .encoding import DEFAULT_PROFILE, PREVIEW_PROFILE, EncodingProfile
+from .ffmpeg_utils import run_ffmpeg
 from .logging_utils import setup_logger
+from .metrics import span
+from .probe import MediaInfo, probe
+from .segments import assemble_segments, concat_copy, write_concat_list
+from .subtitles import build_cues, write_subtitles
+from .workspace import RunWorkspace
 
 logger = setup_logger(__name__)
 
@@ -16,17 +21,130 @@ def _ensure_dir(path: str) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
 
-def assemble_video(scene_videos: List[str], audio_paths: List[str], subtitles: List[str], output_path: str) -> str:
+def _video_signature(info: MediaInfo) -> Optional[Tuple[Any, ...]]:
+    """Return (codec, profile, pix_fmt, width, height, fps, timescale) of the first video stream, or None."""
+    v = info.video
+    if v is None:
+        return None
+    return (v.codec, v.profile, v.pix_fmt, v.width, v.height, v.fps, v.timescale)
+
+
+def _stream_copy_durations(scene_videos: List[str]) -> Optional[List[float]]:
+    """Scene durations if all videos share one H.264 stream layout (stream-copy safe), else None."""
+    signatures = set()
+    durations: List[float] = []
+    for v in scene_videos:
+        try:
+            info = probe(v)
+        except (OSError, RuntimeError) as e:
+            logger.warning("Could not probe %s: %s", v, e)
+            return None
+        sig = _video_signature(info)
+        if sig is None or info.duration is None:
+            return None
+        signatures.add(sig)
+        durations.append(info.duration)
+    if len(signatures) != 1 or next(iter(signatures))[0] != "h264":
+        return None
+    return durations
+
+
+def _assemble_stream_copy(
+    scene_videos: List[str],
+    audio_paths: List[str],
+    durations: List[float],
+    output_path: str,
+    profile: EncodingProfile = DEFAULT_PROFILE,
+) -> None:
     """
-    Concatenate clips, sync audio, and burn (or export) subtitles.
-    Produces an MP4 at 1080p (if source allows). Returns output path.
+    Join scene videos with the concat demuxer (no video re-encode) and encode only the audio track.
+    Each voice-over is padded with silence or trimmed to its scene's video length so sync is kept.
     """
-    if len(scene_videos) != len(audio_paths):
-        raise ValueError("scene_videos and audio_paths must have the same length")
+    list_path = write_concat_list(scene_videos, os.path.dirname(os.path.abspath(output_path)))
+    try:
+        args: List[str] = ["-f", "concat", "-safe", "0", "-i", list_path]
+        chains: List[str] = []
+        for k, (a, d) in enumerate(zip(audio_paths, durations), start=1):
+            args += ["-i", a]
+            chains.append(
+                f"[{k}:a]aresample={profile.audio_rate},aformat=sample_fmts=fltp:channel_layouts=stereo,"
+                f"apad,atrim=0:{d:.6f},asetpts=N/SR/TB[a{k}]"
+            )
+        labels = "".join(f"[a{k}]" for k in range(1, len(audio_paths) + 1))
+        chains.append(f"{labels}concat=n={len(audio_paths)}:v=0:a=1[aout]")
+        args += [
+            "-filter_complex", ";".join(chains),
+            "-map", "0:v:0",
+            "-map", "[aout]",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", profile.audio_bitrate,
+            "-movflags", "+faststart",
+            output_path,
+        ]
+        run_ffmpeg(args)
+    finally:
+        os.remove(list_path)
+
 
+def mux_scene(
+    video_path: str, audio_path: str, output_path: str, profile: EncodingProfile = DEFAULT_PROFILE
+) -> float:
+    """
+    Mux one scene into a self-contained segment: the video stream is copied and the voice-over
+    is encoded to AAC, padded or trimmed to the video length. Returns the segment duration.
+    """
+    duration = probe(video_path).duration
+    if duration is None:
+        raise RuntimeError(f"Unknown duration: {video_path}")
     _ensure_dir(output_path)
+    run_ffmpeg(
+        [
+            "-i", video_path,
+            "-i", audio_path,
+            "-filter:a", f"aresample={profile.audio_rate},aformat=sample_fmts=fltp:channel_layouts=stereo,"
+            f"apad,atrim=0:{duration:.6f},asetpts=N/SR/TB",
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", profile.audio_bitrate,
+            "-movflags", "+faststart",
+            output_path,
+        ]
+    )
+    return duration
+
+
+def concat_segments(segment_paths: List[str], output_path: str) -> Optional[List[float]]:
+    """
+    Join muxed scene segments losslessly with the concat demuxer. Returns the segment durations,
+    or None (writing nothing) if their video streams differ and a re-encode is required.
+    """
+    durations = _stream_copy_durations(segment_paths)
+    if durations is None:
+        return None
+    with span("concat", segments=len(segment_paths)) as s:
+        concat_copy(segment_paths, output_path)
+        s.add_output(output_path)
+    return durations
+
 
+def _assemble_reencode(
+    scene_videos: List[str],
+    audio_paths: List[str],
+    output_path: str,
+    profile: EncodingProfile = DEFAULT_PROFILE,
+    temp_audiofile: Optional[str] = None,
+) -> List[float]:
+    """
+    Re-encode the timeline through moviepy, scaled and letterboxed to the profile's frame size,
+    and return the per-scene durations used.
+    temp_audiofile overrides moviepy's scratch audio path, which otherwise lands in the working
+    directory under a name derived only from the output's basename.
+    """
     clips: List[VideoFileClip] = []
+    durations: List[float] = []
     try:
         for v, a in zip(scene_videos, audio_paths):
             vclip = VideoFileClip(v)
@@ -39,36 +157,111 @@ def assemble_video(scene_videos: List[str], audio_paths: List[str], subtitles: L
             aclip = aclip.subclip(0, target)
             vclip = vclip.set_audio(aclip)
             clips.append(vclip)
+            durations.append(target)
         final = concatenate_videoclips(clips, method="compose")
         final.write_videofile(
             output_path, 
             codec="libx264", 
             audio_codec="aac", 
-            fps=30,  # Higher FPS for professional look
+            fps=profile.fps,
+            audio_fps=profile.audio_rate,
+            audio_bitrate=profile.audio_bitrate,
+            temp_audiofile=temp_audiofile,
             verbose=False, 
             logger=None,
-            ffmpeg_params=["-preset", "fast", "-crf", "18", "-movflags", "+faststart"]  # High quality, web optimized
+            # Letterboxed to the profile size like mezzanine segments; faststart for web playback
+            ffmpeg_params=["-vf", profile.fit_filter(), *profile.x264_args(), "-movflags", "+faststart"]
         )
     finally:
         for c in clips:
             c.close()
+    return durations
 
-    # Write SRT sidecar from provided subtitles, spreading across scenes uniformly
-    try:
-        total_seconds = sum(VideoFileClip(v).duration for v in scene_videos)
-        start = 0.0
-        subs = []
-        per_scene = total_seconds / max(1, len(subtitles) or len(scene_videos))
-        for i, text in enumerate(subtitles or [""] * len(scene_videos), start=1):
-            end = min(total_seconds, start + per_scene)
-            subs.append(
-                srt.Subtitle(index=i, start=dt.timedelta(seconds=start), end=dt.timedelta(seconds=end), content=text or " ")
+
+def assemble_video(
+    scene_videos: List[str],
+    audio_paths: List[str],
+    subtitles: List[str],
+    output_path: Optional[str] = None,
+    mode: str = "auto",
+    segments: Optional[List[Dict[str, Any]]] = None,
+    profile: Optional[EncodingProfile] = None,
+    draft: bool = False,
+    workspace: Optional[RunWorkspace] = None,
+) -> str:
+    """
+    Concatenate clips, sync audio, and burn (or export) subtitles.
+    Produces an MP4 at the profile's resolution. Returns output path.
+
+    mode:
+      "auto"     - stream-copy the scene videos when they share codec, resolution, fps and pixel
+                   format (only the audio is encoded), otherwise re-encode the timeline.
+      "copy"     - require the stream-copy path; raises ValueError if the inputs differ.
+      "reencode" - always decode and re-encode through moviepy.
+      "segments" - encode each scene once into a normalized mezzanine segment (cached by content,
+                   see src.segments) and concat those losslessly; replacing a scene re-encodes
+                   only its segment. A segment index is written next to the output.
+
+    In the stream-copy path each scene keeps its full video length and its voice-over is padded
+    or trimmed to match; the re-encode path trims both to the shorter of the two. Encoded output
+    follows `profile` (resolution, frame rate, x264 settings, audio format; default 1080p30, or
+    the low-resolution ultrafast PREVIEW_PROFILE when draft=True).
+
+    SRT and WebVTT sidecars are written next to the output. Cue times follow each scene's actual
+    duration, or the given segments (timestamps on the output timeline) when provided; long
+    subtitles are split into several cues.
+
+    output_path defaults to video.mp4 in the workspace's final/ dir (preview/final/ for drafts);
+    scratch files go to the workspace's tmp/ dir, or next to the output without a workspace.
+    """
+    if len(scene_videos) != len(audio_paths):
+        raise ValueError("scene_videos and audio_paths must have the same length")
+    if mode not in ("auto", "copy", "reencode", "segments"):
+        raise ValueError(f"Unknown assembly mode: {mode}")
+
+    if output_path is None:
+        if workspace is None:
+            raise ValueError("assemble_video needs output_path or a workspace")
+        output_path = (workspace.preview if draft else workspace).final_path()
+    _ensure_dir(output_path)
+    profile = profile or (PREVIEW_PROFILE if draft else DEFAULT_PROFILE)
+
+    with span("assemble", mode=mode, scenes=len(scene_videos)) as s:
+        copied = False
+        durations: Optional[List[float]] = None
+        if mode == "segments":
+            index = assemble_segments(scene_videos, audio_paths, output_path, profile)
+            durations = [entry.duration for entry in index.scenes]
+            copied = True
+        elif mode != "reencode" and scene_videos:
+            durations = _stream_copy_durations(scene_videos)
+            if durations is not None:
+                try:
+                    _assemble_stream_copy(scene_videos, audio_paths, durations, output_path, profile)
+                    copied = True
+                except Exception as e:
+                    if mode == "copy":
+                        raise
+                    logger.warning("Stream-copy assembly failed, re-encoding: %s", e)
+            elif mode == "copy":
+                raise ValueError("Scene videos differ in codec, resolution, fps or pixel format; cannot stream-copy")
+            else:
+                logger.info("Scene videos are not stream-copy compatible, re-encoding timeline")
+        if not copied:
+            stem = os.path.splitext(os.path.basename(output_path))[0]
+            temp_audio = (
+                workspace.scratch_path(f"{stem}.audio.m4a")
+                if workspace is not None
+                else os.path.splitext(output_path)[0] + ".tmp-audio.m4a"
             )
-            start = end
-        srt_path = os.path.splitext(output_path)[0] + ".srt"
-        with open(srt_path, "w", encoding="utf-8") as f:
-            f.write(srt.compose(subs))
+            durations = _assemble_reencode(scene_videos, audio_paths, output_path, profile, temp_audio)
+        s.add_output(output_path)
+
+    # Subtitle sidecars are timed from the scene durations used above; the media is not reopened
+    try:
+        cues = build_cues(subtitles, durations, segments)
+        write_subtitles(cues, os.path.splitext(output_path)[0])
     except Exception as e:
-        logger.warning("Failed to write SRT: %s", e)
+        logger.warning("Failed to write subtitles: %s", e)
 
     return output_path
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import ffmpeg
+
+from .ffmpeg_utils import ffmpeg_binary
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+_SILENCE_THRESH_DB = -45.0
+
+
+@dataclass(frozen=True)
+class PreparedAudio:
+    path: str  # compressed upload file
+    pcm_path: str  # 16 kHz mono 16-bit WAV of the same (trimmed) audio
+    original_bytes: int
+    prepared_bytes: int
+    offset_sec: float  # leading silence removed; add to timestamps measured on the prepared audio
+    duration_sec: float
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.prepared_bytes
+
+
+def _run(stream) -> None:
+    try:
+        ffmpeg.run(stream, cmd=ffmpeg_binary(), quiet=True, overwrite_output=True)
+    except ffmpeg.Error as e:
+        err = (e.stderr or b"").decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed: {err[-2000:]}") from e
+
+
+def decode_to_pcm(src: str, dest: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+    """Downmix and resample src to 16 kHz mono 16-bit WAV, optionally keeping only [start, end)."""
+    kwargs = {}
+    if start is not None:
+        kwargs["ss"] = f"{start:.3f}"
+    if end is not None:
+        kwargs["to"] = f"{end:.3f}"
+    stream = ffmpeg.input(src, **kwargs).output(
+        dest, vn=None, ac=1, ar=SAMPLE_RATE, sample_fmt="s16", acodec="pcm_s16le", f="wav"
+    )
+    _run(stream)
+
+
+def compress(src: str, dest: str, bitrate: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+    """Encode (a slice of) src as compact mono MP3 at the given bitrate, e.g. "32k"."""
+    kwargs = {}
+    if start is not None:
+        kwargs["ss"] = f"{start:.3f}"
+    if end is not None:
+        kwargs["to"] = f"{end:.3f}"
+    stream = ffmpeg.input(src, **kwargs).output(
+        dest, vn=None, ac=1, ar=SAMPLE_RATE, acodec="libmp3lame", audio_bitrate=bitrate, f="mp3"
+    )
+    _run(stream)
+
+
+def prepare_for_transcription(
+    src: str, out_dir: str, trim_silence: bool = False, bitrate: str = "32k"
+) -> PreparedAudio:
+    """
+    Shrink an upload for speech-to-text: downmix to mono, resample to 16 kHz, optionally trim
+    leading/trailing silence, and compress to MP3. Writes audio.wav and audio.mp3 into out_dir.
+    """
+    from pydub import AudioSegment
+    from pydub.silence import detect_leading_silence
+
+    os.makedirs(out_dir, exist_ok=True)
+    pcm_path = os.path.join(out_dir, "audio.wav")
+    decode_to_pcm(src, pcm_path)
+
+    offset = 0.0
+    audio = AudioSegment.from_wav(pcm_path)
+    duration = len(audio) / 1000.0
+    if trim_silence and len(audio):
+        lead = detect_leading_silence(audio, silence_threshold=_SILENCE_THRESH_DB)
+        tail = detect_leading_silence(audio.reverse(), silence_threshold=_SILENCE_THRESH_DB)
+        if lead + tail < len(audio) and (lead or tail):
+            audio = audio[lead : len(audio) - tail]
+            audio.export(pcm_path, format="wav")
+            offset = lead / 1000.0
+            duration = len(audio) / 1000.0
+
+    out_path = os.path.join(out_dir, "audio.mp3")
+    compress(pcm_path, out_path, bitrate)
+
+    original = os.path.getsize(src)
+    prepared = PreparedAudio(
+        path=out_path,
+        pcm_path=pcm_path,
+        original_bytes=original,
+        prepared_bytes=os.path.getsize(out_path),
+        offset_sec=offset,
+        duration_sec=duration,
+    )
+    logger.info(
+        "Pre-processed audio: %d -> %d bytes (saved %d, %.0f%%)",
+        prepared.original_bytes,
+        prepared.prepared_bytes,
+        prepared.bytes_saved,
+        100.0 * prepared.bytes_saved / max(1, original),
+    )
+    return prepared
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from .cache import make_key
+from .config import CONFIG
+from .encoding import EncodingProfile
+from .logging_utils import setup_logger
+from .metrics import recording
+from .pipeline import run_pipeline
+from .script_gen import generate_script
+from .thumbnail import create_thumbnail
+from .workspace import RunWorkspace
+
+logger = setup_logger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+# Job ids name directories under the batch dir: no separators, and no leading dot ("..", hidden)
+_JOB_ID = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]*")
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One video to produce; `text` is a topic or a full transcript, both go to generate_script."""
+
+    id: str
+    text: str
+    tone: str = "conversational"
+    duration: int = 30
+    language: Optional[str] = None
+    voice: str = ""
+    speed: float = 1.0
+    style: str = "animated slides"
+    quality: str = "1080p"
+    fps: int = 30
+    bitrate: str = "high"
+    tier: str = "final"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchJob":
+        text = str(data.get("topic") or data.get("transcript") or "").strip()
+        if not text:
+            raise ValueError("job needs a non-empty 'topic' or 'transcript'")
+        fields = dict(
+            text=text,
+            tone=str(data.get("tone", "conversational")),
+            duration=int(data.get("duration", data.get("target_duration_sec", 30))),
+            language=data.get("language") or None,
+            voice=str(data.get("voice", "")),
+            speed=float(data.get("speed", 1.0)),
+            style=str(data.get("style", "animated slides")),
+            quality=str(data.get("quality", "1080p")),
+            fps=int(data.get("fps", 30)),
+            bitrate=str(data.get("bitrate", "high")),
+            tier=str(data.get("tier", "final")),
+        )
+        # Without an explicit id the job is named by its content, so re-reading the file resumes it
+        job_id = str(data.get("id") or make_key(**fields)[:12])
+        if not _JOB_ID.fullmatch(job_id):
+            raise ValueError(f"job id {job_id!r} may only contain letters, digits, '.', '_' and '-'")
+        return cls(id=job_id, **fields)
+
+
+@dataclass(frozen=True)
+class JobResult:
+    id: str
+    status: str  # "ok" or "failed"
+    video: Optional[str] = None
+    thumbnail: Optional[str] = None
+    storyboard: Optional[str] = None
+    duration: float = 0.0  # seconds of video
+    seconds: float = 0.0  # wall time spent on the job
+    error: Optional[str] = None
+    finished_at: float = 0.0
+
+
+@dataclass(frozen=True)
+class BatchSummary:
+    total: int
+    skipped: int  # already done in an earlier run
+    succeeded: int
+    failed: int
+    wall_seconds: float
+    manifest: str
+
+    @property
+    def videos_per_hour(self) -> float:
+        return self.succeeded * 3600.0 / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """Read one JSON job per line; blank lines and lines starting with # are ignored."""
+    jobs: List[BatchJob] = []
+    seen: Dict[str, int] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = BatchJob.from_dict(json.loads(line))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"{path}:{lineno}: {e}") from e
+            if job.id in seen:
+                raise ValueError(f"{path}:{lineno}: duplicate job id {job.id!r} (first on line {seen[job.id]})")
+            seen[job.id] = lineno
+            jobs.append(job)
+    return jobs
+
+
+def load_manifest(path: str) -> Dict[str, JobResult]:
+    """Latest result per job id. A line cut short by a crash is ignored; the job simply runs again."""
+    results: Dict[str, JobResult] = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = JobResult(**json.loads(line))
+            except (ValueError, TypeError):
+                continue
+            results[result.id] = result
+    return results
+
+
+def _append_manifest(path: str, result: JobResult) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _is_done(result: Optional[JobResult]) -> bool:
+    return result is not None and result.status == "ok" and bool(result.video) and os.path.exists(result.video)
+
+
+def run_job(job: BatchJob, out_dir: str) -> JobResult:
+    """
+    Produce one job's video in the run workspace <out_dir>/<job id>/: video.mp4, .srt/.vtt,
+    thumbnail.jpg, storyboard.json and the job's metrics report (video.metrics.json/.prom) end
+    up in its final/ dir, and the intermediates are removed once the video is written. Never
+    raises: failures are reported in the result.
+    """
+    t0 = time.perf_counter()
+    try:
+        workspace = RunWorkspace.create(out_dir, run_id=job.id)
+        with recording(job.id) as metrics:
+            storyboard = generate_script(job.text, tone=job.tone, target_duration_sec=job.duration, language=job.language)
+            storyboard_path = workspace.final_path("storyboard.json")
+            with open(storyboard_path, "w", encoding="utf-8") as f:
+                json.dump(storyboard, f, ensure_ascii=False, indent=2)
+            profile = EncodingProfile.from_settings(job.quality, fps=job.fps, bitrate=job.bitrate, tier=job.tier)
+            result = run_pipeline(
+                storyboard.get("scenes", []),
+                workspace.final_path(),
+                voice=job.voice,
+                speed=job.speed,
+                style=job.style,
+                profile=profile,
+                workspace=workspace,
+            )
+            thumbnail = create_thumbnail(storyboard.get("title", "Video"), workspace=workspace)
+        if CONFIG.metrics_reports:
+            metrics.write(os.path.splitext(result.video_path)[0])
+        workspace.clean_intermediates()
+        return JobResult(
+            id=job.id,
+            status="ok",
+            video=result.video_path,
+            thumbnail=thumbnail,
+            storyboard=storyboard_path,
+            duration=sum(result.durations),
+            seconds=time.perf_counter() - t0,
+            finished_at=time.time(),
+        )
+    except Exception as e:
+        logger.error("Job %s failed: %s", job.id, e)
+        return JobResult(
+            id=job.id, status="failed", error=str(e), seconds=time.perf_counter() - t0, finished_at=time.time()
+        )
+
+
+def run_batch(
+    jobs: List[BatchJob], out_dir: Optional[str] = None, workers: Optional[int] = None
+) -> BatchSummary:
+    """
+    Run jobs `workers` at a time (default CONFIG.batch_workers), each in its own process, and
+    append every result to <out_dir>/manifest.jsonl as soon as it finishes. Jobs already
+    recorded as done (with their video still on disk) are skipped, so an interrupted batch
+    resumes where it stopped; failed jobs are retried.
+    """
+    out_dir = out_dir or CONFIG.batch_dir
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = os.path.join(out_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest)
+    pending = [job for job in jobs if not _is_done(previous.get(job.id))]
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        logger.info("Resuming batch: %d of %d jobs already done", skipped, len(jobs))
+
+    n_workers = max(1, min(CONFIG.batch_workers if workers is None else workers, len(pending) or 1))
+    t0 = time.perf_counter()
+    counts = {"ok": 0, "failed": 0}
+
+    def record(result: JobResult) -> None:
+        _append_manifest(manifest, result)
+        counts[result.status] += 1
+        done = counts["ok"] + counts["failed"]
+        logger.info("[%d/%d] %s %s in %.1fs", done, len(pending), result.status, result.id, result.seconds)
+
+    if n_workers > 1:
+        # Processes keep one job's CPU-bound slide rendering from stalling the others on the GIL
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {pool.submit(run_job, job, out_dir): job for job in pending}
+            for fut in as_completed(futures):
+                job = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:  # e.g. the worker process died
+                    result = JobResult(id=job.id, status="failed", error=str(e), finished_at=time.time())
+                record(result)
+    else:
+        for job in pending:
+            record(run_job(job, out_dir))
+
+    summary = BatchSummary(
+        total=len(jobs),
+        skipped=skipped,
+        succeeded=counts["ok"],
+        failed=counts["failed"],
+        wall_seconds=time.perf_counter() - t0,
+        manifest=manifest,
+    )
+    logger.info(
+        "Batch finished: %d ok, %d failed, %d skipped in %.1fs (%.1f videos/hour)",
+        summary.succeeded,
+        summary.failed,
+        summary.skipped,
+        summary.wall_seconds,
+        summary.videos_per_hour,
+    )
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch",
+        description="Render one video per line of a JSONL job file. Each job has a 'topic' or "
+        "'transcript' and optional id, tone, duration, language, voice, speed, style, quality, "
+        "fps, bitrate and tier. Re-running with the same file resumes an interrupted batch.",
+    )
+    parser.add_argument("jobs", help="path to the JSONL job file")
+    parser.add_argument("--out-dir", default=None, help=f"output root (default {CONFIG.batch_dir})")
+    parser.add_argument(
+        "--workers", type=int, default=None, help=f"videos rendered at a time (default {CONFIG.batch_workers})"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    summary = run_batch(jobs, args.out_dir, args.workers)
+    print(
+        f"{summary.succeeded} ok, {summary.failed} failed, {summary.skipped} already done of {summary.total} jobs "
+        f"in {summary.wall_seconds:.1f}s ({summary.videos_per_hour:.1f} videos/hour)"
+    )
+    print(f"Manifest: {summary.manifest}")
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
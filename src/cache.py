@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_TMP_PREFIX = ".tmp-"
+_STALE_TMP_SECONDS = 3600
+
+
+def file_digest(path: str, chunk_bytes: int = 1024 * 1024) -> str:
+    """sha256 of a file's bytes, read in fixed-size chunks so memory stays flat."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def make_key(**parts: Any) -> str:
+    """Stable content hash of everything that affects a cached artifact."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class FileCache:
+    """
+    Content-addressed on-disk cache of files, shared safely between processes.
+
+    Entries live at <root>/<key[:2]>/<key><suffix>. Writes go to a temp file in the same
+    directory and are published with os.replace, so readers never see partial files.
+    Hits refresh the entry's mtime, and eviction removes least recently used entries once the
+    total size exceeds max_bytes. max_bytes <= 0 disables the cache.
+    """
+
+    def __init__(self, root: str, max_bytes: int, suffix: str = "") -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + self.suffix)
+
+    def record(self, hit: bool) -> None:
+        """Count a lookup made elsewhere (e.g. in a worker process) against this instance."""
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.record(False)
+            return None
+        self.record(True)
+        return path
+
+    def fetch(self, key: str, dest: str) -> bool:
+        """
+        Materialize a cached entry at dest (hard link, or copy across filesystems).
+        dest is replaced rather than written through, so callers must remove it before
+        regenerating it in place.
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp = _temp_path(dest)
+        try:
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, dest)
+        except FileNotFoundError:
+            # Evicted by another process between lookup and link
+            _silent_remove(tmp)
+            return False
+        return True
+
+    def put(self, key: str, src: str) -> Optional[str]:
+        """Copy src into the cache under key and return the cached path."""
+        if not self.enabled:
+            return None
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = _temp_path(path)
+        try:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            _silent_remove(tmp)
+            logger.warning("Cache write failed for %s: %s", src, e)
+            return None
+        with self._lock:
+            self.stats["puts"] += 1
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries: List[Tuple[float, int, str]] = []
+        total = 0
+        now = time.time()
+        for dirpath, _dirs, files in os.walk(self.root):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                if name.startswith(_TMP_PREFIX):
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        _silent_remove(full)
+                    continue
+                entries.append((st.st_mtime, st.st_size, full))
+                total += st.st_size
+        removed = 0
+        if total > self.max_bytes:
+            entries.sort()
+            for _mtime, size, full in entries:
+                if total <= self.max_bytes:
+                    break
+                if _silent_remove(full):
+                    removed += 1
+                total -= size
+        if removed:
+            with self._lock:
+                self.stats["evictions"] += removed
+        return removed
+
+
+class SQLiteCache:
+    """
+    Persistent key -> JSON value cache in a single SQLite file.
+
+    Entries older than ttl_seconds are treated as misses and dropped (ttl_seconds <= 0 keeps
+    them forever). After each write, least recently used entries are removed until the stored
+    values fit in max_bytes. max_bytes <= 0 disables the cache.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += n
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning("Cache read failed (%s): %s", self.path, e)
+            row = None
+        finally:
+            conn.close()
+        if row is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        blob = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob.encode("utf-8")), now, now),
+                )
+                removed = self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning("Cache write failed (%s): %s", self.path, e)
+            return
+        finally:
+            conn.close()
+        self._count("puts")
+        if removed:
+            self._count("evictions", removed)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        removed = 0
+        if self.ttl_seconds > 0:
+            removed += conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        removed += conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS running FROM entries) "
+            "WHERE running > ?)",
+            (self.max_bytes,),
+        ).rowcount
+        return removed
+
+
+def _temp_path(target: str) -> str:
+    fd, tmp = tempfile.mkstemp(prefix=_TMP_PREFIX, dir=os.path.dirname(target) or ".")
+    os.close(fd)
+    os.remove(tmp)
+    return tmp
+
+
+def _silent_remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -28,5 +28,79 @@ class AppConfig:
     retry_max_attempts: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
     retry_backoff_seconds: float = float(os.getenv("RETRY_BACKOFF_SECONDS", "2"))
 
+    # Long recordings are split on silence into chunks transcribed in parallel
+    transcribe_chunk_seconds: float = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "120"))
+    transcribe_max_upload_mb: float = float(os.getenv("TRANSCRIBE_MAX_UPLOAD_MB", "24"))
+    transcribe_workers: int = int(os.getenv("TRANSCRIBE_WORKERS", "4"))
+    # Downmix/resample/compress audio before upload; optionally trim leading/trailing silence
+    transcribe_preprocess: bool = os.getenv("TRANSCRIBE_PREPROCESS", "true").lower() == "true"
+    transcribe_trim_silence: bool = os.getenv("TRANSCRIBE_TRIM_SILENCE", "false").lower() == "true"
+    transcribe_bitrate: str = os.getenv("TRANSCRIBE_BITRATE", "32k")
+
+    # Cache of Whisper transcriptions keyed on audio content; 0 MB disables it
+    transcript_cache_path: str = os.getenv(
+        "TRANSCRIPT_CACHE_PATH", os.path.join("outputs", "cache", "transcripts.sqlite3")
+    )
+    transcript_cache_ttl_hours: float = float(os.getenv("TRANSCRIPT_CACHE_TTL_HOURS", "720"))
+    transcript_cache_max_mb: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "100"))
+
+    # Concurrent TTS synthesis: pool size and per-provider in-flight request caps
+    tts_workers: int = int(os.getenv("TTS_WORKERS", "4"))
+    elevenlabs_max_concurrency: int = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "2"))
+    openai_tts_max_concurrency: int = int(os.getenv("OPENAI_TTS_MAX_CONCURRENCY", "4"))
+    elevenlabs_api_base: str = os.getenv("ELEVENLABS_API_BASE", "https://api.elevenlabs.io")
+
+    # Cache of synthesized voice-overs keyed on text/voice/speed/provider/model; 0 MB disables it
+    tts_cache_dir: str = os.getenv("TTS_CACHE_DIR", os.path.join("outputs", "cache", "tts"))
+    tts_cache_max_mb: int = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+
+    # Async AI clip scheduler (RunwayML / Pika Labs)
+    runway_api_base: str = os.getenv("RUNWAY_API_BASE", "https://api.runwayml.com")
+    pika_api_base: str = os.getenv("PIKA_API_BASE", "https://api.pika.art")
+    runway_max_concurrency: int = int(os.getenv("RUNWAY_MAX_CONCURRENCY", "2"))
+    pika_max_concurrency: int = int(os.getenv("PIKA_MAX_CONCURRENCY", "2"))
+    ai_min_request_interval_seconds: float = float(os.getenv("AI_MIN_REQUEST_INTERVAL_SECONDS", "0.5"))
+    ai_poll_interval_seconds: float = float(os.getenv("AI_POLL_INTERVAL_SECONDS", "2"))
+    ai_scene_deadline_seconds: float = float(os.getenv("AI_SCENE_DEADLINE_SECONDS", "600"))
+
+    # Scene render processes for generate_visuals; 0 = one per CPU
+    render_workers: int = int(os.getenv("RENDER_WORKERS", "0"))
+    # Mezzanine scene segments (assemble_video mode="segments"): cache location/size and encode threads
+    segment_cache_dir: str = os.getenv("SEGMENT_CACHE_DIR", os.path.join("outputs", "cache", "segments"))
+    segment_cache_max_mb: int = int(os.getenv("SEGMENT_CACHE_MAX_MB", "4096"))
+    segment_workers: int = int(os.getenv("SEGMENT_WORKERS", "2"))
+    # Per-run workspaces (src.workspace.RunWorkspace) are created under this directory
+    runs_dir: str = os.getenv("RUNS_DIR", os.path.join("outputs", "runs"))
+    # Per-stage timing reports (<video>.metrics.json and .metrics.prom, see src.metrics) next to each render
+    metrics_reports: bool = os.getenv("METRICS_REPORTS", "true").lower() == "true"
+    # Workspace for low-resolution draft previews, kept apart from full-quality outputs
+    preview_dir: str = os.getenv("PREVIEW_DIR", os.path.join("outputs", "preview"))
+    # Streaming pipeline: scenes buffered between stages, and concurrent per-scene mux jobs
+    pipeline_queue_size: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+    pipeline_mux_workers: int = int(os.getenv("PIPELINE_MUX_WORKERS", "2"))
+    # Headless batch runs (python -m src.batch): output root and videos rendered at a time
+    batch_dir: str = os.getenv("BATCH_DIR", os.path.join("outputs", "batch"))
+    batch_workers: int = int(os.getenv("BATCH_WORKERS", "2"))
+    # Render job queue (python -m src.jobqueue worker); each render already spreads its scenes over all cores
+    job_queue_path: str = os.getenv("JOB_QUEUE_PATH", os.path.join("outputs", "queue", "jobs.sqlite3"))
+    job_dir: str = os.getenv("JOB_DIR", os.path.join("outputs", "jobs"))
+    job_workers: int = int(os.getenv("JOB_WORKERS", "1"))
+    job_poll_seconds: float = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    job_heartbeat_seconds: float = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+    # Running jobs without a heartbeat for this long are requeued; attempts per job before it fails
+    job_stale_seconds: float = float(os.getenv("JOB_STALE_SECONDS", "120"))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+
+    # Content-addressed cache of rendered scene clips; 0 MB disables it
+    render_cache_dir: str = os.getenv("RENDER_CACHE_DIR", os.path.join("outputs", "cache", "render"))
+    render_cache_max_mb: int = int(os.getenv("RENDER_CACHE_MAX_MB", "2048"))
+
+    # Persistent cache of generated storyboards; 0 MB disables it
+    storyboard_cache_path: str = os.getenv(
+        "STORYBOARD_CACHE_PATH", os.path.join("outputs", "cache", "storyboards.sqlite3")
+    )
+    storyboard_cache_ttl_hours: float = float(os.getenv("STORYBOARD_CACHE_TTL_HOURS", "168"))
+    storyboard_cache_max_mb: int = int(os.getenv("STORYBOARD_CACHE_MAX_MB", "50"))
+
 
 CONFIG = AppConfig()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from .cache import file_digest
+from .config import CONFIG
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_CHUNK_BYTES = 64 * 1024
+
+
+def looks_like_mp4(path: str) -> bool:
+    """Cheap container check: ISO-BMFF files carry an 'ftyp' box at offset 4."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(12)
+    except OSError:
+        return False
+    return len(head) >= 8 and head[4:8] == b"ftyp"
+
+
+def _expected_total(resp, offset: int) -> Optional[int]:
+    # 206: "Content-Range: bytes start-end/total"; 200: Content-Length is the whole body
+    content_range = resp.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1].strip()
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length) + (offset if resp.status_code == 206 else 0)
+    return None
+
+
+def _check_cancel(cancel: Optional[threading.Event], url: str) -> None:
+    if cancel is not None and cancel.is_set():
+        raise RuntimeError(f"Download cancelled: {url}")
+
+
+def download_file(
+    url: str,
+    dest: str,
+    timeout: Optional[float] = None,
+    max_attempts: Optional[int] = None,
+    sha256: Optional[str] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    """
+    Stream url to dest in fixed-size chunks, so memory stays bounded regardless of file size.
+
+    Data goes to dest + ".part". Interrupted transfers resume with an HTTP Range request
+    (up to max_attempts, default CONFIG.retry_max_attempts, with exponential backoff).
+    The final size must match the server's declared length, and the optional sha256 and
+    validate checks must pass before the file is moved to dest. Raises RuntimeError otherwise.
+    Setting `cancel` aborts the transfer at the next chunk (or before the next retry) with a
+    RuntimeError, leaving the partial file for a later resume.
+    """
+    import requests  # type: ignore
+
+    timeout = CONFIG.http_timeout_seconds if timeout is None else timeout
+    attempts = max(1, CONFIG.retry_max_attempts if max_attempts is None else max_attempts)
+    part = dest + ".part"
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+
+    expected: Optional[int] = None
+    for attempt in range(1, attempts + 1):
+        _check_cancel(cancel, url)
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        # identity encoding keeps byte offsets and Content-Length meaningful for resume/size checks
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+                if resp.status_code == 416:
+                    if expected is not None and offset == expected:
+                        break  # already complete
+                    os.remove(part)  # stale partial file from an earlier transfer
+                    continue
+                resp.raise_for_status()
+                if offset and resp.status_code != 206:
+                    offset = 0  # server ignored the range; start over
+                expected = _expected_total(resp, offset)
+                with open(part, "ab" if offset else "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=_CHUNK_BYTES):
+                        _check_cancel(cancel, url)
+                        if chunk:
+                            f.write(chunk)
+            if expected is None or os.path.getsize(part) >= expected:
+                break
+            raise requests.ConnectionError(f"short read: {os.path.getsize(part)} of {expected} bytes")
+        except requests.RequestException as e:
+            if attempt == attempts:
+                raise RuntimeError(f"Download failed after {attempts} attempts: {url}: {e}") from e
+            logger.warning("Download interrupted (%s), resuming (attempt %d/%d)", e, attempt + 1, attempts)
+            backoff = CONFIG.retry_backoff_seconds * (2 ** (attempt - 1))
+            if cancel is not None:
+                cancel.wait(backoff)
+            else:
+                time.sleep(backoff)
+
+    if not os.path.exists(part):
+        raise RuntimeError(f"Download failed: {url}: no data received")
+    size = os.path.getsize(part)
+    problem = None
+    if expected is not None and size != expected:
+        problem = f"size {size} != expected {expected}"
+    elif sha256 and file_digest(part) != sha256.lower():
+        problem = "sha256 mismatch"
+    elif validate is not None and not validate(part):
+        problem = "content validation failed"
+    if problem:
+        os.remove(part)
+        raise RuntimeError(f"Downloaded file from {url} is corrupt: {problem}")
+    os.replace(part, dest)
+    return dest
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "4k": (3840, 2160)}
+# Bitrate setting -> (CRF, peak bitrate in Mbit/s at 1080p30; None = quality-only rate control)
+RATE_CONTROL = {"high": (18, None), "medium": (21, 8.0), "low": (24, 4.0)}
+# Speed tiers trade compression efficiency for encode time; drafts also accept lower quality
+TIERS: Dict[str, Dict[str, Any]] = {
+    "final": {"preset": "fast", "still_preset": "veryfast", "crf_offset": 0},
+    "draft": {"preset": "ultrafast", "still_preset": "ultrafast", "crf_offset": 5},
+}
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """Output format and x264 settings shared by slide renders, segments and re-encoded timelines."""
+
+    width: int = 1920
+    height: int = 1080
+    fps: int = 30
+    crf: int = 18
+    preset: str = "fast"  # general video content
+    still_preset: str = "veryfast"  # still slides are nearly all skip blocks, so a faster preset costs little
+    maxrate: Optional[str] = None  # e.g. "8M" or "8000k" (ffmpeg units); caps the bitrate with a 2x VBV buffer
+    gop_seconds: int = 2
+    audio_rate: int = 44100
+    audio_bitrate: str = "192k"
+    tier: str = "final"
+
+    def __post_init__(self) -> None:
+        if self.maxrate:
+            _parse_rate(self.maxrate)  # profiles also arrive as job payloads; reject bad rates up front
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    @property
+    def gop(self) -> int:
+        return self.fps * self.gop_seconds
+
+    def x264_args(self, still: bool = False) -> List[str]:
+        args = ["-preset", self.still_preset if still else self.preset, "-crf", str(self.crf)]
+        if self.maxrate:
+            value, unit = _parse_rate(self.maxrate)
+            args += ["-maxrate", self.maxrate, "-bufsize", f"{value * 2:.10g}{unit}"]
+        return args
+
+    def fit_filter(self) -> str:
+        """ffmpeg filter scaling video into the profile's frame size, letterboxed to keep its aspect."""
+        w, h = self.width, self.height
+        return f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+
+    def with_tier(self, tier: str) -> "EncodingProfile":
+        base = TIERS[_normalize(tier, TIERS)]
+        final_crf = self.crf - TIERS[self.tier]["crf_offset"]
+        return replace(
+            self,
+            tier=_normalize(tier, TIERS),
+            preset=base["preset"],
+            still_preset=base["still_preset"],
+            crf=final_crf + base["crf_offset"],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_settings(
+        cls, quality: str = "1080p", fps: int = 30, bitrate: str = "high", tier: str = "final"
+    ) -> "EncodingProfile":
+        """
+        Map UI settings to a profile. quality accepts labels such as "720p HD" or "4K Ultra HD",
+        bitrate is "High"/"Medium"/"Low" and tier is "final" or "draft".
+        """
+        width, height = RESOLUTIONS[_normalize(quality, RESOLUTIONS)]
+        crf, peak_1080p30 = RATE_CONTROL[_normalize(bitrate, RATE_CONTROL)]
+        maxrate = None
+        if peak_1080p30 is not None:
+            # Scale the 1080p30 budget with pixel rate
+            scale = (width * height * fps) / (1920 * 1080 * 30)
+            maxrate = f"{peak_1080p30 * scale:.1f}M"
+        return cls(width=width, height=height, fps=int(fps), crf=crf, maxrate=maxrate).with_tier(tier)
+
+
+_RATE = re.compile(r"(\d+(?:\.\d+)?)([kKmMgG]?)")
+
+
+def _parse_rate(rate: str) -> Tuple[float, str]:
+    """Split an ffmpeg bit rate such as "8M", "8000k" or "8000000" into (value, unit suffix)."""
+    match = _RATE.fullmatch(rate.strip())
+    if match is None:
+        raise ValueError(f"Invalid bit rate {rate!r}; expected a number with an optional k/M/G suffix")
+    return float(match.group(1)), match.group(2)
+
+
+def _normalize(label: str, choices: Dict[str, Any]) -> str:
+    key = (label or "").strip().lower()
+    for choice in choices:
+        if key.startswith(choice) or key.split(" ")[0] == choice:
+            return choice
+    raise ValueError(f"Unknown setting {label!r}; expected one of {', '.join(choices)}")
+
+
+DEFAULT_PROFILE = EncodingProfile()
+# Proxy for in-app previews: enough to judge pacing and on-screen text, a fraction of the encode cost
+PREVIEW_PROFILE = EncodingProfile(width=640, height=360, fps=15, crf=23, audio_bitrate="96k").with_tier("draft")
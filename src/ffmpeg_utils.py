@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from typing import List
+
+from .logging_utils import setup_logger
+from .metrics import current_span
+
+logger = setup_logger(__name__)
+
+
+def ffmpeg_binary() -> str:
+    """Path to the ffmpeg executable moviepy is configured with (bundled imageio-ffmpeg or FFMPEG_BINARY)."""
+    try:
+        from moviepy.config import get_setting
+
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
+
+
+def run_ffmpeg(args: List[str]) -> None:
+    """
+    Run ffmpeg with the given arguments (without the binary), raising RuntimeError on failure.
+    Output is captured and only surfaced in the error message or debug log.
+    """
+    cmd = [ffmpeg_binary(), "-hide_banner", "-nostdin", "-loglevel", "error", "-y", *args]
+    logger.debug("ffmpeg: %s", " ".join(cmd))
+    span = current_span()
+    if span is None or not hasattr(os, "wait4"):
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        returncode, stderr = proc.returncode, proc.stderr
+    else:
+        # Reap the process ourselves to charge its exact CPU time to the current span
+        with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as proc:
+            assert proc.stderr is not None
+            stderr = proc.stderr.read()
+            _pid, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = returncode = os.waitstatus_to_exitcode(status)
+        span.child_cpu_seconds += usage.ru_utime + usage.ru_stime
+    if returncode != 0:
+        err = stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg exited with {returncode}: {err[-2000:]}")
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import make_key
+from .config import CONFIG
+from .encoding import PREVIEW_PROFILE, EncodingProfile
+from .logging_utils import setup_logger
+from .pipeline import PipelineResult, SceneArtifacts, SceneReuse, run_pipeline
+from .visuals import ai_clips_enabled, scene_render_inputs
+from .workspace import RunWorkspace
+
+logger = setup_logger(__name__)
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+@dataclass(frozen=True)
+class SceneRecord:
+    audio_key: str
+    visual_key: str
+    artifacts: SceneArtifacts
+    # (mtime_ns, size) of each artifact when recorded; anything rewritten since is not reused
+    stats: Dict[str, Optional[Tuple[int, int]]]
+
+    def reusable(self, name: str, path: str) -> bool:
+        return self.stats.get(name) is not None and _stat(path) == self.stats[name]
+
+
+@dataclass
+class RenderState:
+    """What was last rendered for a storyboard, scene by scene (keep it in the app session)."""
+
+    scenes: List[SceneRecord] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    audio: List[int]  # 1-based scenes whose voice-over must be re-synthesized
+    visuals: List[int]  # 1-based scenes whose clip must be re-rendered
+    reuse: Dict[int, SceneReuse]
+
+    @property
+    def unchanged(self) -> List[int]:
+        return sorted(idx for idx, r in self.reuse.items() if r.segment is not None)
+
+
+def audio_key(scene: Dict[str, Any], voice: str, speed: float) -> str:
+    return make_key(
+        text=str(scene.get("script_text", "")),
+        voice=voice,
+        speed=float(speed),
+        elevenlabs=bool(CONFIG.elevenlabs_api_key),
+        openai=bool(CONFIG.openai_api_key and CONFIG.openai_tts_voice),
+    )
+
+
+def visual_key(
+    idx: int, scene: Dict[str, Any], total: int, style: str, profile: Optional[EncodingProfile] = None
+) -> str:
+    return make_key(ai=ai_clips_enabled(), **scene_render_inputs(idx, scene, total, style, profile))
+
+
+def plan_rerender(
+    scenes: List[Dict[str, Any]],
+    state: Optional[RenderState],
+    voice: str,
+    speed: float,
+    style: str,
+    profile: Optional[EncodingProfile] = None,
+) -> RenderPlan:
+    """
+    Diff scenes against the last render. Scenes are compared by position: a scene's voice-over is
+    reused when its script text, voice and speed are unchanged, and its clip when everything
+    that shapes the slide (text, duration, style, first/last-scene fades) is unchanged, provided
+    the files on disk are still the ones recorded.
+    """
+    previous = state.scenes if state is not None else []
+    total = len(scenes)
+    audio: List[int] = []
+    visuals: List[int] = []
+    reuse: Dict[int, SceneReuse] = {}
+    for idx, scene in enumerate(scenes, start=1):
+        record = previous[idx - 1] if idx <= len(previous) else None
+        art = record.artifacts if record is not None else None
+        keep_audio = (
+            record is not None
+            and art is not None
+            and record.audio_key == audio_key(scene, voice, speed)
+            and record.reusable("audio", art.audio_path)
+        )
+        keep_video = (
+            record is not None
+            and art is not None
+            and record.visual_key == visual_key(idx, scene, total, style, profile)
+            and record.reusable("video", art.video_path)
+        )
+        if not keep_audio:
+            audio.append(idx)
+        if not keep_video:
+            visuals.append(idx)
+        if record is None or art is None or not (keep_audio or keep_video):
+            continue
+        keep_segment = keep_audio and keep_video and record.reusable("segment", art.segment_path)
+        reuse[idx] = SceneReuse(
+            audio=(art.audio_path, art.audio_duration) if keep_audio else None,
+            video=art.video_path if keep_video else None,
+            segment=(art.segment_path, art.duration) if keep_segment else None,
+        )
+    return RenderPlan(audio=audio, visuals=visuals, reuse=reuse)
+
+
+def rerender(
+    scenes: List[Dict[str, Any]],
+    output_path: str,
+    state: Optional[RenderState],
+    voice: str = "",
+    speed: float = 1.0,
+    style: str = "animated slides",
+    subtitles: Optional[List[str]] = None,
+    profile: Optional[EncodingProfile] = None,
+    draft: bool = False,
+    workspace: Optional[RunWorkspace] = None,
+) -> Tuple[PipelineResult, RenderState]:
+    """
+    Bring output_path up to date with an edited storyboard, re-synthesizing and re-rendering
+    only the scenes that changed since `state` (None renders everything). Unchanged scenes are
+    reassembled from their existing segments. Returns the pipeline result and the new state.
+
+    draft=True renders the preview proxy (see run_pipeline). Its state can be passed to the
+    full-quality render, which then reuses the preview's voice-overs and redoes only the clips.
+    """
+    if draft:
+        profile = profile or PREVIEW_PROFILE
+    plan = plan_rerender(scenes, state, voice, speed, style, profile)
+    logger.info(
+        "Incremental render: %d/%d voice-overs, %d/%d clips to rebuild",
+        len(plan.audio),
+        len(scenes),
+        len(plan.visuals),
+        len(scenes),
+    )
+    result = run_pipeline(
+        scenes,
+        output_path,
+        voice,
+        speed,
+        style,
+        subtitles=subtitles,
+        reuse=plan.reuse,
+        profile=profile,
+        draft=draft,
+        workspace=workspace,
+    )
+    records = [
+        SceneRecord(
+            audio_key=audio_key(scene, voice, speed),
+            visual_key=visual_key(idx, scene, len(scenes), style, profile),
+            artifacts=art,
+            stats={
+                "audio": _stat(art.audio_path),
+                "video": _stat(art.video_path),
+                "segment": _stat(art.segment_path),
+            },
+        )
+        for idx, (scene, art) in enumerate(zip(scenes, result.scenes), start=1)
+    ]
+    return result, RenderState(scenes=records)
@@ -0,0 +1,602 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import CONFIG
+from .encoding import EncodingProfile
+from .logging_utils import setup_logger
+from .metrics import recording
+from .pipeline import SceneReuse, run_pipeline
+from .script_gen import generate_script
+from .thumbnail import create_thumbnail
+from .workspace import RunWorkspace
+
+logger = setup_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    worker: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            attempts=row["attempts"],
+            worker=row["worker"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+        )
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Persistent render queue in a SQLite file, safe for worker processes on several hosts that
+    share the filesystem.
+
+    A worker claims a job in two steps: it takes the database write lock (BEGIN IMMEDIATE) and
+    then creates <lock_dir>/<job id>.lock with O_CREAT|O_EXCL. Only the process that created the
+    lock file marks the job running, so a claim stays exclusive even where SQLite's own file
+    locking is unreliable (some network filesystems). Running workers refresh a heartbeat; jobs
+    whose heartbeat is older than stale_seconds are requeued (or failed after max_attempts).
+    Completion is fenced on the claiming worker, so a worker that was presumed dead cannot
+    overwrite the result of the retry.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        lock_dir: Optional[str] = None,
+        stale_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ) -> None:
+        self.path = path or CONFIG.job_queue_path
+        self.lock_dir = lock_dir or os.path.join(os.path.dirname(self.path) or ".", "locks")
+        self.stale_seconds = CONFIG.job_stale_seconds if stale_seconds is None else stale_seconds
+        self.max_attempts = CONFIG.job_max_attempts if max_attempts is None else max_attempts
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Autocommit mode so transactions are explicit; the default rollback journal (not WAL,
+        # whose shared-memory index does not work across hosts) keeps the file usable over NFS
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, heartbeat_at REAL, finished_at REAL, result TEXT, error TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        return conn
+
+    def _lock_path(self, job_id: str) -> str:
+        return os.path.join(self.lock_dir, f"{job_id}.lock")
+
+    def _create_lock(self, job_id: str) -> Optional[int]:
+        path = self._lock_path(job_id)
+        try:
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            pass
+        # A worker that died between creating the lock and marking the job running leaves an
+        # orphan behind; once it is older than a heartbeat could be, it no longer guards a claim
+        try:
+            if time.time() - os.stat(path).st_mtime < self.stale_seconds:
+                return None
+            os.remove(path)
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return None
+
+    def _release(self, job_id: str) -> None:
+        try:
+            os.remove(self._lock_path(job_id))
+        except OSError:
+            pass
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """Queue a job and return its id. File paths are made absolute, as workers may run elsewhere."""
+        job_id = uuid.uuid4().hex[:16]
+        payload = dict(payload)
+        if payload.get("output"):
+            payload["output"] = os.path.abspath(payload["output"])
+        if payload.get("reuse_audio"):
+            payload["reuse_audio"] = [[os.path.abspath(path), dur] for path, dur in payload["reuse_audio"]]
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, json.dumps(payload, ensure_ascii=False), QUEUED, time.time()),
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return Job.from_row(row) if row is not None else None
+
+    def recent(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs first, optionally only those with the given status."""
+        conn = self._connect()
+        try:
+            if status is None:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+        finally:
+            conn.close()
+        return [Job.from_row(r) for r in rows]
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Take the oldest queued job for worker, or return None when nothing is claimable."""
+        os.makedirs(self.lock_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 20", (QUEUED,)
+                ).fetchall()
+                for job_id in (r["id"] for r in rows):
+                    fd = self._create_lock(job_id)
+                    if fd is None:
+                        continue  # claimed by a worker whose database write we cannot see yet
+                    with os.fdopen(fd, "w") as f:
+                        f.write(worker)
+                    now = time.time()
+                    cur = conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, "
+                        "heartbeat_at = ?, error = NULL WHERE id = ? AND status = ?",
+                        (RUNNING, worker, now, now, job_id, QUEUED),
+                    )
+                    if cur.rowcount == 1:
+                        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                        conn.execute("COMMIT")
+                        return Job.from_row(row)
+                    self._release(job_id)
+                conn.execute("COMMIT")
+                return None
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _update_owned(self, job_id: str, worker: str, sql: str, params: tuple) -> bool:
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                sql + " WHERE id = ? AND worker = ? AND status = ?", params + (job_id, worker, RUNNING)
+            )
+            return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Refresh a running job's heartbeat; False once the job is no longer owned by worker."""
+        try:
+            os.utime(self._lock_path(job_id))
+        except OSError:
+            pass
+        self.register_worker(worker)
+        return self._update_owned(job_id, worker, "UPDATE jobs SET heartbeat_at = ?", (time.time(),))
+
+    def register_worker(self, worker: str) -> None:
+        """Record that worker is alive; workers call this while polling and while running a job."""
+        conn = self._connect()
+        try:
+            conn.execute("INSERT OR REPLACE INTO workers (id, seen_at) VALUES (?, ?)", (worker, time.time()))
+        finally:
+            conn.close()
+
+    def live_workers(self) -> List[str]:
+        """Workers seen within stale_seconds."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id FROM workers WHERE seen_at >= ? ORDER BY id", (time.time() - self.stale_seconds,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [r["id"] for r in rows]
+
+    def complete(
+        self, job_id: str, worker: str, result: Dict[str, Any], publish: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """
+        Record worker's result, unless the job was taken away from it. publish (e.g. renaming
+        staged deliverables into place) runs only once ownership is confirmed, while the database
+        write lock keeps any other worker from claiming the job; if it raises, nothing is recorded.
+        It holds up every other worker, so it must be quick: no copies.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, finished_at = ? "
+                    "WHERE id = ? AND worker = ? AND status = ?",
+                    (DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, worker, RUNNING),
+                )
+                ok = cur.rowcount == 1
+                if ok and publish is not None:
+                    publish()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        if ok:
+            self._release(job_id)
+        return ok
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        """Record a failed attempt: the job is queued again until it has used max_attempts."""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        if job.attempts < self.max_attempts:
+            ok = self._update_owned(job_id, worker, "UPDATE jobs SET status = ?, error = ?", (QUEUED, error))
+        else:
+            ok = self._update_owned(
+                job_id, worker, "UPDATE jobs SET status = ?, error = ?, finished_at = ?", (FAILED, error, time.time())
+            )
+        if ok:
+            self._release(job_id)
+        return ok
+
+    def requeue_stale(self) -> int:
+        """Return running jobs whose worker stopped sending heartbeats to the queue; returns how many."""
+        cutoff = time.time() - self.stale_seconds
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, attempts, worker FROM jobs WHERE status = ? AND heartbeat_at < ?", (RUNNING, cutoff)
+                ).fetchall()
+                for row in rows:
+                    error = f"worker {row['worker']} stopped responding"
+                    if row["attempts"] < self.max_attempts:
+                        conn.execute("UPDATE jobs SET status = ?, error = ? WHERE id = ?", (QUEUED, error, row["id"]))
+                    else:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                            (FAILED, error, time.time(), row["id"]),
+                        )
+                    self._release(row["id"])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        if rows:
+            logger.warning("Requeued %d stale job(s)", len(rows))
+        return len(rows)
+
+
+@dataclass(frozen=True)
+class Rendered:
+    result: Dict[str, Any]
+    workspace: RunWorkspace
+    publish: List[Tuple[str, str]]  # (file in the attempt's workspace, destination) published on completion
+
+
+def execute(job: Job) -> Rendered:
+    """
+    Render one job. The payload holds either a ready "storyboard" or a "topic"/"transcript"
+    (with optional tone, duration, language) to generate one from, plus optional voice, speed,
+    style, "profile" (EncodingProfile fields), "draft", "output" and "reuse_audio" ([path,
+    duration] per scene, e.g. from the draft's result).
+
+    Every attempt renders in its own run workspace <CONFIG.job_dir>/<job id>-a<attempt>/, so a
+    retry never shares files with a worker that was presumed dead but is still running. The
+    video, subtitles, thumbnail and metrics report (<video stem>.metrics.json/.prom) stay in its
+    final/ dir (preview/final/ for drafts); with "output" they are listed in Rendered.publish,
+    staged next to their destinations and renamed into place only when the attempt's result is
+    accepted (see JobQueue.complete).
+    """
+    p = job.payload
+    workspace = RunWorkspace.create(os.path.abspath(CONFIG.job_dir), run_id=f"{job.id}-a{job.attempts}")
+    draft = bool(p.get("draft", False))
+    deliverables = workspace.preview if draft else workspace
+    with recording(job.id) as metrics:
+        storyboard = p.get("storyboard") or generate_script(
+            str(p.get("topic") or p.get("transcript") or ""),
+            tone=str(p.get("tone", "conversational")),
+            target_duration_sec=int(p.get("duration", 30)),
+            language=p.get("language") or None,
+        )
+        reuse = {
+            idx: SceneReuse(audio=(path, float(dur)))
+            for idx, (path, dur) in enumerate(p.get("reuse_audio") or [], start=1)
+            if os.path.exists(path)
+        }
+        result = run_pipeline(
+            storyboard.get("scenes", []),
+            deliverables.final_path(),
+            voice=str(p.get("voice", "")),
+            speed=float(p.get("speed", 1.0)),
+            style=str(p.get("style", "animated slides")),
+            reuse=reuse,
+            profile=EncodingProfile(**p["profile"]) if p.get("profile") else None,
+            draft=draft,
+            workspace=workspace,
+        )
+        title = storyboard.get("title", "Video")
+        thumbnail = create_thumbnail(title, workspace=deliverables)
+    stem = os.path.splitext(result.video_path)[0]
+    report = metrics.write(stem)[0] if CONFIG.metrics_reports else None
+    if not draft:
+        # A draft keeps its voice-overs for the final render to reuse
+        workspace.clean_intermediates()
+
+    moves: List[Tuple[str, str]] = []
+    if p.get("output"):
+        out_stem = os.path.splitext(p["output"])[0]
+        candidates = [(result.video_path, p["output"]), (thumbnail, out_stem + "_thumb.jpg")]
+        candidates += [(stem + ext, out_stem + ext) for ext in (".srt", ".vtt", ".metrics.json", ".metrics.prom")]
+        moves = [(src, dst) for src, dst in candidates if os.path.exists(src)]
+    final = dict(moves)
+    return Rendered(
+        result={
+            "video": final.get(result.video_path, result.video_path),
+            "thumbnail": final.get(thumbnail, thumbnail),
+            "title": title,
+            "storyboard": storyboard,
+            "duration": sum(result.durations),
+            "wall_seconds": result.wall_seconds,
+            "scene_audios": [[a.audio_path, a.audio_duration] for a in result.scenes],
+            "metrics": final.get(report, report) if report else None,
+        },
+        workspace=workspace,
+        publish=moves,
+    )
+
+
+_BACKOFF_MAX_SECONDS = 30.0
+
+
+def _stage(moves: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Move each deliverable to a temporary name next to its destination, before the queue's write
+    lock is taken (this is a full copy when the output is on another filesystem). Returns
+    (staged file, destination) pairs for _publish.
+    """
+    staged: List[Tuple[str, str]] = []
+    try:
+        for src, dst in moves:
+            os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+            tmp = f"{dst}.{uuid.uuid4().hex[:8]}.tmp"
+            shutil.move(src, tmp)
+            staged.append((tmp, dst))
+    except BaseException:
+        _discard(staged)
+        raise
+    return staged
+
+
+def _publish(staged: List[Tuple[str, str]]) -> None:
+    for tmp, dst in staged:
+        os.replace(tmp, dst)  # same directory, so an atomic rename
+
+
+def _discard(staged: List[Tuple[str, str]]) -> None:
+    for tmp, _dst in staged:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _run_claimed(queue: JobQueue, job: Job, worker: str) -> None:
+    stop = threading.Event()
+
+    def beat() -> None:
+        # Keeps beating through database errors (e.g. "database is locked" while another worker
+        # writes): the job is only requeued after JOB_STALE_SECONDS without a successful beat
+        while not stop.wait(CONFIG.job_heartbeat_seconds):
+            try:
+                owned = queue.heartbeat(job.id, worker)
+            except sqlite3.Error as e:
+                logger.warning("Heartbeat for job %s failed, retrying: %s", job.id, e)
+                continue
+            if not owned:
+                logger.warning("Lost job %s (presumed stale); its result will be discarded", job.id)
+                return
+
+    beater = threading.Thread(target=beat, name=f"heartbeat-{job.id}", daemon=True)
+    beater.start()
+    t0 = time.perf_counter()
+    try:
+        rendered = execute(job)
+        staged = _stage(rendered.publish)
+        done = False
+        try:
+            done = queue.complete(job.id, worker, rendered.result, publish=lambda: _publish(staged))
+        finally:
+            if not done:
+                _discard(staged)
+        if done:
+            logger.info("Job %s done in %.1fs", job.id, time.perf_counter() - t0)
+        else:
+            logger.warning("Job %s was taken over by another worker; discarding attempt %d", job.id, job.attempts)
+            shutil.rmtree(rendered.workspace.root, ignore_errors=True)
+    except Exception as e:
+        logger.error("Job %s failed (attempt %d): %s", job.id, job.attempts, e)
+        queue.fail(job.id, worker, str(e))
+    finally:
+        stop.set()
+        beater.join()
+
+
+def work(queue: Optional[JobQueue] = None, once: bool = False, worker: Optional[str] = None) -> int:
+    """
+    Claim and run jobs until interrupted (once=True stops when the queue is empty). Returns the
+    number of jobs processed.
+    """
+    queue = queue or JobQueue()
+    worker = worker or worker_id()
+    processed = 0
+    errors = 0
+    logger.info("Worker %s polling %s", worker, queue.path)
+    while True:
+        try:
+            queue.register_worker(worker)
+            queue.requeue_stale()
+            job = queue.claim(worker)
+        except sqlite3.Error as e:
+            # Expected now and then when several workers share the queue file; back off and retry
+            errors += 1
+            delay = min(_BACKOFF_MAX_SECONDS, CONFIG.job_poll_seconds * 2 ** min(errors, 6))
+            logger.warning("Queue database error, retrying in %.0fs: %s", delay, e)
+            time.sleep(delay)
+            continue
+        errors = 0
+        if job is None:
+            if once:
+                return processed
+            time.sleep(CONFIG.job_poll_seconds)
+            continue
+        logger.info("Worker %s running job %s", worker, job.id)
+        try:
+            _run_claimed(queue, job, worker)
+        except sqlite3.Error as e:
+            logger.error("Could not record the outcome of job %s; it is requeued once stale: %s", job.id, e)
+        processed += 1
+
+
+_local_worker: Optional[threading.Thread] = None
+_local_worker_lock = threading.Lock()
+
+
+def ensure_worker(queue: Optional[JobQueue] = None) -> Optional[threading.Thread]:
+    """
+    Start a worker thread in this process unless a live worker already serves the queue, so
+    an app that only submits jobs still gets them rendered when no `worker` command is running.
+    Returns the in-process worker thread, or None when another worker is live.
+    """
+    global _local_worker
+    queue = queue or JobQueue()
+    with _local_worker_lock:
+        if _local_worker is not None and _local_worker.is_alive():
+            return _local_worker
+        if queue.live_workers():
+            return None
+        _local_worker = threading.Thread(
+            target=work,
+            args=(queue,),
+            kwargs={"worker": worker_id() + ":local"},
+            name="render-worker-local",
+            daemon=True,
+        )
+        _local_worker.start()
+        logger.info("No render worker seen for %s; started one in this process", queue.path)
+        return _local_worker
+
+
+def _work_forever() -> None:
+    try:
+        work()
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.jobqueue", description="Render job queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("worker", help="run render workers against the queue")
+    run.add_argument(
+        "--workers", type=int, default=None, help=f"worker processes on this host (default {CONFIG.job_workers})"
+    )
+    run.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    submit = sub.add_parser("submit", help="queue jobs from a JSONL file (one payload per line)")
+    submit.add_argument("jobs")
+    status = sub.add_parser("status", help="show recent jobs")
+    status.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue()
+    if args.command == "submit":
+        with open(args.jobs, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip() and not line.lstrip().startswith("#"):
+                    print(queue.submit(json.loads(line)))
+        return 0
+    if args.command == "status":
+        for job in queue.recent(limit=args.limit):
+            detail = (job.result or {}).get("video") or job.error or ""
+            print(f"{job.id}  {job.status:<8} attempts={job.attempts}  {detail}")
+        return 0
+
+    n_workers = max(1, CONFIG.job_workers if args.workers is None else args.workers)
+    if args.once or n_workers == 1:
+        try:
+            work(queue, once=args.once)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    procs = [multiprocessing.Process(target=_work_forever, name=f"render-worker-{i}") for i in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
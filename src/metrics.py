@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+PROM_PREFIX = "voice2video"
+
+
+@dataclass
+class Span:
+    """Measurements for one unit of work (a stage, or one scene within a stage)."""
+
+    name: str
+    labels: Dict[str, str] = field(default_factory=dict)
+    start: float = 0.0  # epoch seconds
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0  # CPU of the thread that ran the span
+    child_cpu_seconds: float = 0.0  # CPU of ffmpeg processes run inside the span
+    bytes_written: int = 0
+    provider_seconds: float = 0.0  # time spent waiting on external APIs
+    cache_hits: int = 0
+    cache_misses: int = 0
+    error: Optional[str] = None
+
+    def add_output(self, path: str) -> None:
+        """Count the size of a file the span produced."""
+        try:
+            self.bytes_written += os.path.getsize(path)
+        except OSError:
+            pass
+
+    def cache(self, hit: bool) -> None:
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    @contextmanager
+    def provider_call(self) -> Iterator[None]:
+        """Time a request to an external provider (OpenAI, ElevenLabs, RunwayML...)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.provider_seconds += time.perf_counter() - t0
+
+
+_TOTALS = ("wall_seconds", "cpu_seconds", "child_cpu_seconds", "bytes_written", "provider_seconds")
+
+
+class RunMetrics:
+    """Spans recorded for one run, with a per-stage summary, a JSON report and Prometheus text."""
+
+    def __init__(self, run_id: str = "") -> None:
+        self.run_id = run_id
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.wall_seconds = 0.0
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def merge(self, spans: List[Span]) -> None:
+        """Add spans recorded elsewhere, e.g. in a worker process."""
+        with self._lock:
+            self.spans.extend(spans)
+
+    def finish(self) -> None:
+        self.wall_seconds = time.perf_counter() - self._t0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Totals per span name, slowest stage first."""
+        stages: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            row = stages.setdefault(
+                s.name, {"count": 0, **{k: 0 for k in _TOTALS}, "cache_hits": 0, "cache_misses": 0, "errors": 0}
+            )
+            row["count"] += 1
+            for k in _TOTALS:
+                row[k] += getattr(s, k)
+            row["cache_hits"] += s.cache_hits
+            row["cache_misses"] += s.cache_misses
+            row["errors"] += 1 if s.error else 0
+        return dict(sorted(stages.items(), key=lambda kv: kv[1]["wall_seconds"], reverse=True))
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [asdict(s) for s in self.spans]
+        return {
+            "run_id": self.run_id,
+            "started": self.started,
+            "wall_seconds": self.wall_seconds,
+            "stages": self.summary(),
+            "spans": spans,
+        }
+
+    def to_prometheus(self) -> str:
+        """Per-stage totals in the Prometheus text exposition format (for the node_exporter textfile collector)."""
+        metrics = [
+            ("stage_spans_total", "count", "Spans recorded per stage."),
+            ("stage_wall_seconds_total", "wall_seconds", "Wall time spent per stage."),
+            ("stage_cpu_seconds_total", "cpu_seconds", "CPU time of the threads running each stage."),
+            ("stage_child_cpu_seconds_total", "child_cpu_seconds", "CPU time of ffmpeg processes per stage."),
+            ("stage_bytes_written_total", "bytes_written", "Bytes of output written per stage."),
+            ("stage_provider_seconds_total", "provider_seconds", "Time spent waiting on external providers."),
+            ("stage_cache_hits_total", "cache_hits", "Cache hits per stage."),
+            ("stage_cache_misses_total", "cache_misses", "Cache misses per stage."),
+            ("stage_errors_total", "errors", "Failed spans per stage."),
+        ]
+        run = _prom_escape(self.run_id)
+        summary = self.summary()
+        lines: List[str] = []
+        for name, key, help_text in metrics:
+            lines += [f"# HELP {PROM_PREFIX}_{name} {help_text}", f"# TYPE {PROM_PREFIX}_{name} counter"]
+            for stage, row in summary.items():
+                lines.append(f'{PROM_PREFIX}_{name}{{run="{run}",stage="{_prom_escape(stage)}"}} {row[key]:g}')
+        lines += [
+            f"# HELP {PROM_PREFIX}_run_wall_seconds Wall time of the whole run.",
+            f"# TYPE {PROM_PREFIX}_run_wall_seconds gauge",
+            f'{PROM_PREFIX}_run_wall_seconds{{run="{run}"}} {self.wall_seconds:g}',
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, base_path: str) -> List[str]:
+        """Write <base>.metrics.json and <base>.metrics.prom and return their paths."""
+        paths = [base_path + ".metrics.json", base_path + ".metrics.prom"]
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        bodies = (json.dumps(self.report(), ensure_ascii=False, indent=2), self.to_prometheus())
+        for path, body in zip(paths, bodies):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(body)
+            os.replace(tmp, path)  # scrapers never see a partial file
+        return paths
+
+
+def _prom_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_current_run: contextvars.ContextVar[Optional[RunMetrics]] = contextvars.ContextVar("metrics_run", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("metrics_span", default=None)
+
+
+def current_run() -> Optional[RunMetrics]:
+    return _current_run.get()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def recording(run_id: str = "") -> Iterator[RunMetrics]:
+    """Collect the spans of everything run inside the block (and in threads started via bind)."""
+    run = RunMetrics(run_id)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        run.finish()
+        _current_run.reset(token)
+
+
+@contextmanager
+def ensure_recording(run_id: str = "") -> Iterator[RunMetrics]:
+    """Join the caller's recording if there is one, otherwise record on our own."""
+    run = _current_run.get()
+    if run is not None:
+        yield run
+        return
+    with recording(run_id) as run:
+        yield run
+
+
+@contextmanager
+def span(name: str, **labels: Any) -> Iterator[Span]:
+    """
+    Measure a block as one span of the current recording. Outside a recording the span is
+    still measured (callers may annotate it freely) but not kept.
+    """
+    s = Span(name=name, labels={k: str(v) for k, v in labels.items()}, start=time.time())
+    token = _current_span.set(s)
+    t0, c0 = time.perf_counter(), time.thread_time()
+    try:
+        yield s
+    except BaseException as e:
+        s.error = str(e) or type(e).__name__
+        raise
+    finally:
+        s.wall_seconds = time.perf_counter() - t0
+        s.cpu_seconds = time.thread_time() - c0
+        _current_span.reset(token)
+        run = _current_run.get()
+        if run is not None:
+            run.add(s)
+        logger.debug("span %s %s: %.3fs wall, %.3fs cpu", name, s.labels, s.wall_seconds, s.cpu_seconds)
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap fn so it records into the caller's run when called from another thread."""
+    ctx = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return ctx.copy().run(fn, *args, **kwargs)
+
+    return run
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .assembler import assemble_video, concat_segments, mux_scene
+from .config import CONFIG
+from .encoding import DEFAULT_PROFILE, PREVIEW_PROFILE, EncodingProfile
+from .logging_utils import setup_logger
+from .metrics import RunMetrics, bind, current_run, ensure_recording, span
+from .subtitles import build_cues, write_subtitles
+from .tts import synthesize_scene
+from .visuals import ai_clips_enabled, render_scene, request_ai_clips
+from .workspace import RunWorkspace, work_dir_for
+
+logger = setup_logger(__name__)
+
+
+@dataclass(frozen=True)
+class SceneArtifacts:
+    audio_path: str
+    audio_duration: float
+    video_path: str
+    segment_path: str
+    duration: float  # segment (= scene video) length on the final timeline
+
+
+@dataclass(frozen=True)
+class SceneReuse:
+    """Artifacts from an earlier run that are still valid for a scene; missing parts are rebuilt."""
+
+    audio: Optional[Tuple[str, float]] = None  # (path, duration)
+    video: Optional[str] = None
+    segment: Optional[Tuple[str, float]] = None  # only used when audio and video are both reused
+
+
+@dataclass
+class PipelineResult:
+    video_path: str
+    scene_audios: List[str]
+    scene_videos: List[str]
+    durations: List[float]
+    wall_seconds: float
+    # Summed busy time per stage; wall time close to the largest one means the stages overlapped
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    scenes: List[SceneArtifacts] = field(default_factory=list)
+    metrics: Optional[RunMetrics] = None  # spans recorded during the run (see src.metrics)
+
+
+def _scene_subtitles(scenes: List[Dict[str, Any]]) -> List[str]:
+    return [s.get("on_screen_text") or s.get("script_text") or "" for s in scenes]
+
+
+class _Run:
+    """
+    Streams scenes through three stages connected by bounded queues:
+
+        tts ─┐
+             ├─> mux (per-scene segment) ─> concat
+        visuals ─┘
+
+    Voice-over and visuals for a scene run concurrently; the scene's segment is muxed as soon as
+    both are ready. A full queue blocks the stage feeding it, which bounds how far any stage
+    runs ahead of the slowest one. With AI clip providers configured, a scene's visuals wait
+    only for that scene's own AI job and fall back to a slide when it fails.
+    """
+
+    def __init__(
+        self,
+        scenes: List[Dict[str, Any]],
+        voice: str,
+        speed: float,
+        style: str,
+        reuse: Optional[Dict[int, SceneReuse]] = None,
+        profile: EncodingProfile = DEFAULT_PROFILE,
+        work_dir: str = "outputs",
+        ai_clips: bool = True,
+    ) -> None:
+        self.scenes = scenes
+        self.work_dir = work_dir
+        self.ai_clips = ai_clips
+        self.reuse = reuse or {}
+        self.profile = profile
+        self.voice = voice
+        self.speed = speed
+        self.style = style
+        n = len(scenes)
+        self.audio: List[Optional[Tuple[str, float]]] = [None] * n
+        self.video: List[Optional[str]] = [None] * n
+        self.segment: List[Optional[str]] = [None] * n
+        self.durations: List[float] = [0.0] * n
+        self._parts_left = [2] * n
+        self._lock = threading.Lock()
+        self.failed = threading.Event()
+        self.errors: List[str] = []
+        self.busy: Dict[str, float] = {"tts": 0.0, "visuals": 0.0, "mux": 0.0}
+        size = max(1, CONFIG.pipeline_queue_size)
+        self.tts_q: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=size)
+        self.visuals_q: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=size)
+        self.mux_q: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=size)
+        self.visual_workers = max(1, min(CONFIG.render_workers or os.cpu_count() or 1, n or 1))
+        # Split cores between concurrent encodes instead of letting every x264 instance claim all of them
+        self.x264_threads = max(1, (os.cpu_count() or 1) // self.visual_workers)
+        # One future per scene waiting on an AI clip, settled as soon as that scene's job is
+        self.ai_clips_ready: Dict[int, "Future[Optional[str]]"] = {}
+
+    def _worker(self, stage: str, q: "queue.Queue[Optional[int]]", fn) -> None:
+        while True:
+            idx = q.get()
+            if idx is None:
+                return
+            if self.failed.is_set():
+                continue  # drain so upstream stages never block on a dead pipeline
+            t0 = time.perf_counter()
+            try:
+                fn(idx)
+            except Exception as e:
+                logger.error("Scene %d failed in %s stage: %s", idx, stage, e)
+                with self._lock:
+                    self.errors.append(f"scene {idx} ({stage}): {e}")
+                self.failed.set()
+            finally:
+                with self._lock:
+                    self.busy[stage] += time.perf_counter() - t0
+
+    def _part_done(self, idx: int) -> None:
+        with self._lock:
+            self._parts_left[idx - 1] -= 1
+            ready = self._parts_left[idx - 1] == 0
+        if ready:
+            self.mux_q.put(idx)  # outside the lock: a full queue must not block other workers
+
+    def _tts(self, idx: int) -> None:
+        self.audio[idx - 1] = synthesize_scene(
+            idx, self.scenes[idx - 1], self.voice, self.speed, self.work_dir
+        )
+        self._part_done(idx)
+
+    def _ai_clip_settled(self, idx: int, path: Optional[str]) -> None:
+        ready = self.ai_clips_ready.get(idx)
+        with self._lock:
+            if ready is not None and not ready.done():
+                ready.set_result(path)
+
+    def _ai_batch_done(self, batch: Future) -> None:
+        if batch.exception() is not None:
+            logger.warning("AI clip generation failed, using slides: %s", batch.exception())
+        for idx in self.ai_clips_ready:
+            self._ai_clip_settled(idx, None)  # scenes the batch never reported
+
+    def _visuals(self, idx: int) -> None:
+        ready = self.ai_clips_ready.get(idx)
+        path = ready.result() if ready is not None else None
+        if path is None:
+            path = render_scene(
+                idx,
+                self.scenes[idx - 1],
+                len(self.scenes),
+                self.style,
+                self.x264_threads,
+                self.profile,
+                self.work_dir,
+            )
+        self.video[idx - 1] = path
+        self._part_done(idx)
+
+    def _mux(self, idx: int) -> None:
+        audio = self.audio[idx - 1]
+        video = self.video[idx - 1]
+        assert audio is not None and video is not None
+        out = os.path.join(self.work_dir, "segments", f"scene_{idx:02d}.mp4")
+        with span("mux", scene=idx) as s:
+            self.durations[idx - 1] = mux_scene(video, audio[0], out, self.profile)
+            s.add_output(out)
+        self.segment[idx - 1] = out
+
+    def _feed(self, idx: int) -> None:
+        reuse = self.reuse.get(idx, SceneReuse())
+        if reuse.audio is not None and reuse.video is not None and reuse.segment is not None:
+            self.audio[idx - 1], self.video[idx - 1] = reuse.audio, reuse.video
+            self.segment[idx - 1], self.durations[idx - 1] = reuse.segment
+            return
+        if reuse.audio is not None:
+            self.audio[idx - 1] = reuse.audio
+            self._part_done(idx)
+        else:
+            self.tts_q.put(idx)
+        if reuse.video is not None:
+            self.video[idx - 1] = reuse.video
+            self._part_done(idx)
+        else:
+            self.visuals_q.put(idx)
+
+    def _threads(self, stage: str, q: "queue.Queue[Optional[int]]", fn, count: int) -> List[threading.Thread]:
+        threads = [
+            threading.Thread(target=bind(self._worker), args=(stage, q, fn), name=f"pipeline-{stage}-{i}", daemon=True)
+            for i in range(count)
+        ]
+        for t in threads:
+            t.start()
+        return threads
+
+    def run(self) -> None:
+        n = len(self.scenes)
+        ai_pool: Optional[ThreadPoolExecutor] = None
+        needs_visuals = [idx for idx in range(1, n + 1) if self.reuse.get(idx, SceneReuse()).video is None]
+        if self.ai_clips and ai_clips_enabled() and needs_visuals:
+            # AI jobs are submitted together so provider caps apply across the whole storyboard
+            self.ai_clips_ready = {idx: Future() for idx in needs_visuals}
+            ai_pool = ThreadPoolExecutor(max_workers=1)
+            batch = ai_pool.submit(
+                bind(request_ai_clips), self.scenes, needs_visuals, self.work_dir, self._ai_clip_settled
+            )
+            batch.add_done_callback(self._ai_batch_done)
+        try:
+            tts_workers = max(1, min(CONFIG.tts_workers, n))
+            mux_workers = max(1, min(CONFIG.pipeline_mux_workers, n))
+            upstream = self._threads("tts", self.tts_q, self._tts, tts_workers)
+            upstream += self._threads("visuals", self.visuals_q, self._visuals, self.visual_workers)
+            muxers = self._threads("mux", self.mux_q, self._mux, mux_workers)
+
+            for idx in range(1, n + 1):
+                if self.failed.is_set():
+                    break
+                self._feed(idx)
+            for _ in range(tts_workers):
+                self.tts_q.put(None)
+            for _ in range(self.visual_workers):
+                self.visuals_q.put(None)
+            for t in upstream:
+                t.join()
+            for _ in range(mux_workers):
+                self.mux_q.put(None)
+            for t in muxers:
+                t.join()
+        finally:
+            if ai_pool is not None:
+                ai_pool.shutdown(wait=True)
+
+
+def run_pipeline(
+    scenes: List[Dict[str, Any]],
+    output_path: str,
+    voice: str = "",
+    speed: float = 1.0,
+    style: str = "animated slides",
+    subtitles: Optional[List[str]] = None,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    reuse: Optional[Dict[int, SceneReuse]] = None,
+    profile: Optional[EncodingProfile] = None,
+    draft: bool = False,
+    workspace: Optional[RunWorkspace] = None,
+) -> PipelineResult:
+    """
+    Produce the final video for a storyboard's scenes, overlapping voice-over, visuals and
+    per-scene muxing instead of running each stage for every scene before the next begins.
+
+    Scene audio, clips and muxed segments go to the workspace's audio/, visuals/ and segments/
+    dirs (the shared outputs/ tree without a workspace); segments are joined losslessly into
+    output_path (or normalized into mezzanine segments if, e.g., AI clips differ in format).
+    Subtitles default to each scene's on-screen or script text and are written as .srt/.vtt
+    sidecars.
+    reuse maps 1-based scene indices to still-valid artifacts from an earlier run; only the
+    missing parts of those scenes are rebuilt (see src.incremental). profile sets resolution,
+    frame rate and encoder speed/quality (default 1080p30, final tier).
+
+    draft=True renders a quick preview instead: PREVIEW_PROFILE (unless a profile is given), no
+    AI clips, and every intermediate under the workspace's preview/ tree (CONFIG.preview_dir
+    without one) so the full-quality artifacts are untouched. Pass the preview's scene audio
+    back as reuse for the final render to skip TTS.
+    Per-stage spans are recorded into the caller's metrics recording, or into a new one whose
+    report is written next to the output (<stem>.metrics.json/.prom, unless
+    CONFIG.metrics_reports is off); either way the result carries them.
+    Raises RuntimeError naming every scene that failed.
+    """
+    if not scenes:
+        raise ValueError("No scenes to render")
+    owns_metrics = current_run() is None
+    with ensure_recording(workspace.run_id if workspace is not None else "") as metrics:
+        t0 = time.perf_counter()
+        profile = profile or (PREVIEW_PROFILE if draft else DEFAULT_PROFILE)
+        work_dir = work_dir_for(workspace, draft)
+        run = _Run(scenes, voice, speed, style, reuse, profile, work_dir, ai_clips=not draft)
+        run.run()
+        if run.errors:
+            raise RuntimeError("Pipeline failed: " + "; ".join(run.errors))
+
+        audios = [a[0] for a in run.audio if a is not None]
+        videos = [v for v in run.video if v is not None]
+        texts = _scene_subtitles(scenes) if subtitles is None else subtitles
+        durations = concat_segments([s for s in run.segment if s is not None], output_path)
+        if durations is None:
+            logger.info("Scene clips differ in format, normalizing them into mezzanine segments")
+            assemble_video(videos, audios, texts, output_path, mode="segments", segments=segments, profile=profile)
+            durations = run.durations
+        else:
+            try:
+                write_subtitles(build_cues(texts, durations, segments), os.path.splitext(output_path)[0])
+            except Exception as e:
+                logger.warning("Failed to write subtitles: %s", e)
+
+        wall = time.perf_counter() - t0
+        logger.info(
+            "Pipeline finished %d scenes in %.1fs (stage busy: tts %.1fs, visuals %.1fs, mux %.1fs)",
+            len(scenes),
+            wall,
+            run.busy["tts"],
+            run.busy["visuals"],
+            run.busy["mux"],
+        )
+    if owns_metrics and CONFIG.metrics_reports:
+        # Callers that record a larger job (batch, job queue) write the report themselves
+        metrics.write(os.path.splitext(output_path)[0])
+    return PipelineResult(
+        video_path=output_path,
+        scene_audios=audios,
+        scene_videos=videos,
+        durations=list(durations),
+        wall_seconds=wall,
+        stage_seconds=dict(run.busy),
+        metrics=metrics,
+        scenes=[
+            SceneArtifacts(
+                audio_path=a[0], audio_duration=a[1], video_path=v, segment_path=seg, duration=d
+            )
+            for a, v, seg, d in zip(run.audio, run.video, run.segment, run.durations)
+            if a is not None and v is not None and seg is not None
+        ],
+    )
+
+
+def audio_reuse(result: PipelineResult) -> Dict[int, SceneReuse]:
+    """Carry an earlier run's voice-over (e.g. a draft preview) into the next render; clips are redone."""
+    return {
+        idx: SceneReuse(audio=(art.audio_path, art.audio_duration))
+        for idx, art in enumerate(result.scenes, start=1)
+    }
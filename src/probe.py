@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import wave
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Any, Dict, Optional, Tuple
+
+from .ffmpeg_utils import ffmpeg_binary
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_MEMO_MAX_ENTRIES = 4096
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_STREAM_RE = re.compile(r"Stream #\d+:(?P<index>\d+)[^:]*: (?P<kind>Video|Audio): (?P<rest>.*)")
+_VIDEO_RE = re.compile(
+    r"(?P<codec>\w+)(?: \((?P<profile>[^)]*)\))?.*?, "
+    r"(?P<pix_fmt>\w+)(?:\([^)]*\))?, (?P<w>\d+)x(?P<h>\d+).*?, (?P<fps>[\d.]+k?) fps.*?, (?P<tbn>[\d.]+k?) tbn"
+)
+_AUDIO_RE = re.compile(r"(?P<codec>\w+).*?, (?P<rate>\d+) Hz, (?P<layout>[^,]+)")
+_LAYOUT_CHANNELS = {"mono": 1, "stereo": 2, "2.1": 3, "quad": 4, "5.0": 5, "5.1": 6, "7.1": 8}
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    index: int
+    kind: str  # "video" or "audio"
+    codec: str
+    profile: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    timescale: int = 0  # time base denominator (ffmpeg's "tbn")
+    sample_rate: int = 0
+    channels: int = 0
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    path: str
+    duration: Optional[float]
+    streams: Tuple[StreamInfo, ...]
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.kind == "video"), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.kind == "audio"), None)
+
+
+# abspath -> (mtime_ns, size, info); a changed file simply replaces its entry
+_memo: Dict[str, Tuple[int, int, MediaInfo]] = {}
+_memo_lock = threading.Lock()
+
+
+def _number(text: str) -> float:
+    # ffmpeg abbreviates large values, e.g. "15.36k" tbn
+    return float(text[:-1]) * 1000 if text.endswith("k") else float(text)
+
+
+def _probe_wav(path: str) -> Optional[MediaInfo]:
+    try:
+        with wave.open(path, "rb") as wf:
+            rate = wf.getframerate()
+            stream = StreamInfo(
+                index=0,
+                kind="audio",
+                codec=f"pcm_s{wf.getsampwidth() * 8}le",
+                sample_rate=rate,
+                channels=wf.getnchannels(),
+            )
+            return MediaInfo(path=path, duration=wf.getnframes() / float(rate or 1), streams=(stream,))
+    except (wave.Error, EOFError):
+        return None
+
+
+def _ffprobe_binary() -> Optional[str]:
+    # imageio-ffmpeg ships ffmpeg only; look next to it, then on PATH
+    sibling = os.path.join(os.path.dirname(ffmpeg_binary()), "ffprobe")
+    if os.path.isfile(sibling) and os.access(sibling, os.X_OK):
+        return sibling
+    return shutil.which("ffprobe")
+
+
+def _probe_ffprobe(path: str, binary: str) -> MediaInfo:
+    proc = subprocess.run(
+        [binary, "-v", "error", "-show_format", "-show_streams", "-of", "json", path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        err = proc.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffprobe failed for {path}: {err[-500:]}")
+    data: Dict[str, Any] = json.loads(proc.stdout or b"{}")
+    streams = []
+    for s in data.get("streams", []):
+        kind = s.get("codec_type")
+        if kind not in ("video", "audio"):
+            continue
+        fps = s.get("r_frame_rate") or "0/1"
+        time_base = s.get("time_base") or "0/1"
+        streams.append(
+            StreamInfo(
+                index=int(s.get("index", len(streams))),
+                kind=kind,
+                codec=s.get("codec_name", ""),
+                profile=s.get("profile"),
+                pix_fmt=s.get("pix_fmt"),
+                width=int(s.get("width", 0)),
+                height=int(s.get("height", 0)),
+                fps=round(float(Fraction(fps)) if fps != "0/0" else 0.0, 2),
+                timescale=Fraction(time_base).denominator if time_base != "0/0" else 0,
+                sample_rate=int(s.get("sample_rate", 0)),
+                channels=int(s.get("channels", 0)),
+            )
+        )
+    duration = data.get("format", {}).get("duration")
+    return MediaInfo(path=path, duration=float(duration) if duration else None, streams=tuple(streams))
+
+
+def _probe_ffmpeg(path: str) -> MediaInfo:
+    # `ffmpeg -i` with no output prints the container/stream summary and exits without decoding
+    proc = subprocess.run(
+        [ffmpeg_binary(), "-hide_banner", "-nostdin", "-i", path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    info = proc.stderr.decode("utf-8", errors="replace")
+    streams = []
+    for line in info.splitlines():
+        m = _STREAM_RE.search(line)
+        if not m:
+            continue
+        index, rest = int(m.group("index")), m.group("rest")
+        if m.group("kind") == "Video":
+            v = _VIDEO_RE.match(rest)
+            if v:
+                streams.append(
+                    StreamInfo(
+                        index=index,
+                        kind="video",
+                        codec=v.group("codec"),
+                        profile=v.group("profile"),
+                        pix_fmt=v.group("pix_fmt"),
+                        width=int(v.group("w")),
+                        height=int(v.group("h")),
+                        fps=round(_number(v.group("fps")), 2),
+                        timescale=int(_number(v.group("tbn"))),
+                    )
+                )
+        else:
+            a = _AUDIO_RE.match(rest)
+            if a:
+                layout = a.group("layout").strip()
+                streams.append(
+                    StreamInfo(
+                        index=index,
+                        kind="audio",
+                        codec=a.group("codec"),
+                        sample_rate=int(a.group("rate")),
+                        channels=_LAYOUT_CHANNELS.get(layout.split("(")[0], 0),
+                    )
+                )
+    if not streams:
+        tail = info.strip().splitlines()[-1:] or [""]
+        raise RuntimeError(f"Cannot probe {path}: {tail[0]}")
+    m = _DURATION_RE.search(info)
+    duration = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3)) if m else None
+    return MediaInfo(path=path, duration=duration, streams=tuple(streams))
+
+
+def probe(path: str) -> MediaInfo:
+    """
+    Duration and stream layout of a media file without decoding it.
+
+    WAV files are read from their header; anything else costs one ffprobe call (or one
+    `ffmpeg -i` summary when ffprobe is not installed). Results are memoized by
+    (path, mtime, size), so repeated probes of an unchanged file are free.
+    Raises RuntimeError if the file has no audio or video streams.
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    with _memo_lock:
+        hit = _memo.get(key)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+
+    info = _probe_wav(path)
+    if info is None:
+        binary = _ffprobe_binary()
+        info = _probe_ffprobe(path, binary) if binary else _probe_ffmpeg(path)
+
+    with _memo_lock:
+        if len(_memo) >= _MEMO_MAX_ENTRIES:
+            _memo.pop(next(iter(_memo)))
+        _memo[key] = (st.st_mtime_ns, st.st_size, info)
+    return info
+
+
+def duration(path: str) -> float:
+    """Duration in seconds; raises RuntimeError if the container does not report one."""
+    value = probe(path).duration
+    if value is None:
+        raise RuntimeError(f"Unknown duration: {path}")
+    return value
+
+
+def clear_cache() -> None:
+    with _memo_lock:
+        _memo.clear()
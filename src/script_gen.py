@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
+from .cache import SQLiteCache, make_key
 from .config import CONFIG
 from .logging_utils import setup_logger
+from .metrics import span
 
 logger = setup_logger(__name__)
 
+_MODEL = "gpt-4o-mini"
+# Bump whenever the system/user prompts below change so cached storyboards are not reused
+_PROMPT_VERSION = 1
+
 
 def _fallback_storyboard(transcript: str, tone: str, target_duration_sec: int, language: Optional[str]) -> Dict[str, Any]:
     words = transcript.split()
@@ -124,14 +131,51 @@ def _fallback_storyboard(transcript: str, tone: str, target_duration_sec: int, l
     }
 
 
+@lru_cache(maxsize=1)
+def _storyboard_cache() -> SQLiteCache:
+    return SQLiteCache(
+        CONFIG.storyboard_cache_path,
+        ttl_seconds=CONFIG.storyboard_cache_ttl_hours * 3600,
+        max_bytes=CONFIG.storyboard_cache_max_mb * 1024 * 1024,
+    )
+
+
+def _storyboard_key(transcript: str, tone: str, target_duration_sec: int, language: Optional[str]) -> str:
+    return make_key(
+        transcript=" ".join(transcript.split()),
+        tone=tone.strip().lower(),
+        target_duration_sec=int(target_duration_sec),
+        language=(language or "auto").strip().lower(),
+        model=_MODEL,
+        prompt_version=_PROMPT_VERSION,
+    )
+
+
 def generate_script(
     transcript: str,
     tone: str = "conversational",
     target_duration_sec: int = 90,
     language: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
-    """Generate a structured storyboard JSON using OpenAI if available, else fallback."""
-    if CONFIG.openai_api_key:
+    """
+    Generate a structured storyboard JSON using OpenAI if available, else fallback.
+
+    Model responses are cached on disk keyed on the normalized inputs, model and prompt version.
+    Pass use_cache=False to force a fresh generation (the new result still replaces the cached one).
+    """
+    with span("script_gen", provider="openai" if CONFIG.openai_api_key else "fallback") as s:
+        if not CONFIG.openai_api_key:
+            logger.info("OPENAI_API_KEY not set, using local storyboard fallback")
+            return _fallback_storyboard(transcript, tone, target_duration_sec, language)
+        cache = _storyboard_cache()
+        key = _storyboard_key(transcript, tone, target_duration_sec, language)
+        if use_cache:
+            cached = cache.get(key)
+            s.cache(cached is not None)
+            if cached is not None:
+                logger.info("Using cached storyboard")
+                return cached
         try:
             from openai import OpenAI  # type: ignore
 
@@ -149,22 +193,21 @@ def generate_script(
                 f"Transcript:\n\"\"\"\n{transcript}\n\"\"\"\n"
             )
             client = OpenAI(api_key=CONFIG.openai_api_key)
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.6,
-            )
+            with s.provider_call():
+                resp = client.chat.completions.create(
+                    model=_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=0.6,
+                )
             content = resp.choices[0].message.content  # type: ignore
             data = json.loads(content)
             # basic validation
             assert isinstance(data.get("scenes"), list)
+            cache.put(key, data)
             return data
         except Exception as e:
             logger.warning("OpenAI script generation failed, using fallback: %s", e)
             return _fallback_storyboard(transcript, tone, target_duration_sec, language)
-    else:
-        logger.info("OPENAI_API_KEY not set, using local storyboard fallback")
-        return _fallback_storyboard(transcript, tone, target_duration_sec, language)
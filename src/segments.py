@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import FileCache, file_digest, make_key
+from .config import CONFIG
+from .encoding import DEFAULT_PROFILE, EncodingProfile
+from .ffmpeg_utils import run_ffmpeg
+from .logging_utils import setup_logger
+from .metrics import bind, span
+from .probe import probe
+
+logger = setup_logger(__name__)
+
+# Bump when the segment encode changes so stale cached segments are not reused
+_SEGMENT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class SegmentEntry:
+    index: int  # 1-based scene number
+    video: str
+    audio: str
+    key: str  # content hash of both inputs and the profile
+    path: str
+    start: float  # offset of the scene in the final video, seconds
+    duration: float
+
+
+@dataclass(frozen=True)
+class SegmentIndex:
+    profile: EncodingProfile
+    scenes: List[SegmentEntry]
+
+    @property
+    def total(self) -> float:
+        return sum(s.duration for s in self.scenes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"profile": asdict(self.profile), "total": self.total, "scenes": [asdict(s) for s in self.scenes]}
+
+
+def _ensure_dir(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+@lru_cache(maxsize=1)
+def _segment_cache() -> FileCache:
+    return FileCache(CONFIG.segment_cache_dir, CONFIG.segment_cache_max_mb * 1024 * 1024, suffix=".mp4")
+
+
+def write_concat_list(paths: List[str], directory: str) -> str:
+    """Write an ffmpeg concat-demuxer list for paths into directory and return its path."""
+    fd, list_path = tempfile.mkstemp(prefix=".concat_", suffix=".txt", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for p in paths:
+            escaped = os.path.abspath(p).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_path
+
+
+def concat_copy(paths: List[str], output_path: str) -> None:
+    """Join files that share one stream layout with the concat demuxer, without re-encoding."""
+    _ensure_dir(output_path)
+    list_path = write_concat_list(paths, os.path.dirname(os.path.abspath(output_path)))
+    try:
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", "-movflags", "+faststart", output_path])
+    finally:
+        os.remove(list_path)
+
+
+def segment_key(video: str, audio: str, profile: EncodingProfile = DEFAULT_PROFILE) -> str:
+    return make_key(
+        version=_SEGMENT_VERSION, video=file_digest(video), audio=file_digest(audio), profile=asdict(profile)
+    )
+
+
+def encode_segment(video: str, audio: str, output_path: str, profile: EncodingProfile = DEFAULT_PROFILE) -> None:
+    """
+    Encode one scene into a mezzanine segment: video scaled and padded to the profile size at a
+    constant frame rate with a fixed, closed GOP; audio resampled to stereo AAC and padded or
+    trimmed to the video length.
+    """
+    duration = probe(video).duration
+    if duration is None:
+        raise RuntimeError(f"Unknown duration: {video}")
+    gop = profile.gop
+    _ensure_dir(output_path)
+    run_ffmpeg(
+        [
+            "-i", video,
+            "-i", audio,
+            "-filter:v", f"{profile.fit_filter()},fps={profile.fps},format=yuv420p",
+            "-filter:a", f"aresample={profile.audio_rate},aformat=sample_fmts=fltp:channel_layouts=stereo,"
+            f"apad,atrim=0:{duration:.6f},asetpts=N/SR/TB",
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-t", f"{duration:.6f}",
+            "-c:v", "libx264",
+            *profile.x264_args(),
+            "-g", str(gop),
+            "-keyint_min", str(gop),
+            "-sc_threshold", "0",
+            "-c:a", "aac",
+            "-b:a", profile.audio_bitrate,
+            "-video_track_timescale", str(profile.fps * 512),
+            "-movflags", "+faststart",
+            output_path,
+        ]
+    )
+
+
+def _materialize(idx: int, video: str, audio: str, dest: str, profile: EncodingProfile) -> Tuple[str, bool]:
+    """Place scene idx's segment at dest, from the segment cache or a fresh encode. Returns (key, encoded)."""
+    cache = _segment_cache()
+    key = segment_key(video, audio, profile)
+    if os.path.exists(dest):
+        os.remove(dest)  # may be a hard link into the cache; never encode through it
+    with span("encode", scene=idx) as s:
+        hit = cache.fetch(key, dest)
+        s.cache(hit)
+        if not hit:
+            encode_segment(video, audio, dest, profile)
+            cache.put(key, dest)
+        s.add_output(dest)
+    return key, not hit
+
+
+def segment_dir(output_path: str) -> str:
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    return os.path.join(os.path.dirname(output_path), f"{stem}_segments")
+
+
+def assemble_segments(
+    scene_videos: List[str],
+    audio_paths: List[str],
+    output_path: str,
+    profile: Optional[EncodingProfile] = None,
+    workers: Optional[int] = None,
+) -> SegmentIndex:
+    """
+    Build output_path as a lossless concat of per-scene mezzanine segments.
+
+    Every segment uses the profile's resolution, frame rate, GOP and audio format (default
+    1080p30). Segments are cached by the content of each scene's video and audio and the
+    profile, so after replacing one scene only that segment is encoded again. Segments and
+    index.json (each scene's inputs, segment path, start offset and duration) are written to
+    <output stem>_segments/.
+    """
+    if len(scene_videos) != len(audio_paths):
+        raise ValueError("scene_videos and audio_paths must have the same length")
+    profile = profile or DEFAULT_PROFILE
+    work_dir = segment_dir(output_path)
+    os.makedirs(work_dir, exist_ok=True)
+    dests = [os.path.join(work_dir, f"scene_{i:02d}.mp4") for i in range(1, len(scene_videos) + 1)]
+    n_workers = max(1, min(CONFIG.segment_workers if workers is None else workers, len(dests) or 1))
+    jobs = list(zip(range(1, len(dests) + 1), scene_videos, audio_paths, dests))
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        results = list(pool.map(bind(lambda job: _materialize(*job, profile)), jobs))
+
+    entries: List[SegmentEntry] = []
+    start = 0.0
+    for (idx, video, audio, dest), (key, _encoded) in zip(jobs, results):
+        duration = probe(dest).duration or 0.0
+        entries.append(
+            SegmentEntry(index=idx, video=video, audio=audio, key=key, path=dest, start=start, duration=duration)
+        )
+        start += duration
+    index = SegmentIndex(profile=profile, scenes=entries)
+
+    concat_copy(dests, output_path)
+    with open(os.path.join(work_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, ensure_ascii=False, indent=2)
+    encoded = sum(1 for _key, enc in results if enc)
+    logger.info("Segments: %d encoded, %d reused; %.1fs total", encoded, len(results) - encoded, index.total)
+    return index
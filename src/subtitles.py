@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import srt
+
+from .logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Common broadcast limits: two lines of at most 42 characters per cue
+MAX_CHARS_PER_LINE = 42
+MAX_LINES_PER_CUE = 2
+
+
+@dataclass(frozen=True)
+class Cue:
+    start: float
+    end: float
+    text: str  # may contain "\n" between lines
+
+
+def _ensure_dir(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+def wrap_lines(text: str, max_chars: int = MAX_CHARS_PER_LINE) -> List[str]:
+    """Greedy word wrap; words longer than max_chars get a line of their own."""
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _split_timed(
+    text: str, start: float, end: float, max_chars: int, max_lines: int
+) -> List[Cue]:
+    """Split text into readable cues spread over [start, end) in proportion to their length."""
+    lines = wrap_lines(text, max_chars)
+    if not lines or end <= start:
+        return []
+    groups = ["\n".join(lines[i : i + max_lines]) for i in range(0, len(lines), max_lines)]
+    weights = [len(g.replace("\n", " ")) for g in groups]
+    total = float(sum(weights))
+    cues: List[Cue] = []
+    t = start
+    for k, (group, weight) in enumerate(zip(groups, weights)):
+        cue_end = end if k == len(groups) - 1 else t + (end - start) * weight / total
+        cues.append(Cue(start=t, end=cue_end, text=group))
+        t = cue_end
+    return cues
+
+
+def build_cues(
+    texts: List[str],
+    durations: List[float],
+    segments: Optional[List[Dict[str, Any]]] = None,
+    max_chars: int = MAX_CHARS_PER_LINE,
+    max_lines: int = MAX_LINES_PER_CUE,
+) -> List[Cue]:
+    """
+    Time subtitle cues against the assembled timeline.
+
+    With segments (dicts with start/end/text in seconds on the output timeline, as returned by
+    transcribe_audio for the narration), each segment becomes one or more cues. Otherwise scene i
+    shows texts[i] during its own window, which starts at the sum of the previous durations.
+    Long text is wrapped and split into several cues; nothing runs past the total duration.
+    """
+    total = float(sum(durations))
+    cues: List[Cue] = []
+    if segments:
+        for seg in sorted(segments, key=lambda s: float(s.get("start", 0.0))):
+            start = max(0.0, float(seg.get("start", 0.0)))
+            end = min(total, float(seg.get("end", start))) if total > 0 else float(seg.get("end", start))
+            cues.extend(_split_timed(str(seg.get("text", "")), start, end, max_chars, max_lines))
+        return cues
+
+    offset = 0.0
+    for text, duration in zip(texts, durations):
+        cues.extend(_split_timed(text or "", offset, offset + duration, max_chars, max_lines))
+        offset += duration
+    return cues
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    hh, rem = divmod(ms, 3_600_000)
+    mm, rem = divmod(rem, 60_000)
+    ss, ms = divmod(rem, 1000)
+    return f"{hh:02d}:{mm:02d}:{ss:02d}.{ms:03d}"
+
+
+def to_srt(cues: List[Cue]) -> str:
+    subs = [
+        srt.Subtitle(index=i, start=dt.timedelta(seconds=c.start), end=dt.timedelta(seconds=c.end), content=c.text)
+        for i, c in enumerate(cues, start=1)
+    ]
+    return srt.compose(subs)
+
+
+def to_vtt(cues: List[Cue]) -> str:
+    blocks = ["WEBVTT\n"]
+    for c in cues:
+        blocks.append(f"{_vtt_timestamp(c.start)} --> {_vtt_timestamp(c.end)}\n{c.text}\n")
+    return "\n".join(blocks)
+
+
+def write_subtitles(cues: List[Cue], base_path: str) -> List[str]:
+    """Write <base>.srt and <base>.vtt and return their paths."""
+    paths = [base_path + ".srt", base_path + ".vtt"]
+    _ensure_dir(paths[0])
+    for path, body in zip(paths, (to_srt(cues), to_vtt(cues))):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+    return paths
@@ -5,9 +5,23 @@ from typing import Optional
 
 from PIL import Image, ImageDraw, ImageFont
 
+from .workspace import RunWorkspace
 
-def create_thumbnail(title: str, out_path: str, bg_color=(24, 24, 28), size=(1280, 720), overlay_path: Optional[str] = None) -> str:
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+def create_thumbnail(
+    title: str,
+    out_path: Optional[str] = None,
+    bg_color=(24, 24, 28),
+    size=(1280, 720),
+    overlay_path: Optional[str] = None,
+    workspace: Optional[RunWorkspace] = None,
+) -> str:
+    """Render a title card to out_path (default thumbnail.jpg in the workspace's final/ dir)."""
+    if out_path is None:
+        if workspace is None:
+            raise ValueError("create_thumbnail needs out_path or a workspace")
+        out_path = workspace.final_path("thumbnail.jpg")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
     img = Image.new("RGB", size, color=bg_color)
     draw = ImageDraw.Draw(img)
     try:
@@ -20,5 +34,9 @@ def create_thumbnail(title: str, out_path: str, bg_color=(24, 24, 28), size=(128
     if overlay_path and os.path.exists(overlay_path):
         overlay = Image.open(overlay_path).convert("RGBA").resize((size[0] // 3, size[1] // 3))
         img.paste(overlay, (size[0] - overlay.width - margin, size[1] - overlay.height - margin), overlay)
-    img.save(out_path)
+    # Write then rename so a reader never sees a half-written image
+    root, ext = os.path.splitext(out_path)
+    tmp = f"{root}.{os.getpid()}.tmp{ext}"
+    img.save(tmp)
+    os.replace(tmp, out_path)
     return out_path
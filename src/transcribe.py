@@ -2,20 +2,33 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any, Dict, List, Optional
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from moviepy.editor import AudioFileClip
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
 
+from .audio_prep import compress, decode_to_pcm, prepare_for_transcription
+from .cache import SQLiteCache, file_digest, make_key
 from .config import CONFIG
 from .logging_utils import setup_logger
+from .metrics import span
+from .probe import duration as media_duration
 
 logger = setup_logger(__name__)
 
+_MODEL = "whisper-1"
+# Bump when pre-processing, chunking or segment post-processing changes so cached transcripts are not reused
+_TRANSCRIBE_VERSION = 2
+# Silence detection scans in 10 ms steps: chunk boundaries need no finer resolution, and the
+# default 1 ms step costs seconds of CPU per 10 minutes of audio before the first upload
+_SILENCE_SEEK_MS = 10
+
 
 def _fallback_transcription(audio_path: str) -> Dict[str, Any]:
     try:
-        with AudioFileClip(audio_path) as a:
-            duration = float(a.duration or 10.0)
+        duration = media_duration(audio_path)
     except Exception:
         duration = 10.0
     segments: List[Dict[str, Any]] = [
@@ -24,45 +37,204 @@ def _fallback_transcription(audio_path: str) -> Dict[str, Any]:
     return {"transcript": "Demo fallback transcript.", "segments": segments}
 
 
-def transcribe_audio(audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+def _transcribe_file(path: str, language: Optional[str]) -> Dict[str, Any]:
+    """One Whisper request for one file. Returns {transcript, segments} with file-relative times."""
+    from openai import OpenAI  # type: ignore
+
+    client = OpenAI(api_key=CONFIG.openai_api_key)
+    with open(path, "rb") as f:
+        transcript = client.audio.transcriptions.create(
+            model=_MODEL,
+            file=f,
+            response_format="verbose_json",
+            language=language,
+        )
+    data = json.loads(transcript.model_dump_json()) if hasattr(transcript, "model_dump_json") else transcript  # type: ignore
+    text = data.get("text") or data.get("transcript") or ""
+    segs = data.get("segments") or []
+    segments: List[Dict[str, Any]] = []
+    for s in segs:
+        segments.append(
+            {
+                "start": float(s.get("start", 0.0)),
+                "end": float(s.get("end", 0.0)),
+                "text": s.get("text", ""),
+            }
+        )
+    return {"transcript": text, "segments": segments}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Connection problems, timeouts, rate limits and server errors are worth another try."""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    try:
+        from openai import APIConnectionError  # type: ignore
+    except ImportError:
+        return False
+    return isinstance(exc, APIConnectionError)  # includes APITimeoutError
+
+
+def _with_retries(fn: Callable[[], Any]) -> Any:
+    # Same policy as the TTS requests
+    retrying = Retrying(
+        stop=stop_after_attempt(max(1, CONFIG.retry_max_attempts)),
+        wait=wait_exponential(multiplier=CONFIG.retry_backoff_seconds, max=60),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True,
+    )
+    return retrying(fn)
+
+
+def _transcribe_chunk(path: str, language: Optional[str]) -> Dict[str, Any]:
+    """Transcribe one chunk, retrying it on its own so one failure does not discard the others."""
+    return _with_retries(lambda: _transcribe_file(path, language))
+
+
+def _plan_chunks(nonsilent: List[Tuple[int, int]], total_ms: int, max_chunk_ms: int) -> List[Tuple[int, int]]:
+    """
+    Split [0, total_ms) into chunks of at most max_chunk_ms, cutting in the middle of silent gaps
+    between the given non-silent ranges where possible and hard-cutting only inside long speech.
+    """
+    cuts = [(a_end + b_start) // 2 for (_a, a_end), (b_start, _b) in zip(nonsilent, nonsilent[1:])]
+    chunks: List[Tuple[int, int]] = []
+    start = 0
+    while total_ms - start > max_chunk_ms:
+        limit = start + max_chunk_ms
+        candidates = [c for c in cuts if start < c <= limit]
+        end = candidates[-1] if candidates else limit
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, total_ms))
+    return chunks
+
+
+def _bitrate_bps(bitrate: str) -> float:
+    value = bitrate.strip().lower()
+    if value.endswith("k"):
+        return float(value[:-1]) * 1000
+    return float(value)
+
+
+def _transcribe_chunked(audio_path: str, language: Optional[str]) -> Dict[str, Any]:
+    """
+    Pre-process the recording (mono, 16 kHz, compressed) and transcribe it, as silence-aligned
+    chunks in parallel when it is long. A chunk whose request fails transiently is retried by
+    itself; only a chunk that keeps failing fails the whole transcription. Every segment is offset by its chunk start (and any
+    trimmed leading silence) so times are relative to the original recording.
+    """
+    from pydub import AudioSegment
+    from pydub.silence import detect_nonsilent
+
+    max_bytes = CONFIG.transcribe_max_upload_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory(prefix="transcribe_") as tmp:
+        if CONFIG.transcribe_preprocess:
+            prepared = prepare_for_transcription(
+                audio_path, tmp, trim_silence=CONFIG.transcribe_trim_silence, bitrate=CONFIG.transcribe_bitrate
+            )
+            pcm_path, upload_path, upload_bytes = prepared.pcm_path, prepared.path, prepared.prepared_bytes
+            base_offset = prepared.offset_sec
+            bytes_per_ms = _bitrate_bps(CONFIG.transcribe_bitrate) / 8000
+        else:
+            pcm_path = os.path.join(tmp, "audio.wav")
+            decode_to_pcm(audio_path, pcm_path)
+            upload_path, upload_bytes, base_offset = audio_path, os.path.getsize(audio_path), 0.0
+            bytes_per_ms = 32.0  # chunks are 16 kHz mono 16-bit PCM
+        # Keep each chunk under the upload limit as well as the latency-driven chunk length
+        max_chunk_ms = int(min(CONFIG.transcribe_chunk_seconds * 1000, (max_bytes - 1024) / bytes_per_ms))
+
+        audio = AudioSegment.from_wav(pcm_path)
+        if len(audio) <= max_chunk_ms and upload_bytes <= max_bytes:
+            chunks = [(0, len(audio))]
+            paths = [upload_path]
+        else:
+            nonsilent = detect_nonsilent(
+                audio, min_silence_len=400, silence_thresh=audio.dBFS - 16, seek_step=_SILENCE_SEEK_MS
+            )
+            chunks = _plan_chunks([(a, b) for a, b in nonsilent], len(audio), max_chunk_ms)
+            paths = []
+            for i, (start, end) in enumerate(chunks):
+                if CONFIG.transcribe_preprocess:
+                    path = os.path.join(tmp, f"chunk_{i:03d}.mp3")
+                    compress(pcm_path, path, CONFIG.transcribe_bitrate, start / 1000.0, end / 1000.0)
+                else:
+                    path = os.path.join(tmp, f"chunk_{i:03d}.wav")
+                    decode_to_pcm(pcm_path, path, start / 1000.0, end / 1000.0)
+                paths.append(path)
+            logger.info("Transcribing %d chunks of up to %.0fs", len(chunks), max_chunk_ms / 1000)
+
+        workers = max(1, min(CONFIG.transcribe_workers, len(paths)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda p: _transcribe_chunk(p, language), paths))
+
+    texts: List[str] = []
+    segments: List[Dict[str, Any]] = []
+    for (start, end), result in zip(chunks, results):
+        offset = base_offset + start / 1000.0
+        text = (result.get("transcript") or "").strip()
+        if text:
+            texts.append(text)
+        chunk_segments = result.get("segments") or []
+        if not chunk_segments and text:
+            chunk_segments = [{"start": 0.0, "end": (end - start) / 1000.0, "text": text}]
+        for seg in chunk_segments:
+            segments.append(
+                {"start": seg["start"] + offset, "end": seg["end"] + offset, "text": seg.get("text", "")}
+            )
+    return {"transcript": " ".join(texts), "segments": segments}
+
+
+@lru_cache(maxsize=1)
+def _transcript_cache() -> SQLiteCache:
+    return SQLiteCache(
+        CONFIG.transcript_cache_path,
+        ttl_seconds=CONFIG.transcript_cache_ttl_hours * 3600,
+        max_bytes=CONFIG.transcript_cache_max_mb * 1024 * 1024,
+    )
+
+
+def transcribe_audio(audio_path: str, language: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
     """
     Transcribe audio using OpenAI Whisper API if available, else local fallback.
 
+    Recordings longer than CONFIG.transcribe_chunk_seconds (or larger than the upload limit) are
+    split on silence and the chunks transcribed in parallel; segment times are global.
+    Whisper results are cached keyed on a hash of the audio bytes, language and model, so
+    re-transcribing the same file is free; use_cache=False forces a new request.
+
     Returns a dict: { "transcript": str, "segments": [{start, end, text}, ...] }
     """
     if not os.path.exists(audio_path):
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-    if CONFIG.openai_api_key:
+    with span("transcribe", provider="openai" if CONFIG.openai_api_key else "fallback") as s:
+        if not CONFIG.openai_api_key:
+            logger.info("OPENAI_API_KEY not set, using fallback transcription")
+            return _fallback_transcription(audio_path)
         try:
-            from openai import OpenAI  # type: ignore
-
-            client = OpenAI(api_key=CONFIG.openai_api_key)
-            with open(audio_path, "rb") as f:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=f,
-                    response_format="verbose_json",
-                    language=language,
-                )
-            data = json.loads(transcript.model_dump_json()) if hasattr(transcript, "model_dump_json") else transcript  # type: ignore
-            text = data.get("text") or data.get("transcript") or ""
-            segs = data.get("segments") or []
-            segments: List[Dict[str, Any]] = []
-            for s in segs:
-                segments.append(
-                    {
-                        "start": float(s.get("start", 0.0)),
-                        "end": float(s.get("end", 0.0)),
-                        "text": s.get("text", ""),
-                    }
-                )
+            cache = _transcript_cache()
+            key = make_key(
+                audio_sha256=file_digest(audio_path),
+                language=language or "auto",
+                model=_MODEL,
+                version=_TRANSCRIBE_VERSION,
+            )
+            if use_cache:
+                cached = cache.get(key)
+                s.cache(cached is not None)
+                if cached is not None:
+                    logger.info("Using cached transcription")
+                    return cached
+            with s.provider_call():
+                result = _transcribe_chunked(audio_path, language)
+            text = result["transcript"]
+            segments = result["segments"]
             if not segments:
                 segments = [{"start": 0.0, "end": max(1.0, float(len(text.split()) / 2.0)), "text": text}]
-            return {"transcript": text, "segments": segments}
+            result = {"transcript": text, "segments": segments}
+            cache.put(key, result)
+            return result
         except Exception as e:
             logger.warning("OpenAI Whisper failed, using fallback: %s", e)
             return _fallback_transcription(audio_path)
-    else:
-        logger.info("OPENAI_API_KEY not set, using fallback transcription")
-        return _fallback_transcription(audio_path)
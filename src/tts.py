@@ -1,14 +1,30 @@
 from __future__ import annotations
 
 import os
+import threading
 import wave
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_exponential
+
+from .cache import FileCache, make_key
 from .config import CONFIG
+from .ffmpeg_utils import run_ffmpeg
 from .logging_utils import setup_logger
+from .metrics import Span, bind, span
+from .probe import duration as media_duration
+from .workspace import RunWorkspace, work_dir_for
 
 logger = setup_logger(__name__)
 
+_ELEVEN_MODEL_ID = "eleven_multilingual_v2"
+_ELEVEN_VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.5}
+# Provider audio is decoded to 16-bit mono PCM at this rate
+_TARGET_RATE = 44100
+_CHUNK_BYTES = 64 * 1024
+
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -25,54 +41,193 @@ def _fallback_beep(out_path: str, seconds: float = 1.0, samplerate: int = 16000)
         wf.writeframes(b"\x00\x00" * frames)
 
 
-def synthesize_speech(script: List[Dict[str, Any]], voice: str, speed: float = 1.0) -> List[str]:
-    outputs: List[str] = []
-
+_provider_locks: Dict[str, threading.BoundedSemaphore] = {}
+_provider_locks_guard = threading.Lock()
+
+
+def _provider_slot(provider: str) -> threading.BoundedSemaphore:
+    """Process-wide semaphore capping in-flight requests per provider."""
+    limits = {"elevenlabs": CONFIG.elevenlabs_max_concurrency, "openai": CONFIG.openai_tts_max_concurrency}
+    with _provider_locks_guard:
+        if provider not in _provider_locks:
+            _provider_locks[provider] = threading.BoundedSemaphore(max(1, limits.get(provider, 1)))
+        return _provider_locks[provider]
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    import requests  # type: ignore
+
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def _with_retries(fn: Callable[[], Any]) -> Any:
+    retrying = Retrying(
+        stop=stop_after_attempt(max(1, CONFIG.retry_max_attempts)),
+        wait=wait_exponential(multiplier=CONFIG.retry_backoff_seconds, max=60),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True,
+    )
+    return retrying(fn)
+
+
+@lru_cache(maxsize=1)
+def _tts_cache() -> FileCache:
+    return FileCache(CONFIG.tts_cache_dir, CONFIG.tts_cache_max_mb * 1024 * 1024, suffix=".wav")
+
+
+def _tts_key(provider: str, model_id: str, text: str, voice: str, speed: float) -> str:
+    return make_key(
+        provider=provider,
+        model_id=model_id,
+        text=text,
+        voice=voice,
+        speed=float(speed),
+        settings=_ELEVEN_VOICE_SETTINGS if provider == "elevenlabs" else None,
+        pcm=f"s16le/{_TARGET_RATE}/mono",
+    )
+
+
+def _decode_to_wav(src: str, out_path: str, speed: float) -> None:
+    """Decode provider audio once into the pipeline's PCM format, applying speed as a tempo change."""
+    args = ["-i", src, "-vn", "-ac", "1", "-ar", str(_TARGET_RATE), "-sample_fmt", "s16"]
+    if abs(speed - 1.0) > 1e-3:
+        args += ["-filter:a", f"atempo={min(2.0, max(0.5, speed)):.3f}"]
+    tmp = out_path + ".part.wav"
+    try:
+        run_ffmpeg(args + ["-f", "wav", tmp])
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _elevenlabs_request(text: str, voice: str, speed: float, out_path: str) -> None:
+    import requests  # type: ignore
+
+    url = f"{CONFIG.elevenlabs_api_base.rstrip('/')}/v1/text-to-speech/{voice or 'Rachel'}"
+    headers = {
+        "xi-api-key": CONFIG.elevenlabs_api_key or "",
+        "accept": "audio/mpeg",
+        "content-type": "application/json",
+    }
+    payload = {
+        "text": text or " ",
+        "voice_settings": _ELEVEN_VOICE_SETTINGS,
+        "model_id": _ELEVEN_MODEL_ID,
+    }
+    mp3_path = out_path + ".part.mp3"
+    try:
+        with _provider_slot("elevenlabs"):
+            with requests.post(
+                url, headers=headers, json=payload, timeout=CONFIG.http_timeout_seconds, stream=True
+            ) as resp:
+                resp.raise_for_status()
+                # Stream to disk so memory stays flat regardless of scene length
+                with open(mp3_path, "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=_CHUNK_BYTES):
+                        if chunk:
+                            f.write(chunk)
+        _decode_to_wav(mp3_path, out_path, speed)
+    finally:
+        if os.path.exists(mp3_path):
+            os.remove(mp3_path)
+
+
+def _synthesize_to(out_path: str, text: str, voice: str, speed: float, s: Span) -> str:
+    """Write text's voice-over to out_path with the first provider that works; returns its name."""
     use_openai = bool(CONFIG.openai_api_key and CONFIG.openai_tts_voice)
     use_eleven = bool(CONFIG.elevenlabs_api_key)
 
-    for idx, scene in enumerate(script, start=1):
-        text = str(scene.get("script_text", ""))
-        out_path = os.path.join("outputs", "audio", f"scene_{idx:02d}.wav")
-        _ensure_dir(out_path)
-
-        if use_eleven:
-            try:
-                import requests  # type: ignore
-
-                url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice or 'Rachel'}"
-                headers = {
-                    "xi-api-key": CONFIG.elevenlabs_api_key or "",
-                    "accept": "audio/mpeg",
-                    "content-type": "application/json",
-                }
-                payload = {
-                    "text": text or " ",
-                    "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
-                    "model_id": "eleven_multilingual_v2",
-                }
-                resp = requests.post(url, headers=headers, json=payload, timeout=CONFIG.http_timeout_seconds)
-                resp.raise_for_status()
-                # If MP3 returned, we still save WAV placeholder to keep assembler simple
-                _fallback_beep(out_path, seconds=max(1.0, len(text.split()) / 2.5))
-                outputs.append(out_path)
-                continue
-            except Exception as e:
-                logger.warning("ElevenLabs TTS failed, trying other providers: %s", e)
-
-        if use_openai:
-            try:
-                from openai import OpenAI  # type: ignore
-
-                client = OpenAI(api_key=CONFIG.openai_api_key)
-                # Use placeholder silent WAV to avoid decoding complexities in this demo
-                _fallback_beep(out_path, seconds=max(1.0, len(text.split()) / 2.5))
-                outputs.append(out_path)
-                continue
-            except Exception as e:
-                logger.warning("OpenAI TTS failed, falling back locally: %s", e)
-
-        _fallback_beep(out_path, seconds=max(1.0, len(text.split()) / 2.5))
-        outputs.append(out_path)
-
+    # A previous run may have left a hard link into the TTS cache here; never write through it
+    if os.path.exists(out_path):
+        os.remove(out_path)
+
+    if use_eleven:
+        cache = _tts_cache()
+        key = _tts_key("elevenlabs", _ELEVEN_MODEL_ID, text, voice, speed)
+        hit = cache.fetch(key, out_path)
+        s.cache(hit)
+        if hit:
+            return "elevenlabs"
+        try:
+            with s.provider_call():
+                _with_retries(lambda: _elevenlabs_request(text, voice, speed, out_path))
+            cache.put(key, out_path)
+            return "elevenlabs"
+        except Exception as e:
+            logger.warning("ElevenLabs TTS failed, trying other providers: %s", e)
+
+    if use_openai:
+        try:
+            from openai import OpenAI  # type: ignore
+
+            client = OpenAI(api_key=CONFIG.openai_api_key)
+            # Use placeholder silent WAV to avoid decoding complexities in this demo
+            _fallback_beep(out_path, seconds=max(1.0, len(text.split()) / 2.5))
+            return "openai"
+        except Exception as e:
+            logger.warning("OpenAI TTS failed, falling back locally: %s", e)
+
+    _fallback_beep(out_path, seconds=max(1.0, len(text.split()) / 2.5))
+    return "fallback"
+
+
+def synthesize_scene(
+    idx: int, scene: Dict[str, Any], voice: str, speed: float = 1.0, work_dir: str = "outputs"
+) -> Tuple[str, float]:
+    """Synthesize one scene (1-based idx) to <work_dir>/audio/scene_XX.wav and return (path, duration_sec)."""
+    text = str(scene.get("script_text", ""))
+    out_path = os.path.join(work_dir, "audio", f"scene_{idx:02d}.wav")
+    _ensure_dir(out_path)
+    with span("tts", scene=idx) as s:
+        s.labels["provider"] = _synthesize_to(out_path, text, voice, speed, s)
+        s.add_output(out_path)
+        return out_path, media_duration(out_path)
+
+
+def synthesize_speech_clips(
+    script: List[Dict[str, Any]],
+    voice: str,
+    speed: float = 1.0,
+    workers: Optional[int] = None,
+    workspace: Optional[RunWorkspace] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Synthesize one WAV per scene (<workspace>/audio/scene_XX.wav, or outputs/audio without a
+    workspace) and return (path, duration_sec) pairs in scene order. Durations are read from
+    the WAV header, so callers need not re-probe.
+
+    Scenes are synthesized on a thread pool of `workers` threads (default CONFIG.tts_workers);
+    in-flight requests per provider are further capped by CONFIG.*_max_concurrency. Transient
+    provider errors (timeouts, 429, 5xx) are retried with exponential backoff. Provider audio is
+    streamed to disk and decoded once to 16-bit mono PCM. It is cached on disk by
+    (text, voice, speed, provider, model_id), so re-runs only pay for changed scenes.
+    """
+    n_workers = max(1, min(CONFIG.tts_workers if workers is None else workers, len(script) or 1))
+    jobs = list(enumerate(script, start=1))
+    work_dir = work_dir_for(workspace)
+    if n_workers == 1:
+        outputs = [synthesize_scene(idx, scene, voice, speed, work_dir) for idx, scene in jobs]
+    else:
+        synthesize = bind(lambda job: synthesize_scene(job[0], job[1], voice, speed, work_dir))
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            outputs = list(pool.map(synthesize, jobs))
+    cache = _tts_cache()
+    if cache.enabled and (cache.stats["hits"] or cache.stats["misses"]):
+        logger.info("TTS cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions", cache.stats)
     return outputs
+
+
+def synthesize_speech(
+    script: List[Dict[str, Any]],
+    voice: str,
+    speed: float = 1.0,
+    workers: Optional[int] = None,
+    workspace: Optional[RunWorkspace] = None,
+) -> List[str]:
+    """Synthesize one WAV per scene and return the paths in scene order (see synthesize_speech_clips)."""
+    return [path for path, _duration in synthesize_speech_clips(script, voice, speed, workers, workspace)]
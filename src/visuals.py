@@ -1,43 +1,55 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 from moviepy.editor import ImageClip
 
+from .ai_jobs import generate_ai_clips
+from .backgrounds import PALETTES, render_background
+from .cache import FileCache, make_key
 from .config import CONFIG
+from .encoding import DEFAULT_PROFILE, PREVIEW_PROFILE, EncodingProfile
+from .ffmpeg_utils import run_ffmpeg
 from .logging_utils import setup_logger
+from .metrics import Span, current_run, recording, span
+from .workspace import RunWorkspace, work_dir_for
 
 logger = setup_logger(__name__)
 
+_FADE_SECONDS = 0.5
+# Bump when slide rendering changes so stale cached clips are not reused
+_RENDER_VERSION = 2
+
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
 
-def _text_to_slide(text: str, width: int = 1920, height: int = 1080) -> Image.Image:
-    # Professional gradient background
-    bg = Image.new("RGB", (width, height), color=(0, 0, 0))
-    draw = ImageDraw.Draw(bg)
-    
-    # Create gradient effect
-    for y in range(height):
-        color_ratio = y / height
-        r = int(20 + (50 - 20) * color_ratio)
-        g = int(30 + (60 - 30) * color_ratio)
-        b = int(40 + (80 - 40) * color_ratio)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-    
-    # Professional typography
+@lru_cache(maxsize=4)
+def _slide_fonts(scale: float = 1.0) -> Tuple[ImageFont.ImageFont, ImageFont.ImageFont]:
     try:
-        title_font = ImageFont.truetype("arial.ttf", 72)
-        subtitle_font = ImageFont.truetype("arial.ttf", 48)
+        return ImageFont.truetype("arial.ttf", round(72 * scale)), ImageFont.truetype("arial.ttf", round(48 * scale))
     except Exception:
-        title_font = ImageFont.load_default()
-        subtitle_font = ImageFont.load_default()
+        return ImageFont.load_default(), ImageFont.load_default()
+
+
+def _text_to_slide(text: str, width: int = 1920, height: int = 1080, palette: str = "default") -> Image.Image:
+    # Professional gradient background (built once per size/palette, then copied)
+    bg = render_background(width, height, palette)
+    draw = ImageDraw.Draw(bg)
+    
+    # Professional typography, laid out for 1080p and scaled to the frame height
+    scale = height / 1080
+    title_font, subtitle_font = _slide_fonts(scale)
+    title_line, subtitle_line = round(90 * scale), round(60 * scale)
     
-    margin = 100
+    margin = round(100 * scale)
     words = text.split()
     
     # Split into title and subtitle if possible
@@ -63,17 +75,17 @@ def _text_to_slide(text: str, width: int = 1920, height: int = 1080) -> Image.Im
         title_wrapped.append(line)
     
     # Center title
-    title_height = len(title_wrapped) * 90
+    title_height = len(title_wrapped) * title_line
     y_start = (height - title_height) // 2
     if subtitle:
-        y_start -= 40
+        y_start -= round(40 * scale)
     
     for l in title_wrapped:
         bbox = draw.textbbox((0, 0), l, font=title_font)
         text_width = bbox[2] - bbox[0]
         x = (width - text_width) // 2
         draw.text((x, y_start), l, font=title_font, fill=(255, 255, 255))
-        y_start += 90
+        y_start += title_line
     
     # Draw subtitle if exists
     if subtitle:
@@ -94,131 +106,335 @@ def _text_to_slide(text: str, width: int = 1920, height: int = 1080) -> Image.Im
             text_width = bbox[2] - bbox[0]
             x = (width - text_width) // 2
             draw.text((x, y_start), l, font=subtitle_font, fill=(200, 200, 200))
-            y_start += 60
+            y_start += subtitle_line
     
     return bg
 
 
-def _generate_with_runway_api(prompt: str, duration: int) -> str:
+def _encode_still(
+    img_path: str,
+    clip_path: str,
+    duration: float,
+    fade_in: bool,
+    fade_out: bool,
+    threads: int = 0,
+    profile: EncodingProfile = DEFAULT_PROFILE,
+) -> None:
     """
-    Generate video using RunwayML API (free tier available)
+    Encode a single still image into a clip in one ffmpeg call: the image is read once and cloned,
+    x264 is tuned for still content and fades are applied as filters instead of per-frame in Python.
     """
-    try:
-        import requests
-        
-        # RunwayML API endpoint
-        url = "https://api.runwayml.com/v1/image_to_video"
-        headers = {
-            "Authorization": f"Bearer {CONFIG.runway_api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "text_prompt": prompt,
-            "duration": duration,
-            "resolution": "1280x720"
-        }
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=120)
-        if response.status_code == 200:
-            video_url = response.json().get("video_url")
-            # Download and save video
-            video_response = requests.get(video_url)
-            output_path = os.path.join("outputs", "visuals", f"runway_scene.mp4")
-            _ensure_dir(output_path)
-            with open(output_path, "wb") as f:
-                f.write(video_response.content)
-            return output_path
-    except Exception as e:
-        logger.warning("RunwayML API failed: %s", e)
-    return None
-
-
-def _generate_with_pika_api(prompt: str, duration: int) -> str:
+    # Convert to yuv420p once, then clone that frame instead of re-decoding the image per frame
+    filters = ["format=yuv420p", f"tpad=stop_mode=clone:stop_duration={duration:.3f}"]
+    if fade_in:
+        filters.append(f"fade=t=in:st=0:d={_FADE_SECONDS}")
+    if fade_out:
+        filters.append(f"fade=t=out:st={max(0.0, duration - _FADE_SECONDS):.3f}:d={_FADE_SECONDS}")
+    run_ffmpeg(
+        [
+            "-framerate", str(profile.fps),
+            "-i", img_path,
+            "-vf", ",".join(filters),
+            "-t", f"{duration:.3f}",
+            "-c:v", "libx264",
+            "-tune", "stillimage",
+            *profile.x264_args(still=True),
+            "-threads", str(threads),
+            "-pix_fmt", "yuv420p",
+            "-r", str(profile.fps),
+            "-an",
+            "-movflags", "+faststart",
+            clip_path,
+        ]
+    )
+
+
+def _encode_still_moviepy(
+    img_path: str,
+    clip_path: str,
+    duration: float,
+    fade_in: bool,
+    fade_out: bool,
+    threads: int = 0,
+    profile: EncodingProfile = DEFAULT_PROFILE,
+) -> None:
+    clip = ImageClip(img_path).set_duration(duration)
+    if fade_in:
+        clip = clip.fadein(_FADE_SECONDS)
+    if fade_out:
+        clip = clip.fadeout(_FADE_SECONDS)
+    clip.write_videofile(
+        clip_path,
+        fps=profile.fps,
+        codec="libx264",
+        audio=False,
+        verbose=False,
+        logger=None,
+        threads=threads or None,
+        ffmpeg_params=profile.x264_args(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _render_cache() -> FileCache:
+    return FileCache(CONFIG.render_cache_dir, CONFIG.render_cache_max_mb * 1024 * 1024, suffix=".mp4")
+
+
+def _scene_duration(scene: Dict[str, Any]) -> int:
+    return max(1, int(scene.get("duration_sec", 5)))
+
+
+def _scene_text(scene: Dict[str, Any]) -> str:
+    return str(scene.get("on_screen_text") or scene.get("script_text") or "Scene")
+
+
+def _slide_palette(style: str) -> str:
+    """Slide background for a visual style: the palette named after it, else the default one."""
+    name = (style or "").strip().lower()
+    return name if name in PALETTES else "default"
+
+
+def _render_inputs(
+    idx: int, scene: Dict[str, Any], total: int, profile: EncodingProfile, style: str
+) -> Dict[str, Any]:
+    # Only what the slide renderer actually uses: styles without a palette of their own look
+    # the same, so they share cache entries
+    return {
+        "kind": "slide",
+        "version": _RENDER_VERSION,
+        "text": _scene_text(scene),
+        "duration": _scene_duration(scene),
+        "palette": _slide_palette(style),
+        "width": profile.width,
+        "height": profile.height,
+        "fade_in": idx == 1,
+        "fade_out": idx == total,
+        "fps": profile.fps,
+        "encoder": profile.x264_args(still=True),
+    }
+
+
+def scene_render_inputs(
+    idx: int, scene: Dict[str, Any], total: int, style: str = "", profile: Optional[EncodingProfile] = None
+) -> Dict[str, Any]:
+    """Everything that determines a scene's slide clip; hash it to detect scenes that need re-rendering."""
+    return _render_inputs(idx, scene, total, profile or DEFAULT_PROFILE, style)
+
+
+def _render_scene(
+    idx: int,
+    scene: Dict[str, Any],
+    total: int,
+    profile: EncodingProfile = DEFAULT_PROFILE,
+    style: str = "",
+    threads: int = 0,
+    work_dir: str = "outputs",
+) -> Tuple[str, bool]:
     """
-    Generate video using Pika Labs API (free tier available)
+    Render one storyboard scene to <work_dir>/visuals/scene_XX.mp4. Top-level so it can run in a
+    worker process. Returns the clip path and whether the render cache was hit.
     """
-    try:
-        import requests
-        
-        # Pika Labs API endpoint
-        url = "https://api.pika.art/v1/generate"
-        headers = {
-            "Authorization": f"Bearer {CONFIG.pika_api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "prompt": prompt,
-            "duration": duration,
-            "aspect_ratio": "16:9"
-        }
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=120)
-        if response.status_code == 200:
-            video_url = response.json().get("video_url")
-            # Download and save video
-            video_response = requests.get(video_url)
-            output_path = os.path.join("outputs", "visuals", f"pika_scene.mp4")
-            _ensure_dir(output_path)
-            with open(output_path, "wb") as f:
-                f.write(video_response.content)
-            return output_path
-    except Exception as e:
-        logger.warning("Pika Labs API failed: %s", e)
-    return None
-
-
-def generate_visuals(storyboard: List[Dict[str, Any]], style: str) -> List[str]:
+    duration = _scene_duration(scene)
+    text = _scene_text(scene)
+    clip_path = os.path.join(work_dir, "visuals", f"scene_{idx:02d}.mp4")
+    # Add fade in/out effects for professional look
+    fade_in = idx == 1  # First scene - fade in
+    fade_out = idx == total  # Last scene - fade out
+
+    cache = _render_cache()
+    key = make_key(**_render_inputs(idx, scene, total, profile, style))
+    with span("render", scene=idx) as s:
+        hit = cache.fetch(key, clip_path)
+        s.cache(hit)
+        if not hit:
+            img = _text_to_slide(text, profile.width, profile.height, _slide_palette(style))
+            img_path = os.path.join(work_dir, "visuals", f"scene_{idx:02d}.png")
+            _ensure_dir(img_path)
+            img.save(img_path, compress_level=1)
+            # A previous run may have left a hard link into the cache here; never encode through it
+            if os.path.exists(clip_path):
+                os.remove(clip_path)
+
+            try:
+                _encode_still(img_path, clip_path, duration, fade_in, fade_out, threads, profile)
+            except Exception as e:
+                logger.warning("Still-image encode failed, falling back to moviepy: %s", e)
+                _encode_still_moviepy(img_path, clip_path, duration, fade_in, fade_out, threads, profile)
+            else:
+                # The key records the still-image encoder settings; fallback output is not cached
+                cache.put(key, clip_path)
+        s.add_output(clip_path)
+    return clip_path, hit
+
+
+def _render_plain_slide(idx: int, scene: Dict[str, Any], profile: EncodingProfile, work_dir: str) -> str:
+    """
+    Last resort for a scene whose slide failed to render: a clip of the same length in the default
+    background colour, without text, straight from ffmpeg's colour source. Never cached.
+    """
+    clip_path = os.path.join(work_dir, "visuals", f"scene_{idx:02d}.mp4")
+    _ensure_dir(clip_path)
+    if os.path.exists(clip_path):
+        os.remove(clip_path)
+    color = "0x%02x%02x%02x" % PALETTES["default"][0]
+    run_ffmpeg(
+        [
+            "-f", "lavfi",
+            "-i", f"color=c={color}:s={profile.width}x{profile.height}:r={profile.fps}",
+            "-t", f"{_scene_duration(scene):.3f}",
+            "-c:v", "libx264",
+            *profile.x264_args(still=True),
+            "-pix_fmt", "yuv420p",
+            "-an",
+            "-movflags", "+faststart",
+            clip_path,
+        ]
+    )
+    return clip_path
+
+
+def _render_scene_recorded(*args: Any) -> Tuple[str, bool, List[Span]]:
+    """_render_scene for worker processes: also returns its spans for the parent's recording."""
+    with recording() as run:
+        path, hit = _render_scene(*args)
+    return path, hit, run.spans
+
+
+def render_scene(
+    idx: int,
+    scene: Dict[str, Any],
+    total: int,
+    style: str = "",
+    threads: int = 0,
+    profile: Optional[EncodingProfile] = None,
+    work_dir: str = "outputs",
+) -> str:
+    """Render one scene's slide clip (1-based idx of total scenes) in the calling process."""
+    path, _hit = _render_scene(idx, scene, total, profile or DEFAULT_PROFILE, style, threads, work_dir)
+    return path
+
+
+def ai_clips_enabled() -> bool:
+    return bool(CONFIG.runway_api_key or CONFIG.pika_api_key)
+
+
+def request_ai_clips(
+    storyboard: List[Dict[str, Any]],
+    indices: Optional[Iterable[int]] = None,
+    work_dir: str = "outputs",
+    on_result: Optional[Callable[[int, Optional[str]], None]] = None,
+) -> Dict[int, str]:
+    """
+    Request AI clips concurrently for every scene (or only the given 1-based indices) and return
+    {scene index: clip path} for the scenes that succeeded. Empty when no AI provider is configured.
+    on_result(index, path or None) reports each scene as soon as its own job is settled.
+    """
+    if not ai_clips_enabled():
+        return {}
+    wanted = set(range(1, len(storyboard) + 1) if indices is None else indices)
+    if not wanted:
+        return {}
+    # AI clips get per-run paths so scenes and concurrent jobs never overwrite each other
+    ai_dir = os.path.join(work_dir, "visuals", f"ai_{uuid.uuid4().hex[:12]}")
+    jobs = [
+        (idx, _scene_text(scene), _scene_duration(scene))
+        for idx, scene in enumerate(storyboard, start=1)
+        if idx in wanted
+    ]
+    with span("ai_clips", scenes=len(jobs)) as s, s.provider_call():
+        return generate_ai_clips(jobs, ai_dir, on_result=on_result)
+
+
+def _resolve_workers(workers: Optional[int], n_scenes: int) -> int:
+    configured = CONFIG.render_workers if workers is None else workers
+    if configured <= 0:
+        configured = os.cpu_count() or 1
+    return max(1, min(configured, n_scenes))
+
+
+def generate_visuals(
+    storyboard: List[Dict[str, Any]],
+    style: str,
+    workers: Optional[int] = None,
+    profile: Optional[EncodingProfile] = None,
+    draft: bool = False,
+    workspace: Optional[RunWorkspace] = None,
+) -> List[str]:
     """
     For each scene, create a short clip. Try AI APIs first, then fallback to professional slides.
+
+    AI clips for all scenes are requested concurrently through src.ai_jobs; any scene whose job
+    fails or misses its deadline falls back to a slide. Slides are rendered on a process pool of
+    `workers` processes (default CONFIG.render_workers, 0 = one per CPU). Outputs are returned in
+    storyboard order. A scene that fails in a worker is retried in-process, and one that fails
+    there too gets a plain background clip of the same length, so the other scenes' results are
+    kept; the call only raises if even that fails, once every other scene has finished.
+    Slide clips are reused from the on-disk render cache (CONFIG.render_cache_dir) when every
+    input that affects the encode is unchanged. Resolution, frame rate and x264 settings come
+    from `profile` (default 1080p30, final tier). Clips are written to <workspace>/visuals
+    (outputs/visuals without a workspace).
+
+    draft=True renders a low-resolution slide-only proxy (PREVIEW_PROFILE unless a profile is
+    given, no AI clips) into the workspace's preview tree (CONFIG.preview_dir without one),
+    leaving full-quality outputs untouched.
     """
-    outputs: List[str] = []
-    width, height = 1920, 1080
+    profile = profile or (PREVIEW_PROFILE if draft else DEFAULT_PROFILE)
+    work_dir = work_dir_for(workspace, draft)
+    total = len(storyboard)
+    n_workers = _resolve_workers(workers, total)
+    cache = _render_cache()
+    outputs: List[Optional[str]] = [None] * total
 
-    for idx, scene in enumerate(storyboard, start=1):
-        duration = max(1, int(scene.get("duration_sec", 5)))
-        text = str(scene.get("on_screen_text") or scene.get("script_text") or "Scene")
-        
-        # Try AI video generation APIs in order of preference
-        ai_output = None
-        
-        # Try RunwayML first (most reliable)
-        if CONFIG.runway_api_key:
-            runway_prompt = f"Cinematic video: {text}. Professional quality, smooth motion."
-            ai_output = _generate_with_runway_api(runway_prompt, duration)
-        
-        # Try Pika Labs if RunwayML fails
-        if not ai_output and CONFIG.pika_api_key:
-            pika_prompt = f"Professional video scene: {text}. High quality, cinematic style."
-            ai_output = _generate_with_pika_api(pika_prompt, duration)
-        
-        if ai_output:
-            outputs.append(ai_output)
+    # Try AI video generation first: every scene is submitted up front and polled concurrently
+    if not draft:
+        for idx, path in request_ai_clips(storyboard, work_dir=work_dir).items():
+            outputs[idx - 1] = path
+
+    # Fallback to professional slides for every scene without an AI clip
+    pending = [idx for idx in range(1, total + 1) if outputs[idx - 1] is None]
+    n_workers = min(n_workers, max(1, len(pending)))
+    if n_workers > 1:
+        # Split cores between concurrent encodes instead of letting every x264 instance claim all of them
+        threads = max(1, (os.cpu_count() or 1) // n_workers)
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = {
+                    pool.submit(
+                        _render_scene_recorded, idx, storyboard[idx - 1], total, profile, style, threads, work_dir
+                    ): idx
+                    for idx in pending
+                }
+                for fut in as_completed(futures):
+                    idx = futures[fut]
+                    try:
+                        path, hit, spans = fut.result()
+                    except Exception as e:
+                        logger.warning("Scene %d failed in worker, retrying in-process: %s", idx, e)
+                        continue
+                    outputs[idx - 1] = path
+                    run = current_run()
+                    if run is not None:
+                        run.merge(spans)
+                    if cache.enabled:
+                        # Lookups made in worker processes are not visible to this instance
+                        cache.record(hit)
+        except BrokenProcessPool as e:
+            logger.warning("Render pool unavailable, rendering remaining scenes serially: %s", e)
+
+    errors: List[str] = []
+    for idx in range(1, total + 1):
+        if outputs[idx - 1] is not None:
             continue
-        
-        # Fallback to professional slides (always works)
-        img = _text_to_slide(text, width, height)
-        img_path = os.path.join("outputs", "visuals", f"scene_{idx:02d}.png")
-        _ensure_dir(img_path)
-        img.save(img_path)
-        clip_path = os.path.join("outputs", "visuals", f"scene_{idx:02d}.mp4")
-        
-        # Create professional video with transitions
-        clip = ImageClip(img_path).set_duration(duration)
-        
-        # Add fade in/out effects for professional look
-        if idx == 1:  # First scene - fade in
-            clip = clip.fadein(0.5)
-        if idx == len(storyboard):  # Last scene - fade out
-            clip = clip.fadeout(0.5)
-        
-        clip.write_videofile(
-            clip_path, 
-            fps=30,  # Higher FPS for smoothness
-            codec="libx264", 
-            audio=False, 
-            verbose=False, 
-            logger=None,
-            ffmpeg_params=["-preset", "fast", "-crf", "18"]  # High quality encoding
-        )
-        outputs.append(clip_path)
-    return outputs
+        try:
+            outputs[idx - 1], _hit = _render_scene(idx, storyboard[idx - 1], total, profile, style, 0, work_dir)
+        except Exception as e:
+            logger.error("Scene %d failed to render, using a plain slide: %s", idx, e)
+            try:
+                outputs[idx - 1] = _render_plain_slide(idx, storyboard[idx - 1], profile, work_dir)
+            except Exception as plain_error:
+                errors.append(f"scene {idx}: {e}; plain slide: {plain_error}")
+    if errors:
+        raise RuntimeError("Failed to render " + "; ".join(errors))
+    if cache.enabled:
+        logger.info("Render cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions", cache.stats)
+    return [p for p in outputs if p is not None]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import CONFIG
+
+
+def new_run_id() -> str:
+    """Unique id that sorts by creation time: UTC timestamp plus a random suffix."""
+    return time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:8]
+
+
+@dataclass(frozen=True)
+class RunWorkspace:
+    """
+    Private directory tree for one render run, so concurrent runs never share a file:
+
+        <root>/audio/     scene voice-overs
+        <root>/visuals/   scene clips and slides
+        <root>/segments/  muxed scene segments
+        <root>/final/     deliverables (video, subtitles, thumbnail)
+        <root>/tmp/       scratch files
+        <root>/preview/   the same layout for draft previews
+    """
+
+    root: str
+    run_id: str
+
+    @classmethod
+    def create(cls, base: Optional[str] = None, run_id: Optional[str] = None) -> "RunWorkspace":
+        """New workspace at <base>/<run_id> (default CONFIG.runs_dir and a fresh id)."""
+        run_id = run_id or new_run_id()
+        root = os.path.join(base or CONFIG.runs_dir, run_id)
+        os.makedirs(root, exist_ok=True)
+        return cls(root=root, run_id=run_id)
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    @property
+    def audio_dir(self) -> str:
+        return self.path("audio")
+
+    @property
+    def visuals_dir(self) -> str:
+        return self.path("visuals")
+
+    @property
+    def segments_dir(self) -> str:
+        return self.path("segments")
+
+    @property
+    def final_dir(self) -> str:
+        return self.path("final")
+
+    @property
+    def tmp_dir(self) -> str:
+        return self.path("tmp")
+
+    @property
+    def preview(self) -> "RunWorkspace":
+        return RunWorkspace(root=self.path("preview"), run_id=self.run_id)
+
+    def final_path(self, name: str = "video.mp4") -> str:
+        os.makedirs(self.final_dir, exist_ok=True)
+        return os.path.join(self.final_dir, name)
+
+    def scratch_path(self, name: str) -> str:
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return os.path.join(self.tmp_dir, name)
+
+    def clean_intermediates(self, keep_preview: bool = False) -> None:
+        """Delete everything except the deliverables in final/ (and preview/ if keep_preview)."""
+        dirs = [self.audio_dir, self.visuals_dir, self.segments_dir, self.tmp_dir]
+        if not keep_preview:
+            dirs.append(self.preview.root)
+        for path in dirs:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def work_dir_for(workspace: Optional[RunWorkspace], draft: bool = False) -> str:
+    """Root for a run's audio/visuals/segments: the workspace, or the legacy shared outputs/ tree."""
+    if workspace is None:
+        return CONFIG.preview_dir if draft else "outputs"
+    return workspace.preview.root if draft else workspace.root
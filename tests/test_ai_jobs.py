@@ -0,0 +1,167 @@
+import dataclasses
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src import ai_jobs
+
+CLIP = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 1024
+
+
+class _FakeProvider:
+    """Offline stand-in for a Runway-style API: submit returns a job id, polling completes it."""
+
+    def __init__(self, polls_until_done: int = 1, stuck_prompts=(), trickle_files=False):
+        self.polls_until_done = polls_until_done
+        self.stuck_prompts = stuck_prompts
+        self.trickle_files = trickle_files
+        self.aborted_downloads = 0
+        self.jobs = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with fake.lock:
+                    job_id = f"job{len(fake.jobs) + 1}"
+                    stuck = any(p in payload["text_prompt"] for p in fake.stuck_prompts)
+                    fake.jobs[job_id] = {"polls": 0, "stuck": stuck}
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                self._json({"id": job_id})
+
+            def do_GET(self):
+                if self.path.startswith("/files/") and fake.trickle_files:
+                    # A huge clip served slowly: only a cancelled download ends this early
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(1 << 30))
+                    self.end_headers()
+                    try:
+                        self.wfile.write(CLIP)
+                        while True:
+                            self.wfile.write(b"\x00" * 65536)
+                            time.sleep(0.1)
+                    except OSError:
+                        with fake.lock:
+                            fake.aborted_downloads += 1
+                    return
+                if self.path.startswith("/files/"):
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(CLIP)))
+                    self.end_headers()
+                    self.wfile.write(CLIP)
+                    return
+                job_id = self.path.rsplit("/", 1)[1]
+                with fake.lock:
+                    job = fake.jobs[job_id]
+                    job["polls"] += 1
+                    done = not job["stuck"] and job["polls"] >= fake.polls_until_done
+                    if done and not job.get("finished"):
+                        job["finished"] = True
+                        fake.in_flight -= 1
+                if done:
+                    self._json({"status": "SUCCEEDED", "output": [f"{fake.url}/files/{job_id}.mp4"]})
+                else:
+                    self._json({"status": "RUNNING"})
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def provider(self, max_concurrency: int = 2) -> ai_jobs.Provider:
+        return ai_jobs.Provider(
+            name="fake",
+            api_key="test",
+            submit_url=f"{self.url}/v1/image_to_video",
+            status_url=f"{self.url}/v1/tasks/{{id}}",
+            max_concurrency=max_concurrency,
+            min_interval=0.0,
+            build_payload=ai_jobs._runway_payload,
+        )
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _fast_polling(monkeypatch):
+    monkeypatch.setattr(ai_jobs, "CONFIG", dataclasses.replace(ai_jobs.CONFIG, ai_poll_interval_seconds=0.05))
+
+
+def test_scheduler_submits_all_scenes_within_concurrency_limit(tmp_path: Path, monkeypatch):
+    _fast_polling(monkeypatch)
+    fake = _FakeProvider(polls_until_done=2)
+    try:
+        scenes = [(i, f"Scene {i}", 5) for i in range(1, 6)]
+        settled = {}
+        clips = ai_jobs.generate_ai_clips(
+            scenes, str(tmp_path), providers=[fake.provider(max_concurrency=2)], on_result=settled.__setitem__
+        )
+    finally:
+        fake.close()
+    assert sorted(clips) == [1, 2, 3, 4, 5] and settled == clips
+    assert Path(clips[3]).name == "scene_03_fake.mp4"
+    assert Path(clips[3]).read_bytes() == CLIP
+    assert fake.max_in_flight == 2
+
+
+def test_scene_missing_deadline_is_left_for_slide_fallback(tmp_path: Path, monkeypatch):
+    _fast_polling(monkeypatch)
+    fake = _FakeProvider(stuck_prompts=("Slow",))
+    try:
+        t0 = time.perf_counter()
+        clips = ai_jobs.generate_ai_clips(
+            [(1, "Fast scene", 5), (2, "Slow scene", 5)], str(tmp_path), providers=[fake.provider()], deadline=1.0
+        )
+        elapsed = time.perf_counter() - t0
+    finally:
+        fake.close()
+    assert list(clips) == [1]
+    assert elapsed < 5
+
+
+def test_deadline_counts_from_submit_not_from_waiting_for_a_slot(tmp_path: Path, monkeypatch):
+    _fast_polling(monkeypatch)
+    fake = _FakeProvider(polls_until_done=3)
+    try:
+        # One slot: the fourth scene waits for three jobs, far longer than its own deadline
+        scenes = [(i, f"Scene {i}", 5) for i in range(1, 5)]
+        providers = [fake.provider(max_concurrency=1)]
+        clips = ai_jobs.generate_ai_clips(scenes, str(tmp_path), providers=providers, deadline=0.8)
+    finally:
+        fake.close()
+    assert sorted(clips) == [1, 2, 3, 4]
+    assert fake.max_in_flight == 1
+
+
+def test_slow_download_is_cancelled_at_the_deadline(tmp_path: Path, monkeypatch):
+    _fast_polling(monkeypatch)
+    fake = _FakeProvider(trickle_files=True)
+    try:
+        t0 = time.perf_counter()
+        clips = ai_jobs.generate_ai_clips([(1, "Scene", 5)], str(tmp_path), providers=[fake.provider()], deadline=1.0)
+        elapsed = time.perf_counter() - t0
+        for _ in range(50):
+            if fake.aborted_downloads:
+                break
+            time.sleep(0.1)
+    finally:
+        fake.close()
+    assert clips == {} and elapsed < 2.5
+    assert fake.aborted_downloads == 1
@@ -1,9 +1,28 @@
 from pathlib import Path
 import wave
 
-from moviepy.editor import ColorClip
+import pytest
+from moviepy.editor import ColorClip, VideoFileClip
 
 from src.assembler import assemble_video
+from src.encoding import EncodingProfile
+from src.probe import probe
+
+
+def _color_clip(path: Path, size=(320, 240), color=(255, 0, 0)) -> str:
+    ColorClip(size=size, color=color, duration=1).write_videofile(
+        str(path), fps=24, codec="libx264", audio=False, verbose=False, logger=None
+    )
+    return str(path)
+
+
+def _silence(path: Path, seconds: float = 1.0) -> str:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return str(path)
 
 
 def test_assemble_video(tmp_path: Path):
@@ -31,3 +50,40 @@ def test_assemble_video(tmp_path: Path):
     srt_texts = ["Hello", "World"]
     result = assemble_video([str(v1), str(v2)], [str(a1), str(a2)], srt_texts, str(out))
     assert Path(result).exists()
+
+
+def test_assemble_video_stream_copy_pads_audio(tmp_path: Path):
+    videos = [_color_clip(tmp_path / "v1.mp4"), _color_clip(tmp_path / "v2.mp4", color=(0, 0, 255))]
+    audios = [_silence(tmp_path / "a1.wav", 0.5), _silence(tmp_path / "a2.wav", 1.5)]
+    out = assemble_video(videos, audios, ["A", "B"], str(tmp_path / "out.mp4"), mode="copy")
+    with VideoFileClip(out) as clip:
+        assert clip.audio is not None
+        assert abs(clip.duration - 2.0) < 0.15
+
+
+def test_assemble_video_mixed_inputs_fall_back_to_reencode(tmp_path: Path):
+    videos = [_color_clip(tmp_path / "v1.mp4"), _color_clip(tmp_path / "v2.mp4", size=(160, 120))]
+    audios = [_silence(tmp_path / "a1.wav"), _silence(tmp_path / "a2.wav")]
+    with pytest.raises(ValueError):
+        assemble_video(videos, audios, ["A", "B"], str(tmp_path / "copy.mp4"), mode="copy")
+    out = assemble_video(videos, audios, ["A", "B"], str(tmp_path / "out.mp4"))
+    assert Path(out).exists()
+
+
+def test_assemble_video_subtitles_follow_scene_durations(tmp_path: Path):
+    videos = [_color_clip(tmp_path / "v1.mp4"), _color_clip(tmp_path / "v2.mp4", color=(0, 0, 255))]
+    audios = [_silence(tmp_path / "a1.wav", 0.5), _silence(tmp_path / "a2.wav", 1.0)]
+    out = assemble_video(videos, audios, ["A", "B"], str(tmp_path / "out.mp4"), mode="reencode")
+    vtt = Path(out).with_suffix(".vtt").read_text(encoding="utf-8")
+    assert vtt.startswith("WEBVTT")
+    assert "00:00:00.500 --> 00:00:01.500\nB" in vtt
+    assert "00:00:00,500 --> 00:00:01,500" in Path(out).with_suffix(".srt").read_text(encoding="utf-8")
+
+
+def test_reencode_scales_to_the_profile_size(tmp_path: Path):
+    videos = [_color_clip(tmp_path / "v1.mp4"), _color_clip(tmp_path / "v2.mp4", size=(160, 160))]
+    audios = [_silence(tmp_path / "a1.wav"), _silence(tmp_path / "a2.wav")]
+    profile = EncodingProfile.from_settings("720p", fps=24, tier="draft")
+    out = assemble_video(videos, audios, ["A", "B"], str(tmp_path / "out.mp4"), mode="reencode", profile=profile)
+    video = probe(out).video
+    assert video is not None and (video.width, video.height) == (1280, 720)
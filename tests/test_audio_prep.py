@@ -0,0 +1,30 @@
+import math
+import struct
+import wave
+from pathlib import Path
+
+from src.audio_prep import prepare_for_transcription
+
+
+def test_prepare_downmixes_trims_and_compresses(tmp_path: Path):
+    rate = 48000
+    silence = b"\x00\x00\x00\x00" * rate  # 1s stereo silence
+    tone = b"".join(
+        struct.pack("<hh", v, v) for v in (int(8000 * math.sin(2 * math.pi * 300 * i / rate)) for i in range(2 * rate))
+    )
+    src = tmp_path / "voice.wav"
+    with wave.open(str(src), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(silence + tone + silence)
+
+    prepared = prepare_for_transcription(str(src), str(tmp_path / "prep"), trim_silence=True)
+
+    assert Path(prepared.path).suffix == ".mp3"
+    assert prepared.prepared_bytes * 10 < prepared.original_bytes
+    assert prepared.bytes_saved == prepared.original_bytes - prepared.prepared_bytes
+    assert abs(prepared.offset_sec - 1.0) < 0.05
+    assert abs(prepared.duration_sec - 2.0) < 0.05
+    with wave.open(prepared.pcm_path, "rb") as wf:
+        assert (wf.getnchannels(), wf.getframerate()) == (1, 16000)
@@ -0,0 +1,28 @@
+from PIL import Image, ImageDraw
+
+from src.backgrounds import gradient_array, render_background
+
+
+def _legacy_gradient(width: int, height: int) -> Image.Image:
+    bg = Image.new("RGB", (width, height), color=(0, 0, 0))
+    draw = ImageDraw.Draw(bg)
+    for y in range(height):
+        color_ratio = y / height
+        r = int(20 + (50 - 20) * color_ratio)
+        g = int(30 + (60 - 30) * color_ratio)
+        b = int(40 + (80 - 40) * color_ratio)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+    return bg
+
+
+def test_gradient_matches_legacy_loop():
+    arr = gradient_array(64, 1080)
+    assert arr.shape == (1080, 64, 3)
+    assert list(Image.fromarray(arr).getdata()) == list(_legacy_gradient(64, 1080).getdata())
+
+
+def test_render_background_returns_independent_copies():
+    a = render_background(32, 24)
+    ImageDraw.Draw(a).rectangle([0, 0, 31, 23], fill=(255, 255, 255))
+    b = render_background(32, 24)
+    assert b.getpixel((0, 0)) == (20, 30, 40)
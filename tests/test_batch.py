@@ -0,0 +1,69 @@
+import dataclasses
+import json
+from pathlib import Path
+
+import pytest
+
+from src import batch
+
+
+def _write_jobs(path: Path, jobs) -> str:
+    path.write_text("\n".join(json.dumps(j) for j in jobs) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _job(**kw):
+    return {"topic": "Composting at home", "duration": 6, "quality": "720p", "tier": "draft", **kw}
+
+
+def test_load_jobs_ids_and_validation(tmp_path: Path):
+    path = _write_jobs(tmp_path / "jobs.jsonl", [_job(id="a"), _job(), _job(tone="serious")])
+    jobs = batch.load_jobs(path)
+    assert jobs[0].id == "a" and jobs[0].text == "Composting at home"
+    # Content-derived ids are stable across reads and differ when any setting differs
+    assert jobs[1].id == batch.load_jobs(path)[1].id != jobs[2].id
+
+    with pytest.raises(ValueError, match="duplicate job id"):
+        batch.load_jobs(_write_jobs(tmp_path / "dup.jsonl", [_job(id="a"), _job(id="a", tone="serious")]))
+    with pytest.raises(ValueError, match=":1:"):
+        batch.load_jobs(_write_jobs(tmp_path / "bad.jsonl", [{"tone": "friendly"}]))
+    for bad_id in ("../escape", "a/b", "..", ".hidden", "x\\y"):
+        with pytest.raises(ValueError, match="job id"):
+            batch.BatchJob.from_dict(_job(id=bad_id))
+
+
+def test_batch_writes_manifest_and_resumes(tmp_path: Path, monkeypatch):
+    # The render and TTS caches default to ./outputs; keep them out of the repo
+    monkeypatch.chdir(tmp_path)
+    out_dir = tmp_path / "batch"
+    jobs = batch.load_jobs(_write_jobs(tmp_path / "jobs.jsonl", [_job(id="ok"), _job(id="flaky", tone="serious")]))
+    real_pipeline = batch.run_pipeline
+
+    def failing_pipeline(scenes, output_path, **kwargs):
+        if "flaky" in output_path:
+            raise RuntimeError("encoder crashed")
+        return real_pipeline(scenes, output_path, **kwargs)
+
+    monkeypatch.setattr(batch, "run_pipeline", failing_pipeline)
+    summary = batch.run_batch(jobs, str(out_dir), workers=1)
+    assert (summary.succeeded, summary.failed, summary.skipped) == (1, 1, 0)
+    assert summary.videos_per_hour > 0
+    results = batch.load_manifest(summary.manifest)
+    assert results["ok"].status == "ok" and Path(results["ok"].video).exists()
+    assert Path(results["ok"].video).parent == out_dir / "ok" / "final"
+    assert not (out_dir / "ok" / "audio").exists()
+    assert "encoder crashed" in results["flaky"].error
+
+    # A rerun skips the finished job and retries the failed one
+    monkeypatch.setattr(batch, "run_pipeline", real_pipeline)
+    summary = batch.run_batch(jobs, str(out_dir), workers=1)
+    assert (summary.succeeded, summary.failed, summary.skipped) == (1, 0, 1)
+    assert batch.load_manifest(summary.manifest)["flaky"].status == "ok"
+
+
+def test_cli_exit_code(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(batch, "CONFIG", dataclasses.replace(batch.CONFIG, batch_workers=1))
+    path = _write_jobs(tmp_path / "jobs.jsonl", [_job(id="one")])
+    assert batch.main([path, "--out-dir", str(tmp_path / "out")]) == 0
+    assert "videos/hour" in capsys.readouterr().out
@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+
+from src.cache import FileCache, make_key
+
+
+def test_file_cache_put_fetch_and_stats(tmp_path: Path):
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=1024 * 1024, suffix=".bin")
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"payload")
+    key = make_key(text="hello", duration=2)
+
+    assert not cache.fetch(key, str(tmp_path / "out.bin"))
+    cache.put(key, str(src))
+    assert cache.fetch(key, str(tmp_path / "out.bin"))
+    assert (tmp_path / "out.bin").read_bytes() == b"payload"
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1 and cache.stats["puts"] == 1
+    assert make_key(text="hello", duration=2) == key != make_key(text="hello", duration=3)
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=250)
+    src = tmp_path / "blob"
+    src.write_bytes(b"x" * 100)
+    keys = [make_key(n=i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, str(src))
+        os.utime(cache.path_for(key), (1000 + i, 1000 + i))
+    assert cache.get(keys[0]) is not None  # refreshes entry 0, leaving entry 1 oldest
+    cache.put(keys[2], str(src))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.stats["evictions"] == 1
+
+
+def test_sqlite_cache_ttl_and_size_eviction(tmp_path: Path):
+    from src.cache import SQLiteCache
+
+    cache = SQLiteCache(str(tmp_path / "kv.sqlite3"), ttl_seconds=3600, max_bytes=60)
+    cache.put("a", {"v": "x" * 20})
+    cache.put("b", {"v": "y" * 20})
+    assert cache.get("a") == {"v": "x" * 20}  # a is now most recently used
+    cache.put("c", {"v": "z" * 20})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    expired = SQLiteCache(cache.path, ttl_seconds=1e-9, max_bytes=60)
+    assert expired.get("a") is None
@@ -0,0 +1,69 @@
+import dataclasses
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src import downloads
+from src.downloads import download_file, looks_like_mp4
+
+PAYLOAD = b"\x00\x00\x00\x18ftypmp42" + bytes(range(256)) * 2400
+
+
+def _serve(drop_first: bool):
+    state = {"requests": 0, "ranges": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"] += 1
+            rng = self.headers.get("Range")
+            state["ranges"].append(rng)
+            start = int(rng.split("=")[1].rstrip("-")) if rng else 0
+            body = PAYLOAD[start:]
+            self.send_response(206 if rng else 200)
+            if rng:
+                self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if drop_first and state["requests"] == 1:
+                self.wfile.write(body[: len(body) // 3])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/clip.mp4", state
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch):
+    monkeypatch.setattr(downloads, "CONFIG", dataclasses.replace(downloads.CONFIG, retry_backoff_seconds=0.01))
+
+
+def test_download_resumes_with_range_request(tmp_path: Path):
+    server, url, state = _serve(drop_first=True)
+    try:
+        out = download_file(url, str(tmp_path / "scene_01.mp4"), max_attempts=3, validate=looks_like_mp4)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert Path(out).read_bytes() == PAYLOAD
+    assert state["ranges"][0] is None and state["ranges"][1].startswith("bytes=")
+    assert not (tmp_path / "scene_01.mp4.part").exists()
+
+
+def test_download_rejects_checksum_mismatch(tmp_path: Path):
+    server, url, _state = _serve(drop_first=False)
+    try:
+        with pytest.raises(RuntimeError):
+            download_file(url, str(tmp_path / "bad.mp4"), sha256="0" * 64)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not (tmp_path / "bad.mp4").exists()
@@ -0,0 +1,32 @@
+import pytest
+
+from src.encoding import DEFAULT_PROFILE, EncodingProfile
+
+
+def test_from_settings_maps_ui_labels():
+    p = EncodingProfile.from_settings("720p HD", fps=24, bitrate="Medium")
+    assert (p.width, p.height, p.fps, p.crf, p.tier) == (1280, 720, 24, 21, "final")
+    # 8 Mbit/s at 1080p30 scaled by pixel rate
+    assert p.maxrate == "2.8M"
+    assert p.x264_args() == ["-preset", "fast", "-crf", "21", "-maxrate", "2.8M", "-bufsize", "5.6M"]
+
+    uhd = EncodingProfile.from_settings("4K Ultra HD", fps=60, bitrate="High")
+    assert uhd.size == (3840, 2160) and uhd.maxrate is None
+
+    assert EncodingProfile.from_settings("1080p Full HD") == DEFAULT_PROFILE
+    with pytest.raises(ValueError):
+        EncodingProfile.from_settings("8K")
+
+
+def test_draft_tier_is_faster_and_reversible():
+    draft = DEFAULT_PROFILE.with_tier("draft")
+    assert draft.preset == draft.still_preset == "ultrafast"
+    assert draft.crf == DEFAULT_PROFILE.crf + 5
+    assert draft.with_tier("final") == DEFAULT_PROFILE
+
+
+def test_maxrate_units_carry_over_to_the_buffer():
+    assert EncodingProfile(maxrate="8000k").x264_args()[-2:] == ["-bufsize", "16000k"]
+    assert EncodingProfile(maxrate="8000000").x264_args()[-2:] == ["-bufsize", "16000000"]
+    with pytest.raises(ValueError, match="bit rate"):
+        EncodingProfile(maxrate="fast")
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from src import incremental, pipeline
+
+
+def _scenes():
+    return [
+        {"duration_sec": 1, "script_text": f"Narration {i}", "on_screen_text": f"Title {i}"} for i in range(1, 4)
+    ]
+
+
+def test_only_edited_scenes_are_rebuilt(tmp_path: Path, monkeypatch):
+    # Scene files and the render cache default to ./outputs; keep them out of the repo
+    monkeypatch.chdir(tmp_path)
+    calls = {"tts": [], "render": []}
+    real_tts, real_render = pipeline.synthesize_scene, pipeline.render_scene
+
+    def counting_tts(idx, *args, **kwargs):
+        calls["tts"].append(idx)
+        return real_tts(idx, *args, **kwargs)
+
+    def counting_render(idx, *args, **kwargs):
+        calls["render"].append(idx)
+        return real_render(idx, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "synthesize_scene", counting_tts)
+    monkeypatch.setattr(pipeline, "render_scene", counting_render)
+    out = str(tmp_path / "final.mp4")
+
+    scenes = _scenes()
+    _result, state = incremental.rerender(scenes, out, None)
+    assert sorted(calls["tts"]) == sorted(calls["render"]) == [1, 2, 3]
+
+    # Narration typo in scene 2: only its voice-over is redone
+    calls = {"tts": [], "render": []}
+    scenes[1]["script_text"] = "Narration two, fixed"
+    plan = incremental.plan_rerender(scenes, state, "", 1.0, "animated slides")
+    assert (plan.audio, plan.visuals, plan.unchanged) == ([2], [], [1, 3])
+    _result, state = incremental.rerender(scenes, out, state)
+    assert calls == {"tts": [2], "render": []}
+
+    # On-screen text change in scene 3 only re-renders its clip
+    calls = {"tts": [], "render": []}
+    scenes[2]["on_screen_text"] = "New title"
+    result, state = incremental.rerender(scenes, out, state)
+    assert calls == {"tts": [], "render": [3]}
+    assert Path(out).exists() and len(result.scenes) == 3
+    assert "New title" in Path(out).with_suffix(".srt").read_text(encoding="utf-8")
+
+    # An artifact rewritten outside the tracker is not trusted
+    Path(result.scenes[0].audio_path).write_bytes(Path(result.scenes[1].audio_path).read_bytes())
+    plan = incremental.plan_rerender(scenes, state, "", 1.0, "animated slides")
+    assert plan.audio == [1] and plan.visuals == []
+
+
+def test_final_render_reuses_preview_voice_over(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calls = {"tts": [], "render": []}
+    real_tts, real_render = pipeline.synthesize_scene, pipeline.render_scene
+
+    def counting_tts(idx, *args, **kwargs):
+        calls["tts"].append(idx)
+        return real_tts(idx, *args, **kwargs)
+
+    def counting_render(idx, *args, **kwargs):
+        calls["render"].append(idx)
+        return real_render(idx, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "synthesize_scene", counting_tts)
+    monkeypatch.setattr(pipeline, "render_scene", counting_render)
+
+    scenes = _scenes()
+    _preview, state = incremental.rerender(scenes, str(tmp_path / "preview.mp4"), None, draft=True)
+    calls = {"tts": [], "render": []}
+    result, _state = incremental.rerender(scenes, str(tmp_path / "final.mp4"), state)
+    assert calls == {"tts": [], "render": [1, 2, 3]}
+    assert Path(result.video_path).exists()
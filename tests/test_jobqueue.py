@@ -0,0 +1,213 @@
+import dataclasses
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src import jobqueue
+from src.jobqueue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def _queue(tmp_path: Path, **kw) -> JobQueue:
+    return JobQueue(str(tmp_path / "queue" / "jobs.sqlite3"), **kw)
+
+
+def test_claim_is_exclusive_and_complete_releases(tmp_path: Path):
+    q = _queue(tmp_path)
+    job_id = q.submit({"topic": "Composting"})
+    job = q.claim("w1")
+    assert job is not None and job.id == job_id and job.status == RUNNING and job.attempts == 1
+    assert q.claim("w2") is None
+    assert not q.complete(job_id, "w2", {"video": "x.mp4"})  # only the claiming worker may finish it
+    assert q.complete(job_id, "w1", {"video": "x.mp4"})
+    done = q.get(job_id)
+    assert done.status == DONE and done.finished and done.result == {"video": "x.mp4"}
+    assert os.listdir(q.lock_dir) == []
+
+
+def test_concurrent_claims_never_share_a_job(tmp_path: Path):
+    q = _queue(tmp_path)
+    ids = {q.submit({"n": i}) for i in range(12)}
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name: str) -> None:
+        while True:
+            job = q.claim(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_failures_retry_then_fail(tmp_path: Path):
+    q = _queue(tmp_path, max_attempts=2)
+    job_id = q.submit({})
+    q.claim("w1")
+    assert q.fail(job_id, "w1", "boom")
+    assert q.get(job_id).status == QUEUED
+    q.claim("w1")
+    q.fail(job_id, "w1", "boom again")
+    job = q.get(job_id)
+    assert job.status == FAILED and job.error == "boom again" and job.attempts == 2
+
+
+def test_stale_jobs_are_requeued_and_fenced(tmp_path: Path):
+    q = _queue(tmp_path, stale_seconds=0.05)
+    job_id = q.submit({})
+    q.claim("dead")
+    time.sleep(0.1)
+    assert q.requeue_stale() == 1
+    retry = q.claim("alive")
+    assert retry is not None and retry.id == job_id and retry.attempts == 2
+    # The presumed-dead worker comes back: it can no longer touch the job
+    assert not q.heartbeat(job_id, "dead")
+    assert not q.complete(job_id, "dead", {})
+    assert q.complete(job_id, "alive", {"video": "ok.mp4"})
+
+
+def test_publish_runs_only_for_the_owning_worker(tmp_path: Path):
+    q = _queue(tmp_path, stale_seconds=0.05)
+    job_id = q.submit({"output": "relative/video.mp4", "reuse_audio": [["a.mp3", 1.0]]})
+    job = q.claim("dead")
+    assert job.payload["output"] == os.path.abspath("relative/video.mp4")
+    assert job.payload["reuse_audio"] == [[os.path.abspath("a.mp3"), 1.0]]
+    time.sleep(0.1)
+    q.requeue_stale()
+    q.claim("alive")
+    published = []
+    assert not q.complete(job_id, "dead", {}, publish=lambda: published.append("dead"))
+    with pytest.raises(ZeroDivisionError):
+        q.complete(job_id, "alive", {}, publish=lambda: 1 / 0)
+    assert q.get(job_id).status == RUNNING  # a failed publish records nothing
+    assert q.complete(job_id, "alive", {"video": "v.mp4"}, publish=lambda: published.append("alive"))
+    assert published == ["alive"] and q.get(job_id).status == DONE
+
+
+def test_worker_rides_out_database_errors(tmp_path: Path, monkeypatch):
+    import sqlite3
+
+    from src.workspace import RunWorkspace
+
+    monkeypatch.setattr(
+        jobqueue, "CONFIG", dataclasses.replace(jobqueue.CONFIG, job_poll_seconds=0.001, job_heartbeat_seconds=0.01)
+    )
+    q = _queue(tmp_path)
+    job_id = q.submit({})
+    failures = {"claim": 1, "heartbeat": 3}
+    beats = []
+
+    def flaky(name, real):
+        def call(*args, **kwargs):
+            if failures[name]:
+                failures[name] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            beats.append(name)
+            return real(*args, **kwargs)
+
+        return call
+
+    monkeypatch.setattr(q, "claim", flaky("claim", q.claim))
+    monkeypatch.setattr(q, "heartbeat", flaky("heartbeat", q.heartbeat))
+
+    def execute(job):
+        deadline = time.time() + 5
+        while "heartbeat" not in beats and time.time() < deadline:
+            time.sleep(0.01)
+        return jobqueue.Rendered({"video": "v.mp4"}, RunWorkspace.create(str(tmp_path / "jobs")), [])
+
+    monkeypatch.setattr(jobqueue, "execute", execute)
+    assert jobqueue.work(q, once=True, worker="w1") == 1
+    assert "heartbeat" in beats  # the heartbeat kept going after the locked database
+    assert q.get(job_id).status == DONE
+
+
+def test_deliverables_are_staged_before_the_write_lock(tmp_path: Path, monkeypatch):
+    from src.workspace import RunWorkspace
+
+    q = _queue(tmp_path)
+    out = tmp_path / "out"
+    real_complete = q.complete
+    accept = iter([False, True])
+
+    def complete(job_id, worker, result, publish=None):
+        # The (possibly cross-filesystem) copy is done; only a rename is left for the locked section
+        assert len(list(out.glob("video.mp4.*.tmp"))) == 1 and not (out / "video.mp4").exists()
+        return next(accept) and real_complete(job_id, worker, result, publish=publish)
+
+    def execute(job):
+        ws = RunWorkspace.create(str(tmp_path / "jobs"))
+        Path(ws.final_path()).write_bytes(b"video")
+        return jobqueue.Rendered({"video": str(out / "video.mp4")}, ws, [(ws.final_path(), str(out / "video.mp4"))])
+
+    monkeypatch.setattr(q, "complete", complete)
+    monkeypatch.setattr(jobqueue, "execute", execute)
+    for _ in range(2):
+        q.submit({})
+        jobqueue._run_claimed(q, q.claim("w1"), "w1")
+    # The fenced-off attempt left nothing behind; the accepted one was renamed into place
+    assert [p.name for p in out.iterdir()] == ["video.mp4"] and (out / "video.mp4").read_bytes() == b"video"
+
+
+def test_orphaned_lock_file_expires(tmp_path: Path):
+    q = _queue(tmp_path, stale_seconds=60)
+    job_id = q.submit({})
+    os.makedirs(q.lock_dir, exist_ok=True)
+    lock = Path(q.lock_dir) / f"{job_id}.lock"
+    lock.write_text("crashed-worker")
+    assert q.claim("w1") is None
+    old = time.time() - 120
+    os.utime(lock, (old, old))
+    assert q.claim("w1").id == job_id
+
+
+def test_worker_renders_preview_then_final(tmp_path: Path, monkeypatch):
+    # The render and TTS caches default to ./outputs; keep them out of the repo
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(jobqueue, "CONFIG", dataclasses.replace(jobqueue.CONFIG, job_dir=str(tmp_path / "jobs")))
+    q = _queue(tmp_path)
+    storyboard = {
+        "title": "Queue test",
+        "scenes": [{"duration_sec": 1, "script_text": f"Scene {i}", "on_screen_text": f"S{i}"} for i in (1, 2)],
+    }
+    preview_id = q.submit({"storyboard": storyboard, "draft": True})
+    assert jobqueue.work(q, once=True, worker="w1") == 1
+    preview = q.get(preview_id)
+    assert preview.status == DONE, preview.error
+    assert Path(preview.result["video"]).exists() and len(preview.result["scene_audios"]) == 2
+
+    final_out = tmp_path / "final" / "video.mp4"
+    final_id = q.submit(
+        {"storyboard": storyboard, "output": str(final_out), "reuse_audio": preview.result["scene_audios"]}
+    )
+    jobqueue.work(q, once=True, worker="w1")
+    final = q.get(final_id)
+    assert final.status == DONE, final.error
+    assert final_out.exists() and Path(final.result["thumbnail"]).exists()
+    assert final_out.with_suffix(".srt").exists() and final_out.with_suffix(".metrics.json").exists()
+    assert not (tmp_path / "jobs" / f"{final_id}-a1" / "audio").exists()
+    assert Path(preview.result["video"]).parent == tmp_path / "jobs" / f"{preview_id}-a1" / "preview" / "final"
+
+
+def test_local_worker_starts_only_without_a_live_worker(tmp_path: Path, monkeypatch):
+    q = _queue(tmp_path, stale_seconds=60)
+    started = threading.Event()
+    monkeypatch.setattr(jobqueue, "work", lambda queue, worker=None: started.set())
+    monkeypatch.setattr(jobqueue, "_local_worker", None)
+    q.register_worker("remote")
+    assert q.live_workers() == ["remote"]
+    assert jobqueue.ensure_worker(q) is None
+
+    q.stale_seconds = 0
+    time.sleep(0.01)
+    thread = jobqueue.ensure_worker(q)
+    assert thread is not None and started.wait(5)
@@ -0,0 +1,71 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from src import metrics, pipeline, workspace
+
+
+def test_spans_are_recorded_per_run_and_across_threads():
+    with metrics.span("outside"):
+        pass  # no recording: measured but not kept
+
+    with metrics.recording("run-1") as run:
+        with metrics.span("tts", scene=1) as s:
+            s.cache(False)
+            with s.provider_call():
+                pass
+        with pytest.raises(ValueError):
+            with metrics.span("render", scene=2):
+                raise ValueError("boom")
+        with metrics.ensure_recording() as joined:
+            assert joined is run
+        worker = threading.Thread(target=metrics.bind(_record_mux))
+        worker.start()
+        worker.join()
+
+    assert metrics.current_run() is None
+    assert [s.name for s in run.spans] == ["tts", "render", "mux"]
+    assert run.spans[0].labels == {"scene": "1"} and run.spans[0].cache_misses == 1
+    assert run.spans[1].error == "boom"
+    summary = run.summary()
+    assert summary["mux"]["cache_hits"] == 1 and summary["render"]["errors"] == 1
+    assert run.wall_seconds > 0
+
+
+def _record_mux() -> None:
+    with metrics.span("mux") as s:
+        s.cache(True)
+
+
+def test_reports_are_written_as_json_and_prometheus_text(tmp_path: Path):
+    with metrics.recording('job "7"') as run:
+        with metrics.span("encode") as s:
+            (tmp_path / "seg.mp4").write_bytes(b"x" * 100)
+            s.add_output(str(tmp_path / "seg.mp4"))
+    json_path, prom_path = run.write(str(tmp_path / "out" / "video"))
+
+    report = json.loads(Path(json_path).read_text(encoding="utf-8"))
+    assert report["run_id"] == 'job "7"' and report["stages"]["encode"]["bytes_written"] == 100
+    prom = Path(prom_path).read_text(encoding="utf-8")
+    assert "# TYPE voice2video_stage_wall_seconds_total counter" in prom
+    assert 'voice2video_stage_bytes_written_total{run="job \\"7\\"",stage="encode"} 100' in prom
+    assert not list((tmp_path / "out").glob("*.tmp"))
+
+
+def test_pipeline_writes_a_report_next_to_the_video(tmp_path: Path, monkeypatch):
+    # A fresh render cache, so the hit/miss counts do not depend on earlier tests or runs
+    monkeypatch.chdir(tmp_path)
+    ws = workspace.RunWorkspace.create(str(tmp_path))
+    scenes = [{"duration_sec": 1, "script_text": f"Metrics scene {i}"} for i in (1, 2)]
+    result = pipeline.run_pipeline(scenes, ws.final_path(), workspace=ws)
+
+    assert result.metrics is not None and result.metrics.run_id == ws.run_id
+    report = json.loads(Path(ws.final_path("video.metrics.json")).read_text(encoding="utf-8"))
+    stages = report["stages"]
+    assert stages["tts"]["count"] == stages["render"]["count"] == stages["mux"]["count"] == 2
+    assert stages["concat"]["bytes_written"] == Path(result.video_path).stat().st_size
+    assert stages["render"]["cache_misses"] == 2 and stages["render"]["cache_hits"] == 0
+    assert stages["mux"]["child_cpu_seconds"] > 0  # ffmpeg CPU is attributed to the span that ran it
+    assert Path(ws.final_path("video.metrics.prom")).exists()
@@ -0,0 +1,106 @@
+import dataclasses
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from src import pipeline, workspace
+from src.probe import probe
+
+
+def _scenes(n: int):
+    return [{"duration_sec": 1, "script_text": f"Scene number {i}", "on_screen_text": f"Scene {i}"} for i in range(1, n + 1)]
+
+
+def test_run_pipeline_end_to_end(tmp_path: Path, monkeypatch):
+    # Scene files and the render cache default to ./outputs; keep them out of the repo
+    monkeypatch.chdir(tmp_path)
+    out = tmp_path / "final.mp4"
+    result = pipeline.run_pipeline(_scenes(2), str(out))
+    assert out.exists()
+    assert len(result.scene_audios) == len(result.scene_videos) == 2
+    assert abs(sum(result.durations) - 2.0) < 0.2
+    assert "Scene 2" in out.with_suffix(".srt").read_text(encoding="utf-8")
+
+
+def test_stages_overlap(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Prepare one real clip and voice-over, then make each stage artificially slow
+    seed = pipeline.run_pipeline(_scenes(1), str(tmp_path / "seed.mp4"))
+    clip, wav = tmp_path / "clip.mp4", tmp_path / "voice.wav"
+    shutil.copyfile(seed.scene_videos[0], clip)
+    shutil.copyfile(seed.scene_audios[0], wav)
+    delay = 0.4
+
+    def slow_tts(idx, scene, voice, speed=1.0, work_dir="outputs"):
+        time.sleep(delay)
+        return str(wav), 1.0
+
+    def slow_render(idx, scene, total, style="", threads=0, profile=None, work_dir="outputs"):
+        time.sleep(delay)
+        return str(clip)
+
+    monkeypatch.setattr(pipeline, "synthesize_scene", slow_tts)
+    monkeypatch.setattr(pipeline, "render_scene", slow_render)
+    monkeypatch.setattr(pipeline, "CONFIG", dataclasses.replace(pipeline.CONFIG, tts_workers=1, render_workers=1))
+
+    n = 4
+    result = pipeline.run_pipeline(_scenes(n), str(tmp_path / "out.mp4"))
+    # Serial stages would take at least 2 * n * delay; overlapped ones about n * delay plus muxing
+    assert result.wall_seconds < 2 * n * delay
+    assert result.stage_seconds["tts"] >= n * delay
+    assert len(result.durations) == n
+
+
+def test_draft_preview_is_low_res_and_kept_apart(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    preview_dir = tmp_path / "preview"
+    monkeypatch.setattr(workspace, "CONFIG", dataclasses.replace(workspace.CONFIG, preview_dir=str(preview_dir)))
+    result = pipeline.run_pipeline(_scenes(2), str(tmp_path / "preview.mp4"), draft=True)
+    video = probe(result.video_path).video
+    assert video is not None and (video.width, video.height) == (640, 360)
+    assert abs(video.fps - 15) < 0.5
+    assert all(Path(p).is_relative_to(preview_dir) for p in result.scene_audios + result.scene_videos)
+
+
+def test_concurrent_runs_use_separate_workspaces(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runs = [workspace.RunWorkspace.create(str(tmp_path)) for _ in range(2)]
+    results = [None, None]
+
+    def render(i: int) -> None:
+        results[i] = pipeline.run_pipeline(_scenes(2), runs[i].final_path(), workspace=runs[i])
+
+    threads = [threading.Thread(target=render, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert runs[0].run_id != runs[1].run_id
+    for run, result in zip(runs, results):
+        assert result is not None and Path(result.video_path).exists()
+        assert all(Path(p).is_relative_to(run.root) for p in result.scene_audios + result.scene_videos)
+
+
+def test_scenes_do_not_wait_for_the_whole_ai_batch(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    started = {}
+    real_render = pipeline.render_scene
+
+    def fake_ai_clips(storyboard, indices, work_dir, on_result):
+        on_result(1, None)  # scene 1's job failed fast; scene 2's is still generating
+        time.sleep(1.5)
+        on_result(2, None)
+        return {}
+
+    def timed_render(idx, *args, **kwargs):
+        started[idx] = time.perf_counter()
+        return real_render(idx, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "ai_clips_enabled", lambda: True)
+    monkeypatch.setattr(pipeline, "request_ai_clips", fake_ai_clips)
+    monkeypatch.setattr(pipeline, "render_scene", timed_render)
+    t0 = time.perf_counter()
+    result = pipeline.run_pipeline(_scenes(2), str(tmp_path / "out.mp4"))
+    assert started[1] - t0 < 1.0 <= started[2] - t0
+    assert len(result.scene_videos) == 2
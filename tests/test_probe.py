@@ -0,0 +1,52 @@
+import subprocess
+import time
+import wave
+from pathlib import Path
+
+from src import probe
+
+
+def _write_wav(path: Path, seconds: float, rate: int = 16000) -> None:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\x00\x00" * int(seconds * rate))
+
+
+def test_wav_probe_reads_header_and_memoizes(tmp_path: Path, monkeypatch):
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("WAV probing must not spawn a process")
+
+    monkeypatch.setattr(subprocess, "run", no_subprocess)
+    paths = []
+    for i in range(200):
+        p = tmp_path / f"scene_{i:03d}.wav"
+        _write_wav(p, 0.5 + i * 0.01)
+        paths.append(p)
+
+    t0 = time.perf_counter()
+    durations = [probe.duration(str(p)) for p in paths]
+    assert time.perf_counter() - t0 < 1.0
+    assert abs(durations[10] - 0.6) < 1e-6
+    info = probe.probe(str(paths[0]))
+    assert info.audio.sample_rate == 16000 and info.audio.channels == 1 and info.video is None
+
+    # Rewriting the file invalidates the memoized entry
+    _write_wav(paths[0], 2.0)
+    assert abs(probe.duration(str(paths[0])) - 2.0) < 1e-6
+
+
+def test_probe_video_streams(tmp_path: Path):
+    from src.ffmpeg_utils import run_ffmpeg
+
+    out = tmp_path / "clip.mp4"
+    run_ffmpeg(
+        ["-f", "lavfi", "-i", "color=c=blue:s=320x240:r=30:d=1.5", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
+         "-t", "1.5", "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", str(out)]
+    )
+    info = probe.probe(str(out))
+    assert info.video.codec == "h264" and (info.video.width, info.video.height) == (320, 240)
+    assert info.video.fps == 30.0 and info.video.pix_fmt == "yuv420p"
+    assert info.audio.codec == "aac" and info.audio.channels == 2
+    assert abs(info.duration - 1.5) < 0.1
@@ -7,3 +7,43 @@ def test_generate_script_fallback():
     assert "title" in res
     assert isinstance(res.get("scenes"), list)
     assert len(res["scenes"]) >= 1
+
+
+def test_generate_script_uses_storyboard_cache(tmp_path, monkeypatch):
+    import dataclasses
+    import json
+    import sys
+    import types
+
+    from src import script_gen
+
+    calls = []
+    storyboard = {"title": "T", "scenes": [{"duration_sec": 5, "script_text": "Hi"}]}
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            calls.append(kwargs)
+            message = types.SimpleNamespace(content=json.dumps(storyboard))
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    class FakeOpenAI:
+        def __init__(self, api_key=None):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setattr(
+        script_gen,
+        "CONFIG",
+        dataclasses.replace(
+            script_gen.CONFIG, openai_api_key="test", storyboard_cache_path=str(tmp_path / "sb.sqlite3")
+        ),
+    )
+    script_gen._storyboard_cache.cache_clear()
+    try:
+        assert script_gen.generate_script("Hello   world", tone="Friendly", target_duration_sec=30) == storyboard
+        assert script_gen.generate_script("Hello world", tone="friendly", target_duration_sec=30) == storyboard
+        assert len(calls) == 1
+        script_gen.generate_script("Hello world", tone="friendly", target_duration_sec=30, use_cache=False)
+        assert len(calls) == 2
+    finally:
+        script_gen._storyboard_cache.cache_clear()
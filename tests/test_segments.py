@@ -0,0 +1,62 @@
+import dataclasses
+import json
+import wave
+from pathlib import Path
+
+from moviepy.editor import ColorClip
+
+from src import segments
+from src.assembler import assemble_video
+from src.encoding import EncodingProfile
+from src.probe import probe
+
+
+def _clip(path: Path, size, color, fps=24) -> str:
+    ColorClip(size=size, color=color, duration=1).write_videofile(
+        str(path), fps=fps, codec="libx264", audio=False, verbose=False, logger=None
+    )
+    return str(path)
+
+
+def _silence(path: Path, seconds: float) -> str:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return str(path)
+
+
+def test_segments_mode_normalizes_and_reencodes_only_changed_scenes(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        segments, "CONFIG", dataclasses.replace(segments.CONFIG, segment_cache_dir=str(tmp_path / "cache"))
+    )
+    segments._segment_cache.cache_clear()
+    small = EncodingProfile(width=320, height=240)
+    encoded = []
+    real_encode = segments.encode_segment
+
+    def counting_encode(video, audio, output_path, profile):
+        encoded.append(video)
+        real_encode(video, audio, output_path, profile)
+
+    monkeypatch.setattr(segments, "encode_segment", counting_encode)
+
+    videos = [_clip(tmp_path / "v1.mp4", (320, 240), (255, 0, 0)), _clip(tmp_path / "v2.mp4", (640, 360), (0, 0, 255), 25)]
+    audios = [_silence(tmp_path / "a1.wav", 0.5), _silence(tmp_path / "a2.wav", 1.5)]
+    out = tmp_path / "final.mp4"
+    assemble_video(videos, audios, ["A", "B"], str(out), mode="segments", profile=small)
+
+    index = json.loads((tmp_path / "final_segments" / "index.json").read_text(encoding="utf-8"))
+    starts = [s["start"] for s in index["scenes"]]
+    assert starts[0] == 0.0 and abs(starts[1] - 1.0) < 0.1
+    infos = [probe(s["path"]) for s in index["scenes"]]
+    assert {(i.video.width, i.video.height, i.video.fps) for i in infos} == {(320, 240, 30.0)}
+    assert abs(probe(str(out)).duration - 2.0) < 0.15
+    assert len(encoded) == 2
+
+    # Replace scene 2 only: one encode, one cache hit
+    encoded.clear()
+    videos[1] = _clip(tmp_path / "v2b.mp4", (640, 360), (0, 255, 0), 25)
+    assemble_video(videos, audios, ["A", "B"], str(out), mode="segments", profile=small)
+    assert encoded == [videos[1]]
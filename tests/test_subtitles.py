@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from src.subtitles import build_cues, to_vtt, wrap_lines, write_subtitles
+
+
+def test_cues_follow_scene_durations_and_split_long_text():
+    long_text = " ".join(["word"] * 40)  # ~200 chars -> several two-line cues
+    cues = build_cues(["Intro", long_text, ""], [2.0, 8.0, 3.0])
+
+    assert (cues[0].start, cues[0].end, cues[0].text) == (0.0, 2.0, "Intro")
+    body = cues[1:]
+    assert len(body) > 1
+    assert body[0].start == 2.0 and body[-1].end == 10.0
+    assert all(a.end == b.start for a, b in zip(body, body[1:]))
+    for cue in body:
+        lines = cue.text.split("\n")
+        assert len(lines) <= 2 and all(len(line) <= 42 for line in lines)
+
+
+def test_segments_take_precedence_and_are_clipped():
+    segments = [{"start": 1.0, "end": 2.5, "text": "hello"}, {"start": 3.0, "end": 9.0, "text": "there"}]
+    cues = build_cues(["ignored"], [5.0], segments)
+    assert [(c.start, c.end, c.text) for c in cues] == [(1.0, 2.5, "hello"), (3.0, 5.0, "there")]
+
+
+def test_write_srt_and_vtt(tmp_path: Path):
+    cues = build_cues(["Hello world"], [61.25])
+    srt_path, vtt_path = write_subtitles(cues, str(tmp_path / "out"))
+    assert "00:00:00,000 --> 00:01:01,250" in Path(srt_path).read_text(encoding="utf-8")
+    assert to_vtt(cues) == Path(vtt_path).read_text(encoding="utf-8")
+    assert "00:00:00.000 --> 00:01:01.250" in to_vtt(cues)
+    assert wrap_lines("a " * 3, 3) == ["a a", "a"]
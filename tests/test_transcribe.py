@@ -18,3 +18,123 @@ def test_transcribe_fallback(tmp_path: Path):
     assert "transcript" in res
     assert "segments" in res
     assert isinstance(res["segments"], list)
+
+
+def test_plan_chunks_cuts_in_silence():
+    from src.transcribe import _plan_chunks
+
+    speech = [(0, 900), (1100, 1900), (2100, 2900)]
+    assert _plan_chunks(speech, 3000, 2000) == [(0, 2000), (2000, 3000)]
+    assert _plan_chunks([(0, 5000)], 5000, 2000) == [(0, 2000), (2000, 4000), (4000, 5000)]
+
+
+def test_transcribe_chunked_offsets_segments(tmp_path: Path, monkeypatch):
+    import dataclasses
+    import math
+    import struct
+
+    from src import transcribe
+
+    # three 1s tones separated by 0.8s of silence
+    rate = 16000
+    tone = b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / rate))) for i in range(rate))
+    gap = b"\x00\x00" * int(0.8 * rate)
+    wav_path = tmp_path / "long.wav"
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(tone + gap + tone + gap + tone)
+
+    def fake_transcribe_file(path, language):
+        return {"transcript": "chunk", "segments": [{"start": 0.0, "end": 0.5, "text": "x"}]}
+
+    monkeypatch.setattr(transcribe, "_transcribe_file", fake_transcribe_file)
+    monkeypatch.setattr(
+        transcribe,
+        "CONFIG",
+        dataclasses.replace(transcribe.CONFIG, openai_api_key="test", transcribe_chunk_seconds=2),
+    )
+    monkeypatch.setattr(transcribe, "_transcript_cache", lambda: transcribe.SQLiteCache("", 0, 0))
+    res = transcribe_audio(str(wav_path))
+    starts = [s["start"] for s in res["segments"]]
+    assert len(starts) == 3
+    assert starts[0] == 0.0
+    assert 1.0 < starts[1] < 1.8 and 2.8 < starts[2] < 3.6
+    assert res["transcript"] == "chunk chunk chunk"
+
+
+def test_transcribe_cache_skips_repeat_requests(tmp_path: Path, monkeypatch):
+    import dataclasses
+    import shutil
+
+    from src import transcribe
+
+    wav_path = tmp_path / "note.wav"
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x01\x00" * 16000)
+    copy_path = tmp_path / "same_bytes_other_name.wav"
+    shutil.copy(wav_path, copy_path)
+
+    calls = []
+
+    def fake_transcribe_file(path, language):
+        calls.append(path)
+        return {"transcript": "hello", "segments": [{"start": 0.0, "end": 1.0, "text": "hello"}]}
+
+    monkeypatch.setattr(transcribe, "_transcribe_file", fake_transcribe_file)
+    monkeypatch.setattr(
+        transcribe,
+        "CONFIG",
+        dataclasses.replace(
+            transcribe.CONFIG, openai_api_key="test", transcript_cache_path=str(tmp_path / "t.sqlite3")
+        ),
+    )
+    transcribe._transcript_cache.cache_clear()
+    try:
+        first = transcribe_audio(str(wav_path), language="en")
+        assert transcribe_audio(str(copy_path), language="en") == first
+        assert len(calls) == 1
+        transcribe_audio(str(copy_path), language="hi")
+        assert len(calls) == 2
+    finally:
+        transcribe._transcript_cache.cache_clear()
+
+
+def test_failed_chunk_is_retried_alone(tmp_path: Path, monkeypatch):
+    import dataclasses
+
+    from src import transcribe
+
+    wav_path = tmp_path / "long.wav"
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x01\x00" * 16000 * 5)
+
+    class Overloaded(Exception):
+        status_code = 503
+
+    calls = []
+
+    def flaky_transcribe_file(path, language):
+        calls.append(Path(path).name)
+        if Path(path).name == "chunk_001.mp3" and calls.count("chunk_001.mp3") == 1:
+            raise Overloaded("server busy")
+        return {"transcript": Path(path).stem, "segments": []}
+
+    monkeypatch.setattr(transcribe, "_transcribe_file", flaky_transcribe_file)
+    monkeypatch.setattr(
+        transcribe,
+        "CONFIG",
+        dataclasses.replace(
+            transcribe.CONFIG, openai_api_key="test", transcribe_chunk_seconds=2, retry_backoff_seconds=0
+        ),
+    )
+    res = transcribe._transcribe_chunked(str(wav_path), None)
+    assert res["transcript"] == "chunk_000 chunk_001 chunk_002"
+    assert sorted(calls) == ["chunk_000.mp3", "chunk_001.mp3", "chunk_001.mp3", "chunk_002.mp3"]
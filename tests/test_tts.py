@@ -16,3 +16,146 @@ def test_tts_fallback(tmp_path: Path, monkeypatch):
     assert len(outs) == 2
     for p in outs:
         assert Path(p).exists()
+
+
+def _mp3_bytes(seconds: float = 1.0) -> bytes:
+    import subprocess
+
+    from src.ffmpeg_utils import ffmpeg_binary
+
+    return subprocess.run(
+        [ffmpeg_binary(), "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-c:a", "libmp3lame", "-f", "mp3", "pipe:1"],
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout
+
+
+class _StubTTSServer:
+    """Local stand-in for the ElevenLabs API that injects latency and transient failures."""
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, body: bytes = b""):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.body = body or _mp3_bytes()
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                import time
+
+                self.rfile.read(int(self.headers.get("content-length", 0)))
+                with lock:
+                    stub.requests += 1
+                    attempt = stub.requests
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.latency)
+                with lock:
+                    stub.in_flight -= 1
+                status = 503 if attempt <= stub.fail_first else 200
+                body = stub.body if status == 200 else b""
+                self.send_response(status)
+                self.send_header("content-type", "audio/mpeg")
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _use_stub(monkeypatch, stub, **overrides):
+    import dataclasses
+
+    from src import tts
+
+    config = dataclasses.replace(
+        tts.CONFIG,
+        elevenlabs_api_key="test",
+        elevenlabs_api_base=stub.url,
+        openai_api_key=None,
+        retry_backoff_seconds=0.01,
+        **overrides,
+    )
+    monkeypatch.setattr(tts, "CONFIG", config)
+    monkeypatch.setattr(tts, "_provider_locks", {})
+
+
+def test_tts_concurrent_respects_provider_limit_and_order(tmp_path: Path, monkeypatch):
+    import time
+
+    monkeypatch.chdir(tmp_path)
+    stub = _StubTTSServer(latency=0.3)
+    try:
+        _use_stub(monkeypatch, stub, tts_workers=6, elevenlabs_max_concurrency=3)
+        scenes = [{"script_text": f"Scene {i}"} for i in range(6)]
+        t0 = time.perf_counter()
+        outs = synthesize_speech(scenes, voice="Rachel")
+        elapsed = time.perf_counter() - t0
+    finally:
+        stub.close()
+    assert [Path(p).name for p in outs] == [f"scene_{i:02d}.wav" for i in range(1, 7)]
+    assert stub.max_in_flight == 3
+    assert elapsed < 6 * 0.3
+
+
+def test_tts_retries_transient_errors(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stub = _StubTTSServer(fail_first=2)
+    try:
+        _use_stub(monkeypatch, stub, tts_workers=1, retry_max_attempts=3)
+        outs = synthesize_speech([{"script_text": "Retry me"}], voice="Rachel")
+    finally:
+        stub.close()
+    assert stub.requests == 3
+    assert Path(outs[0]).exists()
+
+
+def test_tts_cache_only_resynthesizes_changed_scenes(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stub = _StubTTSServer()
+    try:
+        _use_stub(monkeypatch, stub, tts_workers=2)
+        scenes = [{"script_text": "Intro line"}, {"script_text": "Body"}, {"script_text": "Outro line"}]
+        synthesize_speech(scenes, voice="Rachel")
+        assert stub.requests == 3
+        scenes[1] = {"script_text": "Body, edited"}
+        outs = synthesize_speech(scenes, voice="Rachel")
+    finally:
+        stub.close()
+    assert stub.requests == 4
+    assert all(Path(p).exists() for p in outs)
+
+
+def test_tts_streams_and_decodes_provider_audio(tmp_path: Path, monkeypatch):
+    import wave
+
+    from src.tts import synthesize_speech_clips
+
+    monkeypatch.chdir(tmp_path)
+    stub = _StubTTSServer(body=_mp3_bytes(2.0))
+    try:
+        _use_stub(monkeypatch, stub, tts_workers=1)
+        [(path, duration)] = synthesize_speech_clips([{"script_text": "Two seconds"}], voice="Rachel")
+    finally:
+        stub.close()
+    assert abs(duration - 2.0) < 0.1
+    with wave.open(path, "rb") as wf:
+        assert (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()) == (1, 2, 44100)
+    assert not list(Path(path).parent.glob("*.part*"))
@@ -1,5 +1,6 @@
 from pathlib import Path
 
+from src.encoding import EncodingProfile
 from src.visuals import generate_visuals
 
 
@@ -14,3 +15,102 @@ def test_generate_visuals_slide(tmp_path: Path, monkeypatch):
     assert len(outs) == 2
     for p in outs:
         assert Path(p).exists()
+
+
+def test_still_encode_matches_assembler_format(tmp_path: Path, monkeypatch):
+    from moviepy.editor import VideoFileClip
+
+    monkeypatch.chdir(tmp_path)
+    outs = generate_visuals([{"duration_sec": 2, "on_screen_text": "Still"}], style="animated slides")
+    with VideoFileClip(outs[0]) as clip:
+        assert clip.size == [1920, 1080]
+        assert round(clip.fps) == 30
+        assert abs(clip.duration - 2.0) < 0.1
+
+
+def test_generate_visuals_parallel_keeps_order_and_retries(tmp_path: Path, monkeypatch):
+    import os
+
+    from src import visuals
+
+    monkeypatch.chdir(tmp_path)
+    parent = os.getpid()
+    real_render = visuals._render_scene
+
+    def flaky_render(idx, scene, total, *args, **kwargs):
+        if idx == 2 and os.getpid() != parent:
+            raise RuntimeError("worker crashed")
+        return real_render(idx, scene, total, *args, **kwargs)
+
+    monkeypatch.setattr(visuals, "_render_scene", flaky_render)
+    scenes = [{"duration_sec": 1, "on_screen_text": f"Scene {i}"} for i in range(3)]
+    small = EncodingProfile(width=320, height=240)
+    outs = visuals.generate_visuals(scenes, style="animated slides", workers=2, profile=small)
+    assert [Path(p).name for p in outs] == ["scene_01.mp4", "scene_02.mp4", "scene_03.mp4"]
+    for p in outs:
+        assert Path(p).exists()
+
+
+def test_failed_scene_gets_a_plain_slide_and_keeps_the_others(tmp_path: Path, monkeypatch):
+    from src import visuals
+    from src.probe import probe
+
+    monkeypatch.chdir(tmp_path)
+    real_render = visuals._render_scene
+
+    def broken_render(idx, scene, total, *args, **kwargs):
+        if idx == 1:
+            raise RuntimeError("font missing")
+        return real_render(idx, scene, total, *args, **kwargs)
+
+    monkeypatch.setattr(visuals, "_render_scene", broken_render)
+    scenes = [{"duration_sec": 1, "on_screen_text": f"Scene {i}"} for i in range(3)]
+    small = EncodingProfile(width=320, height=240)
+    # Serial path: the first scene fails, the later ones are still rendered
+    outs = visuals.generate_visuals(scenes, style="animated slides", workers=1, profile=small)
+    assert [Path(p).name for p in outs] == ["scene_01.mp4", "scene_02.mp4", "scene_03.mp4"]
+    plain = probe(outs[0])
+    assert (plain.video.width, plain.video.height) == (320, 240) and abs(plain.duration - 1.0) < 0.1
+
+
+def test_generate_visuals_reuses_render_cache(tmp_path: Path, monkeypatch):
+    from src import visuals
+
+    monkeypatch.chdir(tmp_path)
+    scenes = [{"duration_sec": 1, "on_screen_text": "Cached"}, {"duration_sec": 1, "on_screen_text": "Tail"}]
+    visuals.generate_visuals(scenes, style="animated slides", workers=1)
+
+    def fail_encode(*args, **kwargs):
+        raise AssertionError("cached scene was re-encoded")
+
+    monkeypatch.setattr(visuals, "_encode_still", fail_encode)
+    monkeypatch.setattr(visuals, "_encode_still_moviepy", fail_encode)
+    outs = visuals.generate_visuals(scenes, style="animated slides", workers=1)
+    assert all(Path(p).stat().st_size > 0 for p in outs)
+
+
+def test_generate_visuals_honors_profile(tmp_path: Path, monkeypatch):
+    from src.probe import probe
+
+    monkeypatch.chdir(tmp_path)
+    profile = EncodingProfile.from_settings("720p HD", fps=24, bitrate="Medium", tier="draft")
+    (out,) = generate_visuals([{"duration_sec": 1, "on_screen_text": "Draft"}], style="animated slides", profile=profile)
+    video = probe(out).video
+    assert (video.width, video.height, video.fps) == (1280, 720, 24.0)
+
+
+def test_render_cache_keys_on_what_the_renderer_uses(tmp_path: Path, monkeypatch):
+    from src import visuals
+
+    monkeypatch.chdir(tmp_path)
+    scene = {"duration_sec": 1, "on_screen_text": "Styles"}
+    assert visuals.scene_render_inputs(1, scene, 1, "cinematic") == visuals.scene_render_inputs(1, scene, 1, "modern")
+
+    def broken_encode(*args, **kwargs):
+        raise RuntimeError("no ffmpeg filter support")
+
+    monkeypatch.setattr(visuals, "_encode_still", broken_encode)
+    _path, hit = visuals._render_scene(1, scene, 1)
+    assert not hit
+    _path, hit = visuals._render_scene(1, scene, 1)
+    assert not hit  # a moviepy fallback render is never served under the still-encode key
@@ -0,0 +1,36 @@
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from src import workspace
+from src.thumbnail import create_thumbnail
+from src.tts import synthesize_speech
+from src.workspace import RunWorkspace, new_run_id, work_dir_for
+
+
+def test_run_ids_are_unique_and_time_ordered():
+    ids = [new_run_id() for _ in range(50)]
+    assert len(set(ids)) == 50
+    assert all(a[:15] <= b[:15] for a, b in zip(ids, ids[1:]))
+
+
+def test_workspace_layout_and_cleanup(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(workspace, "CONFIG", dataclasses.replace(workspace.CONFIG, runs_dir=str(tmp_path)))
+    ws = RunWorkspace.create()
+    assert Path(ws.root) == tmp_path / ws.run_id
+    assert work_dir_for(ws) == ws.root and work_dir_for(ws, draft=True) == ws.preview.root
+    assert work_dir_for(None) == "outputs"
+
+    audios = synthesize_speech([{"script_text": "Hello there"}, {"script_text": "Bye"}], voice="", workspace=ws)
+    assert [Path(p).parent for p in audios] == [Path(ws.audio_dir)] * 2
+    thumb = create_thumbnail("Title", workspace=ws)
+    assert thumb == ws.final_path("thumbnail.jpg") and Path(thumb).exists()
+
+    ws.clean_intermediates()
+    assert not Path(ws.audio_dir).exists() and Path(thumb).exists()
+
+
+def test_thumbnail_needs_a_destination():
+    with pytest.raises(ValueError):
+        create_thumbnail("Title")